@@ -1,57 +1,101 @@
 import os
+import threading
 from flask import Flask, request, jsonify, send_from_directory
 from flask_cors import CORS
-from controllers.VideoDetectionController import VideoDetectionController
-from controllers.ModelController import ModelController
 from config.config import Config
 
-# Initialize Flask app
-app = Flask(__name__)
-app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500MB max file size
-app.config['UPLOAD_FOLDER'] = os.path.join(Config.BASE_DIR, 'uploads')
 
-# Enable CORS
-CORS(app)
+def create_app():
+    """Build the Flask app with its controllers, services and routes.
 
-# Initialize Config
-Config.init_app(app)
+    Nothing is built when this module is imported: segment and inference workers are
+    started with spawn and re-import it as __mp_main__, they must not create controllers,
+    job pools or DAOs (which touch the database). Run with `python app.py`, or point a
+    WSGI server at the factory (`flask --app app run`, `gunicorn "app:create_app()"`).
+    """
+    from controllers.VideoDetectionController import VideoDetectionController
+    from controllers.ModelController import ModelController
+    from controllers.HealthController import HealthController
+    from services.ModelWarmupService import ModelWarmupService
+    from services.ModelReloadService import ModelReloadService
 
-# Initialize controllers
-video_detection_controller = VideoDetectionController()
-model_controller = ModelController()
+    # Initialize Flask app
+    app = Flask(__name__)
+    app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500MB max file size
+    app.config['UPLOAD_FOLDER'] = os.path.join(Config.BASE_DIR, 'uploads')
 
-# Register routes
-video_detection_controller.register_routes(app)
-model_controller.register_routes(app)
+    # Enable CORS
+    CORS(app)
 
-UPLOAD_FOLDER = 'uploads'
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    # Initialize Config
+    Config.init_app(app)
 
-# Đảm bảo thư mục uploads tồn tại
-os.makedirs(os.path.join(app.root_path, app.config['UPLOAD_FOLDER']), exist_ok=True)
-os.makedirs(os.path.join(app.root_path, app.config['UPLOAD_FOLDER'], 'flagged_frames'), exist_ok=True)
+    # Initialize controllers
+    video_detection_controller = VideoDetectionController()
+    model_controller = ModelController()
+    model_warmup_service = ModelWarmupService()
+    model_reload_service = ModelReloadService()
+    health_controller = HealthController(model_warmup_service)
 
-# Route để phục vụ các file trong thư mục uploads
-@app.route('/uploads/<path:filename>')
-def uploaded_file(filename):
-    return send_from_directory(os.path.join(app.root_path, app.config['UPLOAD_FOLDER']), filename)
+    # Register routes
+    video_detection_controller.register_routes(app)
+    model_controller.register_routes(app)
+    health_controller.register_routes(app)
 
-# Route cụ thể cho thư mục flagged_frames
-@app.route('/uploads/flagged_frames/<path:filename>')
-def flagged_frame(filename):
-    return send_from_directory(os.path.join(app.root_path, app.config['UPLOAD_FOLDER'], 'flagged_frames'), filename)
+    # Load va warmup model trong luc server da nhan request, /api/health/ready tra 503 cho toi khi xong;
+    # sau do theo doi model bi thay weight de load lai
+    background_services_lock = threading.Lock()
+    background_services_started = []
+
+    def start_background_services():
+        """Start model warmup and weight reload watching once, in the process serving requests"""
+        with background_services_lock:
+            if background_services_started:
+                return
+            background_services_started.append(True)
+        model_warmup_service.start()
+        model_reload_service.start()
+
+    app.extensions['start_background_services'] = start_background_services
+
+    @app.before_request
+    def ensure_background_services():
+        # chay bang WSGI server thi khong qua __main__, request dau tien (vd. health check) khoi dong
+        start_background_services()
+
+    app.config['UPLOAD_FOLDER'] = 'uploads'
+
+    # Đảm bảo thư mục uploads tồn tại
+    os.makedirs(os.path.join(app.root_path, app.config['UPLOAD_FOLDER']), exist_ok=True)
+    os.makedirs(os.path.join(app.root_path, app.config['UPLOAD_FOLDER'], 'flagged_frames'), exist_ok=True)
+
+    # Route để phục vụ các file trong thư mục uploads
+    @app.route('/uploads/<path:filename>')
+    def uploaded_file(filename):
+        return send_from_directory(os.path.join(app.root_path, app.config['UPLOAD_FOLDER']), filename)
+
+    # Route cụ thể cho thư mục flagged_frames
+    @app.route('/uploads/flagged_frames/<path:filename>')
+    def flagged_frame(filename):
+        return send_from_directory(os.path.join(app.root_path, app.config['UPLOAD_FOLDER'], 'flagged_frames'), filename)
+
+    return app
 
 
 if __name__ == '__main__':
+    app = create_app()
+
     # Create necessary directories
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], 'videos'), exist_ok=True)
-    
-    
-    
+
+    # reloader cua Flask (debug) chay file nay hai lan, chi process con phuc vu request
+    if not Config.DEBUG or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        app.extensions['start_background_services']()
+
     # Run app
     app.run(
         host='0.0.0.0',
         port=5000,
         debug=Config.DEBUG
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,25 @@
+import numpy as np
+
+
+class BackendBoxes:
+    """Boxes of one image with the same fields as ultralytics `Results.boxes`, as numpy arrays"""
+
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = cls
+
+    def __len__(self):
+        return len(self.cls)
+
+
+class BackendResult:
+    """Result of one image returned by a non-ultralytics backend (only what the detection code reads)"""
+
+    def __init__(self, xyxy, conf, cls, names):
+        self.boxes = BackendBoxes(
+            np.asarray(xyxy, dtype=np.float32).reshape(-1, 4),
+            np.asarray(conf, dtype=np.float32).reshape(-1),
+            np.asarray(cls, dtype=np.float32).reshape(-1)
+        )
+        self.names = names
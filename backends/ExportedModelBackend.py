@@ -0,0 +1,107 @@
+import threading
+from abc import abstractmethod
+import cv2
+import numpy as np
+from config.config import Config
+from backends.InferenceBackend import InferenceBackend
+from backends.BackendResult import BackendResult
+from utils.Letterbox import Letterbox
+from utils.detection_utils import Detections
+
+
+class ExportedModelBackend(InferenceBackend):
+    """Shared pre/post-processing for models exported from ultralytics (ONNX, OpenVINO IR).
+
+    Images are letterboxed (skipped when they already have a stride-aligned model size,
+    which is what detect_frames passes in), packed into a reused NCHW float32 buffer,
+    run through `_run` and decoded with class-aware NMS like ultralytics does.
+    """
+
+    def __init__(self, model_path):
+        super().__init__(model_path)
+        self._letterboxes = {}
+        self._input_buffer = None
+        # buffer va letterbox dung chung nen moi lan chi chay mot batch
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _run(self, tensor):
+        """Run the model on a (N, 3, H, W) float32 tensor and return the raw output array"""
+        pass
+
+    def predict(self, images, conf=0.25, imgsz=None):
+        if not images:
+            return []
+        imgsz = imgsz or self.imgsz or 640
+        if isinstance(imgsz, (list, tuple)):
+            imgsz = max(imgsz)
+
+        # cac anh co kich thuoc khac nhau khong ghep duoc mot tensor, chay rieng tung nhom
+        groups = {}
+        for index, image in enumerate(images):
+            groups.setdefault(image.shape, []).append(index)
+
+        results = [None] * len(images)
+        with self._lock:
+            for indexes in groups.values():
+                group_results = self._infer_group([images[index] for index in indexes], conf, imgsz)
+                for index, result in zip(indexes, group_results):
+                    results[index] = result
+        return results
+
+    def _infer_group(self, images, conf, imgsz):
+        height, width = images[0].shape[:2]
+        letterbox = None
+        if height % self.stride or width % self.stride or max(height, width) > imgsz:
+            letterbox = self._letterboxes.get(imgsz)
+            if letterbox is None:
+                letterbox = self._letterboxes[imgsz] = Letterbox(imgsz, self.stride)
+            images = letterbox.apply(images)
+
+        output = self._run(self._to_tensor(images))
+        results = []
+        for index, prediction in enumerate(output):
+            detections = self._decode(prediction, conf)
+            if letterbox:
+                detections = letterbox.to_original(detections, index)
+            results.append(BackendResult(detections.xyxy, detections.confidence, detections.class_ids, self.names))
+        return results
+
+    def _to_tensor(self, images):
+        height, width = images[0].shape[:2]
+        shape = (len(images), 3, height, width)
+        buffer = self._input_buffer
+        if buffer is None or buffer.shape[1:] != shape[1:] or buffer.shape[0] < shape[0]:
+            buffer = self._input_buffer = np.empty(shape, dtype=np.float32)
+        tensor = buffer[:len(images)]
+        for index, image in enumerate(images):
+            # BGR HWC uint8 -> RGB CHW float 0-1, ghi thang vao buffer
+            np.multiply(image[:, :, ::-1].transpose(2, 0, 1), np.float32(1 / 255), out=tensor[index], casting='unsafe')
+        return tensor
+
+    def _decode(self, prediction, conf):
+        prediction = np.asarray(prediction, dtype=np.float32)
+        # model end-to-end (da co NMS trong model): (max_det, 6) = x1, y1, x2, y2, conf, cls
+        if prediction.ndim == 2 and prediction.shape[1] == 6 and prediction.shape[0] != 6:
+            keep = prediction[:, 4] > conf
+            return Detections(prediction[keep, :4], prediction[keep, 4], prediction[keep, 5].astype(np.int64))
+
+        # YOLOv8 / YOLO11: (4 + so class, so anchor) = cx, cy, w, h, diem tung class
+        prediction = prediction.T
+        scores = prediction[:, 4:]
+        class_ids = scores.argmax(axis=1)
+        confidence = scores[np.arange(len(scores)), class_ids]
+        keep = confidence > conf
+        boxes, confidence, class_ids = prediction[keep, :4], confidence[keep], class_ids[keep]
+        if not len(boxes):
+            return Detections(np.zeros((0, 4), dtype=np.float32), confidence, class_ids.astype(np.int64))
+
+        xywh = boxes.copy()
+        xywh[:, :2] -= boxes[:, 2:] / 2
+        indexes = cv2.dnn.NMSBoxesBatched(
+            xywh.tolist(), confidence.tolist(), class_ids.tolist(), conf, Config.NMS_IOU_THRESHOLD,
+            top_k=Config.MAX_DETECTIONS
+        )
+        indexes = np.asarray(indexes, dtype=np.int64).reshape(-1)
+        xyxy = np.concatenate([xywh[indexes, :2], xywh[indexes, :2] + boxes[indexes, 2:]], axis=1)
+        return Detections(xyxy, confidence[indexes], class_ids[indexes].astype(np.int64))
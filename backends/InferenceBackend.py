@@ -0,0 +1,38 @@
+import os
+from abc import ABC, abstractmethod
+from backends.InferenceScheduler import InferenceScheduler
+
+
+class InferenceBackend(ABC):
+    """A loaded detection model.
+
+    Called like an ultralytics YOLO model: `backend(images, conf=..., imgsz=...)` returns one
+    result per image with `.boxes.xyxy / .conf / .cls` in the coordinates of that image.
+    `names` maps class id -> class name, `stride` and `imgsz` describe the expected input.
+    Subclasses implement `predict`; every call waits for a slot of the InferenceScheduler.
+    """
+
+    name = None
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self.names = {}
+        self.stride = 32
+        self.imgsz = None
+
+    def __call__(self, images, conf=0.25, imgsz=None):
+        with InferenceScheduler.get_instance().slot():
+            return self.predict(images, conf=conf, imgsz=imgsz)
+
+    @abstractmethod
+    def predict(self, images, conf=0.25, imgsz=None):
+        pass
+
+    def memory_size(self):
+        """Estimated resident size of the model in bytes (size of its weights files by default)"""
+        if os.path.isdir(self.model_path):
+            return sum(
+                os.path.getsize(os.path.join(root, name))
+                for root, _, names in os.walk(self.model_path) for name in names
+            )
+        return os.path.getsize(self.model_path) if os.path.exists(self.model_path) else 0
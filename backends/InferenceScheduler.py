@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from config.config import Config
+
+
+class InferenceScheduler:
+    """Limit how many model calls run at once in this process.
+
+    There are Config.INFERENCE_SLOTS slots and every model gets cpu_count / slots threads, so
+    concurrent requests share the cores instead of each starting a full thread pool. Callers
+    waiting for a slot are served round-robin per owner (by default the calling thread, i.e.
+    one detection), so a long video cannot starve a short one queued behind it.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    # so thoi gian cho gan nhat dung de tinh p95
+    RECENT_WAITS = 1000
+
+    def __init__(self, slots=None):
+        self.slots = max(1, int(slots or Config.INFERENCE_SLOTS))
+        self.threads_per_slot = max(1, (os.cpu_count() or 1) // self.slots)
+        self._condition = threading.Condition()
+        self._active = 0
+        # owner -> cac ticket dang cho, owner vua duoc cap slot bi xep xuong cuoi
+        self._waiting = OrderedDict()
+        self._granted = set()
+        self._recent_waits = deque(maxlen=self.RECENT_WAITS)
+        self._stats = {'calls': 0, 'waitSeconds': 0.0, 'maxWaitSeconds': 0.0, 'busySeconds': 0.0}
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @contextmanager
+    def slot(self, owner=None):
+        """Hold one slot for the duration of a model call"""
+        self.acquire(owner)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - start)
+
+    def acquire(self, owner=None):
+        owner = owner if owner is not None else threading.get_ident()
+        ticket = object()
+        start = time.perf_counter()
+        with self._condition:
+            self._waiting.setdefault(owner, deque()).append(ticket)
+            self._grant()
+            while ticket not in self._granted:
+                self._condition.wait()
+            self._granted.discard(ticket)
+
+            wait = time.perf_counter() - start
+            self._recent_waits.append(wait)
+            self._stats['calls'] += 1
+            self._stats['waitSeconds'] += wait
+            self._stats['maxWaitSeconds'] = max(self._stats['maxWaitSeconds'], wait)
+
+    def release(self, busy_seconds=0.0):
+        with self._condition:
+            self._active -= 1
+            self._stats['busySeconds'] += busy_seconds
+            self._grant()
+
+    def _grant(self):
+        granted = False
+        while self._active < self.slots and self._waiting:
+            owner, tickets = self._waiting.popitem(last=False)
+            self._granted.add(tickets.popleft())
+            self._active += 1
+            granted = True
+            # round robin: owner con ticket thi xep lai cuoi hang
+            if tickets:
+                self._waiting[owner] = tickets
+        if granted:
+            self._condition.notify_all()
+
+    def get_stats(self):
+        with self._condition:
+            calls = self._stats['calls']
+            waits = sorted(self._recent_waits)
+            return {
+                'slots': self.slots,
+                'threadsPerSlot': self.threads_per_slot,
+                'active': self._active,
+                'queueDepth': sum(len(tickets) for tickets in self._waiting.values()),
+                'waitingOwners': len(self._waiting),
+                'calls': calls,
+                'avgWaitMs': round(self._stats['waitSeconds'] / calls * 1000, 2) if calls else None,
+                'p95WaitMs': round(waits[int(0.95 * (len(waits) - 1))] * 1000, 2) if waits else None,
+                'maxWaitMs': round(self._stats['maxWaitSeconds'] * 1000, 2),
+                'busySeconds': round(self._stats['busySeconds'], 3)
+            }
@@ -0,0 +1,261 @@
+import atexit
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+import numpy as np
+from config.config import Config
+from backends.SharedFrameRing import SharedFrameRing
+
+
+LOAD = 'load'
+INFER = 'infer'
+
+
+def _inference_worker(ring_name, slots, slot_size, requests, results, threads):
+    """Worker process: load models on demand and run inference on frames read from the shared ring"""
+    from backends import create_backend
+    from utils.detection_utils import to_numpy
+
+    try:
+        import torch
+        # chia deu so core cho cac worker de khong bi oversubscription
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+    ring = SharedFrameRing(slots, slot_size, name=ring_name)
+    # model cua worker, key = (duong dan, backend, version); model cu nhat bi bo khi qua gioi han
+    models = OrderedDict()
+    try:
+        while True:
+            message = requests.get()
+            if message is None:
+                break
+            kind, request_id, spec, payload = message
+            try:
+                model = models.get(spec)
+                if model is None:
+                    model_path, backend, _ = spec
+                    model = models[spec] = create_backend(model_path, backend, threads=threads)
+                    while len(models) > max(1, Config.INFERENCE_WORKER_MAX_MODELS):
+                        models.popitem(last=False)
+                models.move_to_end(spec)
+
+                if kind == LOAD:
+                    result = {'names': model.names, 'stride': model.stride, 'imgsz': model.imgsz, 'name': model.name}
+                else:
+                    slot, shapes, conf, imgsz = payload
+                    images = ring.read(slot, shapes)
+                    outputs = model(images, conf=conf, imgsz=imgsz)
+                    # chi gui ve mang box nho qua queue, khong gui lai anh
+                    result = [
+                        (
+                            to_numpy(output.boxes.xyxy).astype(np.float32, copy=False).reshape(-1, 4),
+                            to_numpy(output.boxes.conf).astype(np.float32, copy=False).reshape(-1),
+                            to_numpy(output.boxes.cls).astype(np.int64).reshape(-1)
+                        )
+                        for output in outputs
+                    ]
+                    del images, outputs
+                results.put((request_id, result, None))
+            except Exception as e:
+                results.put((request_id, None, f"{type(e).__name__}: {e}"))
+    finally:
+        ring.close()
+
+
+class InferenceServer:
+    """Worker processes that hold the models and run inference outside the Flask process.
+
+    Frames go to the workers through a SharedFrameRing (one copy in, NumPy views in the worker,
+    no pickling); requests carry only the slot and the shapes and detections come back as small
+    arrays over a result queue. A batch is split over the idle workers so even a single video
+    keeps every worker busy. Each worker gets cpu_count / workers threads. A worker process
+    that dies has its pending requests failed and its ring slots released, and is restarted.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    # so giay toi da giua hai lan kiem tra worker con song, ke ca khi cac worker khac van tra ket qua lien tuc
+    WORKER_CHECK_INTERVAL = 0.5
+
+    def __init__(self, workers, slots=None, slot_size=None):
+        self.workers = max(1, int(workers))
+        self.threads = max(1, (os.cpu_count() or 1) // self.workers)
+        slots = slots or Config.INFERENCE_RING_SLOTS or 2 * self.workers
+        slot_size = slot_size or int(Config.INFERENCE_SLOT_MB * 1024 ** 2)
+        self.ring = SharedFrameRing(slots, slot_size)
+
+        self._context = multiprocessing.get_context('spawn')
+        self._results = self._context.Queue()
+        self._requests = [None] * self.workers
+        self._processes = [None] * self.workers
+        for index in range(self.workers):
+            self._start_worker(index)
+
+        self._pending = {}
+        self._outstanding = [0] * self.workers
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._closed = False
+        self._dispatcher = threading.Thread(target=self._dispatch_results, name='inference-results', daemon=True)
+        self._dispatcher.start()
+        atexit.register(self.close)
+
+    @classmethod
+    def get_instance(cls):
+        """Shared server with Config.INFERENCE_WORKERS workers, started on first use"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(Config.INFERENCE_WORKERS)
+        return cls._instance
+
+    def _start_worker(self, index):
+        # queue moi cho moi process: request con nam trong queue cua worker da chet khong duoc chay lai
+        self._requests[index] = self._context.Queue()
+        self._processes[index] = self._context.Process(
+            target=_inference_worker, name=f'inference-worker-{index}', daemon=True,
+            args=(self.ring.name, self.ring.slots, self.ring.slot_size, self._requests[index],
+                  self._results, self.threads)
+        )
+        self._processes[index].start()
+
+    def _submit(self, worker, kind, spec, payload, slot=None):
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Inference server is closed")
+            request_id = next(self._ids)
+            self._pending[request_id] = (future, worker, slot)
+            self._outstanding[worker] += 1
+            requests = self._requests[worker]
+        requests.put((kind, request_id, spec, payload))
+        return future
+
+    def _check_workers(self):
+        """Fail the requests of worker processes that died, free their slots and restart them"""
+        for index, process in enumerate(self._processes):
+            if process.is_alive():
+                continue
+            with self._lock:
+                if self._closed:
+                    return
+                lost = [
+                    (request_id, future, slot)
+                    for request_id, (future, worker, slot) in self._pending.items()
+                    if worker == index
+                ]
+                for request_id, _, _ in lost:
+                    del self._pending[request_id]
+                self._outstanding[index] = 0
+                self._start_worker(index)
+            print(f"Inference worker {index} exited with code {process.exitcode}, "
+                  f"failed {len(lost)} pending requests and restarted it")
+            for _, future, slot in lost:
+                if slot is not None:
+                    self.ring.release(slot)
+                future.set_exception(RuntimeError(
+                    f"Inference worker {index} exited with code {process.exitcode}"
+                ))
+
+    def _dispatch_results(self):
+        next_check = time.monotonic() + self.WORKER_CHECK_INTERVAL
+        while True:
+            try:
+                message = self._results.get(timeout=max(0, next_check - time.monotonic()))
+            except queue.Empty:
+                message = False
+            if time.monotonic() >= next_check:
+                self._check_workers()
+                next_check = time.monotonic() + self.WORKER_CHECK_INTERVAL
+            if message is False:
+                continue
+            if message is None:
+                return
+            request_id, result, error = message
+            with self._lock:
+                future, worker, slot = self._pending.pop(request_id, (None, None, None))
+                if worker is not None:
+                    self._outstanding[worker] -= 1
+            # worker da doc xong anh, slot duoc dung lai
+            if slot is not None:
+                self.ring.release(slot)
+            if future is None:
+                continue
+            if error:
+                future.set_exception(RuntimeError(f"Inference worker failed: {error}"))
+            else:
+                future.set_result(result)
+
+    def _least_busy_workers(self, count):
+        with self._lock:
+            # worker da chet nhung chua duoc khoi dong lai thi khong giao viec
+            workers = [worker for worker in range(self.workers) if self._processes[worker].is_alive()]
+            return sorted(workers or range(self.workers), key=lambda worker: self._outstanding[worker])[:count]
+
+    def load(self, spec):
+        """Load a model in every worker, return its metadata (names, stride, imgsz, name)"""
+        futures = [self._submit(worker, LOAD, spec, None) for worker in range(self.workers)]
+        results = [future.result(timeout=Config.INFERENCE_TIMEOUT) for future in futures]
+        return results[0]
+
+    def infer(self, spec, images, conf, imgsz=None):
+        """Run a model on a list of uint8 images, return (xyxy, conf, cls) arrays per image in order"""
+        if not images:
+            return []
+        # chia batch cho cac worker dang ranh nhat, moi phan phai vua mot slot
+        chunks = []
+        chunk_size = -(-len(images) // self.workers)
+        for start in range(0, len(images), chunk_size):
+            chunks.extend(self._split_to_slots(images[start:start + chunk_size]))
+
+        workers = self._least_busy_workers(len(chunks))
+        futures = []
+        for index, chunk in enumerate(chunks):
+            slot = self.ring.acquire(timeout=Config.INFERENCE_TIMEOUT)
+            try:
+                shapes = self.ring.write(slot, chunk)
+                worker = workers[index % len(workers)]
+                futures.append(self._submit(worker, INFER, spec, (slot, shapes, conf, imgsz), slot=slot))
+            except Exception:
+                self.ring.release(slot)
+                raise
+
+        outputs = []
+        for future in futures:
+            outputs.extend(future.result(timeout=Config.INFERENCE_TIMEOUT))
+        return outputs
+
+    def _split_to_slots(self, images):
+        chunks = [[]]
+        for image in images:
+            if not self.ring.fits([image.shape]):
+                raise ValueError(
+                    f"Frame {image.shape} does not fit an inference slot, increase INFERENCE_SLOT_MB"
+                )
+            if chunks[-1] and not self.ring.fits([item.shape for item in chunks[-1]] + [image.shape]):
+                chunks.append([])
+            chunks[-1].append(image)
+        return chunks
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        for requests in self._requests:
+            requests.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._results.put(None)
+        self._dispatcher.join(timeout=5)
+        self.ring.close()
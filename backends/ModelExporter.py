@@ -0,0 +1,69 @@
+import os
+import json
+import threading
+
+
+class ModelExporter:
+    """Export ultralytics .pt weights to another format once and cache the result next to the weights.
+
+    The cached export is reused until the .pt file changes (size or mtime differs from the
+    ones recorded at export time, so weights copied over with an older mtime are re-exported too).
+    """
+
+    ONNX = 'onnx'
+    OPENVINO = 'openvino'
+
+    _locks = {}
+    _locks_lock = threading.Lock()
+
+    def get_export_path(self, model_path, export_format):
+        base, _ = os.path.splitext(model_path)
+        if export_format == self.ONNX:
+            return base + '.onnx'
+        if export_format == self.OPENVINO:
+            return base + '_openvino_model'
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    def get_source_path(self, export_path):
+        return export_path + '.source.json'
+
+    def _source_stat(self, model_path):
+        stat = os.stat(model_path)
+        return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    def is_fresh(self, model_path, export_path):
+        if not os.path.exists(export_path):
+            return False
+        source_path = self.get_source_path(export_path)
+        if os.path.exists(source_path):
+            with open(source_path) as f:
+                return json.load(f) == self._source_stat(model_path)
+        # export cu chua ghi thong tin file .pt
+        return os.path.getmtime(export_path) >= os.path.getmtime(model_path)
+
+    def export(self, model_path, export_format, imgsz=None):
+        """Return the path of the exported model, exporting it first if there is no up-to-date copy"""
+        export_path = self.get_export_path(model_path, export_format)
+        if self.is_fresh(model_path, export_path):
+            return export_path
+
+        # nhieu thread cung load mot model thi chi export mot lan
+        with self._locks_lock:
+            lock = self._locks.setdefault(export_path, threading.Lock())
+        with lock:
+            if self.is_fresh(model_path, export_path):
+                return export_path
+
+            from ultralytics import YOLO
+            print(f"Exporting {model_path} to {export_format}")
+            source = self._source_stat(model_path)
+            options = {'format': export_format, 'dynamic': True}
+            if imgsz:
+                options['imgsz'] = imgsz
+            exported = YOLO(model_path).export(**options)
+            # ultralytics ghi file canh file .pt, doi ten neu duong dan khac voi duong dan cache
+            if exported and os.path.abspath(str(exported)) != os.path.abspath(export_path):
+                os.replace(str(exported), export_path)
+            with open(self.get_source_path(export_path), 'w') as f:
+                json.dump(source, f)
+            return export_path
@@ -0,0 +1,97 @@
+import os
+import cv2
+import numpy as np
+from utils.Letterbox import Letterbox
+
+
+class CalibrationReader:
+    """Feed sample frames to ONNX Runtime static quantization, one letterboxed image per call"""
+
+    def __init__(self, input_name, image_paths, imgsz, stride=32):
+        self.input_name = input_name
+        self.image_paths = list(image_paths)
+        self.letterbox = Letterbox(imgsz, stride)
+        self._index = 0
+
+    def get_next(self):
+        while self._index < len(self.image_paths):
+            path = self.image_paths[self._index]
+            self._index += 1
+            frame = cv2.imread(path)
+            if frame is None:
+                print(f"Skipping unreadable calibration image: {path}")
+                continue
+            image = self.letterbox.apply([frame])[0]
+            # cung preprocessing voi luc inference: BGR -> RGB, CHW, 0-1
+            tensor = image[:, :, ::-1].transpose(2, 0, 1)[None].astype(np.float32) / 255
+            return {self.input_name: tensor}
+        return None
+
+    def rewind(self):
+        self._index = 0
+
+
+class ModelQuantizer:
+    """Quantize an FP32 ONNX model to INT8 with ONNX Runtime.
+
+    Dynamic quantization converts the weights only. Static quantization also quantizes
+    the activations, with ranges calibrated on sample frames letterboxed like at inference.
+    The quantized file is written next to the FP32 model.
+    """
+
+    DYNAMIC = 'dynamic'
+    STATIC = 'static'
+    MODES = (DYNAMIC, STATIC)
+
+    IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+    def get_variant_path(self, onnx_path, mode):
+        if mode not in self.MODES:
+            raise ValueError(f"Unsupported quantization mode: {mode}. Available: {', '.join(self.MODES)}")
+        base, _ = os.path.splitext(onnx_path)
+        return f"{base}_int8_{mode}.onnx"
+
+    def list_images(self, folder, limit=None):
+        """Image files of a folder in name order, at most `limit` spread evenly over the folder"""
+        paths = sorted(
+            os.path.join(folder, name) for name in os.listdir(folder)
+            if name.lower().endswith(self.IMAGE_EXTENSIONS)
+        )
+        if limit and len(paths) > limit:
+            indexes = np.linspace(0, len(paths) - 1, limit).round().astype(int)
+            paths = [paths[index] for index in indexes]
+        return paths
+
+    def quantize(self, onnx_path, mode, calibration_images=None, imgsz=640, stride=32):
+        """Write the INT8 model and return its path; static mode needs `calibration_images`"""
+        import onnx
+        from onnxruntime.quantization import (
+            CalibrationMethod, QuantFormat, QuantType, quantize_dynamic, quantize_static
+        )
+
+        output_path = self.get_variant_path(onnx_path, mode)
+        # ghi ra file tam roi doi ten, model dang duoc load khong bi doc file ghi do
+        temp_path = output_path + '.tmp'
+        try:
+            if mode == self.DYNAMIC:
+                # ConvInteger cua ONNX Runtime tren CPU chi ho tro weight uint8
+                quantize_dynamic(onnx_path, temp_path, weight_type=QuantType.QUInt8)
+            else:
+                if not calibration_images:
+                    raise ValueError("Static quantization needs calibration images")
+                model = onnx.load(onnx_path, load_external_data=False)
+                reader = CalibrationReader(model.graph.input[0].name, calibration_images, imgsz, stride)
+                quantize_static(
+                    onnx_path, temp_path, reader,
+                    quant_format=QuantFormat.QDQ,
+                    activation_type=QuantType.QUInt8,
+                    weight_type=QuantType.QInt8,
+                    per_channel=True,
+                    calibrate_method=CalibrationMethod.MinMax
+                )
+            os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return output_path
+
@@ -0,0 +1,152 @@
+import threading
+import time
+from collections import OrderedDict
+from config.config import Config
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded models, bounded by memory.
+
+    Every ModelService shares the registry returned by `get_instance()`. A model is loaded at
+    most once at a time (one lock per key) and when the estimated memory of the loaded models
+    goes over the budget the least recently used ones are dropped. A dropped model that a
+    running detection still holds keeps working; its memory is freed when that detection ends.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, memory_budget_mb=None):
+        if memory_budget_mb is None:
+            memory_budget_mb = Config.MODEL_MEMORY_BUDGET_MB
+        # 0 = khong gioi han
+        self.memory_budget = int(memory_budget_mb * 1024 ** 2)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._stats = {'hits': 0, 'loads': 0, 'loadErrors': 0, 'evictions': 0, 'reloads': 0, 'loadSeconds': 0.0}
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def get(self, key, loader):
+        """Entry of `key` (a dict with at least 'model'), calling `loader()` to build it when it is not loaded"""
+        with self._lock:
+            entry = self._hit(key)
+            if entry is not None:
+                return entry
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            # thread khac vua load xong trong luc cho lock
+            with self._lock:
+                entry = self._hit(key)
+                if entry is not None:
+                    return entry
+
+            start = time.perf_counter()
+            try:
+                entry = loader()
+            except Exception:
+                with self._lock:
+                    self._stats['loadErrors'] += 1
+                raise
+            load_seconds = time.perf_counter() - start
+
+            model = entry['model']
+            memory_size = model.memory_size() if hasattr(model, 'memory_size') else 0
+            with self._lock:
+                self._stats['loads'] += 1
+                self._stats['loadSeconds'] += load_seconds
+                self._entries[key] = {
+                    'entry': entry,
+                    'memory': memory_size,
+                    'loadSeconds': load_seconds,
+                    'loadedAt': time.time(),
+                    'lastUsed': time.time(),
+                    'hits': 0
+                }
+                self._evict_over_budget(keep=key)
+            return entry
+
+    def _hit(self, key):
+        record = self._entries.get(key)
+        if record is None:
+            return None
+        self._entries.move_to_end(key)
+        record['hits'] += 1
+        record['lastUsed'] = time.time()
+        self._stats['hits'] += 1
+        return record['entry']
+
+    def _evict_over_budget(self, keep):
+        if not self.memory_budget:
+            return
+        # model vua load luon duoc giu lai, ke ca khi mot minh no da vuot budget
+        while self._memory_used() > self.memory_budget and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            if key == keep:
+                break
+            record = self._entries.pop(key)
+            self._stats['evictions'] += 1
+            print(f"Evicted model {key} from the registry ({record['memory'] / 1024 ** 2:.1f} MB)")
+
+    def _memory_used(self):
+        return sum(record['memory'] for record in self._entries.values())
+
+    def entries(self):
+        """Snapshot of the loaded (key, entry) pairs"""
+        with self._lock:
+            return [(key, record['entry']) for key, record in self._entries.items()]
+
+    def replace(self, key, entry):
+        """Swap in a newly loaded entry for a key; callers holding the old model keep using it.
+        Return False when the key was evicted meanwhile (the new entry is then dropped)"""
+        model = entry['model']
+        memory_size = model.memory_size() if hasattr(model, 'memory_size') else 0
+        with self._lock:
+            record = self._entries.get(key)
+            if record is None:
+                return False
+            record['entry'] = entry
+            record['memory'] = memory_size
+            record['loadedAt'] = time.time()
+            self._stats['reloads'] += 1
+            self._evict_over_budget(keep=key)
+            return True
+
+    def evict(self, key=None, predicate=None):
+        """Drop one key, or every key for which `predicate(key)` is true; return the dropped keys"""
+        with self._lock:
+            keys = [key] if key is not None else [k for k in self._entries if predicate and predicate(k)]
+            dropped = [k for k in keys if self._entries.pop(k, None) is not None]
+            self._stats['evictions'] += len(dropped)
+            return dropped
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['loads']
+            return {
+                **self._stats,
+                'loadSeconds': round(self._stats['loadSeconds'], 3),
+                'hitRate': round(self._stats['hits'] / lookups, 4) if lookups else None,
+                'memoryBudgetMb': round(self.memory_budget / 1024 ** 2, 1),
+                'memoryUsedMb': round(self._memory_used() / 1024 ** 2, 1),
+                # thu tu tu it dung gan day nhat den dung gan day nhat
+                'models': [
+                    {
+                        'key': list(key) if isinstance(key, tuple) else key,
+                        'memoryMb': round(record['memory'] / 1024 ** 2, 1),
+                        'hits': record['hits'],
+                        'loadSeconds': round(record['loadSeconds'], 3),
+                        'loadedAt': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record['loadedAt'])),
+                        'lastUsed': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record['lastUsed']))
+                    }
+                    for key, record in self._entries.items()
+                ]
+            }
@@ -0,0 +1,38 @@
+import ast
+from config.config import Config
+from backends.ExportedModelBackend import ExportedModelBackend
+
+
+class OnnxRuntimeBackend(ExportedModelBackend):
+    """ONNX model exported by ultralytics, run with ONNX Runtime on CPU"""
+
+    name = 'onnx'
+
+    def __init__(self, model_path, threads=None):
+        super().__init__(model_path)
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        # mot model chay tren tat ca core (intra-op), khong chay song song cac node (inter-op)
+        threads = threads or Config.INFERENCE_THREADS
+        if threads:
+            options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+        # ultralytics ghi names / stride / imgsz vao metadata cua file onnx
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        if 'names' in metadata:
+            self.names = ast.literal_eval(metadata['names'])
+        if 'stride' in metadata:
+            self.stride = int(metadata['stride'])
+        if 'imgsz' in metadata:
+            imgsz = ast.literal_eval(metadata['imgsz'])
+            self.imgsz = max(imgsz) if isinstance(imgsz, (list, tuple)) else imgsz
+
+    def _run(self, tensor):
+        return self.session.run(None, {self.input_name: tensor})[0]
@@ -0,0 +1,43 @@
+import os
+import yaml
+from config.config import Config
+from backends.ExportedModelBackend import ExportedModelBackend
+
+
+class OpenVinoBackend(ExportedModelBackend):
+    """OpenVINO IR model exported by ultralytics (folder with .xml/.bin and metadata.yaml), run on CPU"""
+
+    name = 'openvino'
+
+    def __init__(self, model_path, threads=None):
+        super().__init__(model_path)
+        import openvino
+
+        model_dir = model_path if os.path.isdir(model_path) else os.path.dirname(model_path)
+        xml_path = model_path
+        if os.path.isdir(model_path):
+            xml_path = next(
+                os.path.join(model_dir, name) for name in sorted(os.listdir(model_dir)) if name.endswith('.xml')
+            )
+
+        config = {'PERFORMANCE_HINT': Config.OPENVINO_PERFORMANCE_HINT}
+        threads = threads or Config.INFERENCE_THREADS
+        if threads:
+            config['INFERENCE_NUM_THREADS'] = threads
+        core = openvino.Core()
+        self.compiled_model = core.compile_model(core.read_model(xml_path), 'CPU', config)
+        self.request = self.compiled_model.create_infer_request()
+
+        metadata_path = os.path.join(model_dir, 'metadata.yaml')
+        if os.path.exists(metadata_path):
+            with open(metadata_path) as f:
+                metadata = yaml.safe_load(f) or {}
+            self.names = metadata.get('names', self.names)
+            self.stride = int(metadata.get('stride', self.stride))
+            imgsz = metadata.get('imgsz')
+            if imgsz:
+                self.imgsz = max(imgsz) if isinstance(imgsz, (list, tuple)) else imgsz
+
+    def _run(self, tensor):
+        self.request.infer({0: tensor})
+        return self.request.get_output_tensor(0).data.copy()
@@ -0,0 +1,29 @@
+from backends.InferenceBackend import InferenceBackend
+from backends.BackendResult import BackendResult
+
+
+class RemoteModel(InferenceBackend):
+    """Proxy for a model loaded in the InferenceServer worker processes, called like any backend"""
+
+    def __init__(self, server, model_path, backend=None, version=None):
+        super().__init__(model_path)
+        self.server = server
+        # version (mtime cua weight) doi thi worker load ban moi thay vi dung ban da cache
+        self.spec = (model_path, backend, version)
+        metadata = server.load(self.spec)
+        self.name = metadata['name']
+        self.names = metadata['names']
+        self.stride = metadata['stride']
+        self.imgsz = metadata['imgsz']
+
+    def __call__(self, images, conf=0.25, imgsz=None):
+        # cac worker process tu chia core, khong can cho slot cua scheduler trong process nay
+        return self.predict(images, conf=conf, imgsz=imgsz)
+
+    def predict(self, images, conf=0.25, imgsz=None):
+        outputs = self.server.infer(self.spec, images, conf, imgsz)
+        return [BackendResult(xyxy, confidence, class_ids, self.names) for xyxy, confidence, class_ids in outputs]
+
+    def memory_size(self):
+        # moi worker giu mot ban model
+        return super().memory_size() * self.server.workers
@@ -0,0 +1,77 @@
+import queue
+from multiprocessing import shared_memory
+import numpy as np
+
+
+class SharedFrameRing:
+    """Fixed-size slots in one shared memory block for handing frames to other processes.
+
+    The owner copies a batch of uint8 images into a free slot (`write`) and sends only the
+    slot index and the image shapes; the reader process gets NumPy views on the same memory
+    (`read`), so frames are never pickled. Slots are handed out by the owner with
+    `acquire` / `release`.
+    """
+
+    # moi anh bat dau o offset chia het cho 64 (cache line)
+    ALIGNMENT = 64
+
+    def __init__(self, slots, slot_size, name=None):
+        self.slots = slots
+        self.slot_size = -(-int(slot_size) // self.ALIGNMENT) * self.ALIGNMENT
+        self.is_owner = name is None
+        if self.is_owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_size)
+            self._free = queue.Queue()
+            for slot in range(self.slots):
+                self._free.put(slot)
+        else:
+            # process spawn dung chung resource_tracker voi process tao ra vung nho, chi process tao moi unlink
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+
+    def acquire(self, timeout=None):
+        """Index of a free slot, waiting up to `timeout` seconds"""
+        try:
+            return self._free.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("No free frame slot in the shared memory ring")
+
+    def release(self, slot):
+        self._free.put(slot)
+
+    def _layout(self, shapes):
+        offsets = []
+        offset = 0
+        for shape in shapes:
+            offsets.append(offset)
+            offset += -(-int(np.prod(shape)) // self.ALIGNMENT) * self.ALIGNMENT
+        return offsets, offset
+
+    def fits(self, shapes):
+        return self._layout(shapes)[1] <= self.slot_size
+
+    def write(self, slot, images):
+        """Copy images (uint8, any strides) into a slot, return their shapes for `read`"""
+        shapes = [tuple(image.shape) for image in images]
+        offsets, size = self._layout(shapes)
+        if size > self.slot_size:
+            raise ValueError(f"Batch of {size} bytes does not fit a {self.slot_size} byte frame slot")
+        base = slot * self.slot_size
+        for image, shape, offset in zip(images, shapes, offsets):
+            target = np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf, offset=base + offset)
+            np.copyto(target, image, casting='unsafe')
+        return shapes
+
+    def read(self, slot, shapes):
+        """Views on the images of a slot (valid until the slot is written again)"""
+        offsets, _ = self._layout(shapes)
+        base = slot * self.slot_size
+        return [
+            np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf, offset=base + offset)
+            for shape, offset in zip(shapes, offsets)
+        ]
+
+    def close(self):
+        self.shm.close()
+        if self.is_owner:
+            self.shm.unlink()
@@ -0,0 +1,39 @@
+import threading
+from backends.InferenceBackend import InferenceBackend
+
+
+class UltralyticsBackend(InferenceBackend):
+    """PyTorch model run through ultralytics YOLO (default backend)"""
+
+    name = 'ultralytics'
+
+    def __init__(self, model_path, threads=None):
+        super().__init__(model_path)
+        from ultralytics import YOLO
+
+        if threads:
+            import torch
+            # so thread cua pytorch la chung cho ca process, moi model load deu dat cung mot gia tri
+            torch.set_num_threads(threads)
+        self.model = YOLO(model_path)
+        self.names = self.model.names
+        stride = getattr(getattr(self.model, 'model', None), 'stride', None)
+        self.stride = int(max(stride)) if stride is not None else 32
+        self.imgsz = self.model.overrides.get('imgsz')
+        # predictor cua ultralytics khong an toan khi nhieu thread goi cung luc
+        self._lock = threading.Lock()
+
+    def predict(self, images, conf=0.25, imgsz=None):
+        options = {'conf': conf}
+        if imgsz:
+            options['imgsz'] = imgsz
+        with self._lock:
+            return self.model(images, **options)
+
+    def memory_size(self):
+        # weight pytorch da giai nen (file .pt co the nho hon), tinh ca buffer cua batchnorm
+        module = getattr(self.model, 'model', None)
+        if module is None or not hasattr(module, 'parameters'):
+            return super().memory_size()
+        tensors = list(module.parameters()) + list(module.buffers())
+        return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
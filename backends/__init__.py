@@ -0,0 +1,89 @@
+# backends/__init__.py
+
+import os
+import importlib.util
+from config.config import Config
+from .BackendResult import BackendResult, BackendBoxes
+from .InferenceScheduler import InferenceScheduler
+from .InferenceBackend import InferenceBackend
+from .ExportedModelBackend import ExportedModelBackend
+from .UltralyticsBackend import UltralyticsBackend
+from .OnnxRuntimeBackend import OnnxRuntimeBackend
+from .OpenVinoBackend import OpenVinoBackend
+from .ModelExporter import ModelExporter
+from .ModelQuantizer import ModelQuantizer, CalibrationReader
+from .ModelRegistry import ModelRegistry
+from .SharedFrameRing import SharedFrameRing
+from .InferenceServer import InferenceServer
+from .RemoteModel import RemoteModel
+
+BACKENDS = {
+    UltralyticsBackend.name: UltralyticsBackend,
+    OnnxRuntimeBackend.name: OnnxRuntimeBackend,
+    OpenVinoBackend.name: OpenVinoBackend
+}
+
+# module python can cho moi backend export
+RUNTIME_MODULES = {
+    OnnxRuntimeBackend.name: 'onnxruntime',
+    OpenVinoBackend.name: 'openvino'
+}
+
+
+def resolve_backend_name(model_path, backend=None):
+    """Backend used for a weights file: exported files always use their own runtime,
+    .pt weights use `backend` (default Config.INFERENCE_BACKEND)"""
+    if model_path.endswith('.onnx'):
+        return OnnxRuntimeBackend.name
+    if model_path.endswith('.xml') or os.path.isdir(model_path):
+        return OpenVinoBackend.name
+    backend = backend or Config.INFERENCE_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}. Available: {', '.join(BACKENDS)}")
+    return backend
+
+
+def prepare_model(model_path, backend=None):
+    """(path, backend) to load: .pt weights are exported (cached) for backends that need it,
+    falling back to ultralytics when the runtime of the backend is not installed"""
+    backend = resolve_backend_name(model_path, backend)
+    if backend == UltralyticsBackend.name or not model_path.endswith('.pt'):
+        return model_path, backend
+
+    try:
+        if importlib.util.find_spec(RUNTIME_MODULES[backend]) is None:
+            raise ImportError(f"No module named '{RUNTIME_MODULES[backend]}'")
+        return ModelExporter().export(model_path, backend), backend
+    except ImportError as e:
+        # runtime chua duoc cai: van chay duoc bang pytorch
+        print(f"Inference backend {backend} is not available ({e}), falling back to ultralytics")
+        return model_path, UltralyticsBackend.name
+
+
+def create_backend(model_path, backend=None, threads=None):
+    """Load a model with the given backend, exporting .pt weights (cached) when the backend needs it"""
+    model_path, backend = prepare_model(model_path, backend)
+    return BACKENDS[backend](model_path, threads=threads)
+
+
+__all__ = [
+    'BackendResult',
+    'BackendBoxes',
+    'InferenceScheduler',
+    'InferenceBackend',
+    'ExportedModelBackend',
+    'UltralyticsBackend',
+    'OnnxRuntimeBackend',
+    'OpenVinoBackend',
+    'ModelExporter',
+    'ModelQuantizer',
+    'CalibrationReader',
+    'ModelRegistry',
+    'SharedFrameRing',
+    'InferenceServer',
+    'RemoteModel',
+    'BACKENDS',
+    'resolve_backend_name',
+    'prepare_model',
+    'create_backend'
+]
@@ -0,0 +1,112 @@
+import os
+import sys
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+import cv2
+import numpy as np
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.FrameCache import FrameCache
+from utils.FrameSampler import FrameSampler
+
+
+def write_video(path, frames, width, height):
+    """Video tong hop: khoi mau di chuyen tren nen nhieu"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (width, height))
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+    for index in range(frames):
+        frame = background.copy()
+        x = (index * 7) % (width - 100)
+        cv2.rectangle(frame, (x, 100), (x + 100, 200), (0, 0, 255), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def full_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(4 * 1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sample(video_path, cache, frame_skip, imgsz):
+    """Mot lan chay: doc tu cache neu co, neu khong thi decode va ghi cache. Tra ve (so frame, co hit cache khong)"""
+    video_hash = FrameCache.video_hash(video_path)
+    cached = cache.open(video_hash, frame_skip, imgsz)
+    if cached is not None:
+        return sum(1 for _ in cached), True
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video: {video_path}")
+    try:
+        sampler = FrameSampler(cap, frame_skip)
+        writer = cache.writer(video_hash, frame_skip, imgsz, sampler.total_frames // frame_skip)
+        frames = writer.wrap(sampler) if writer else sampler
+        try:
+            count = sum(1 for _ in frames)
+        finally:
+            if writer:
+                writer.close()
+    finally:
+        cap.release()
+    return count, False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame cache: key cost, cold vs cached run, re-uploads share one entry")
+    parser.add_argument('--video', help="video to use (default: a synthetic 1280x720 video)")
+    parser.add_argument('--frames', type=int, default=300, help="length of the synthetic video")
+    parser.add_argument('--frame-skip', type=int, default=2)
+    parser.add_argument('--imgsz', type=int, default=640)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='bench-frame-cache-')
+    try:
+        source = args.video
+        if not source:
+            source = os.path.join(work_dir, 'source.avi')
+            write_video(source, args.frames, 1280, 720)
+
+        # hai lan upload cung mot video: save_video dat ten file moi moi lan
+        extension = os.path.splitext(source)[1]
+        first_upload = os.path.join(work_dir, f'detection_20240101_100000_exam{extension}')
+        second_upload = os.path.join(work_dir, f'detection_20240101_110000_exam{extension}')
+        shutil.copyfile(source, first_upload)
+        shutil.copyfile(source, second_upload)
+
+        size_mb = os.path.getsize(first_upload) / 1024 ** 2
+        start = time.perf_counter()
+        sampled_key = FrameCache.video_hash(first_upload)
+        sampled_time = (time.perf_counter() - start) * 1e3
+        start = time.perf_counter()
+        full_hash(first_upload)
+        full_time = (time.perf_counter() - start) * 1e3
+        print(f"{size_mb:.1f} MB video: sampled key {sampled_time:.1f} ms, full sha256 {full_time:.1f} ms")
+
+        cache = FrameCache(folder=os.path.join(work_dir, 'cache'), max_mb=4096)
+        os.makedirs(cache.folder, exist_ok=True)
+        for name, path in [('first upload', first_upload), ('second upload', second_upload)]:
+            start = time.perf_counter()
+            count, hit = sample(path, cache, args.frame_skip, args.imgsz)
+            print(f"{name:>14}: {count} frames in {(time.perf_counter() - start) * 1e3:.0f} ms "
+                  f"({'cache hit' if hit else 'decoded'})")
+
+        entries = [name for name in os.listdir(cache.folder) if not name.startswith('.tmp-')]
+        same_key = FrameCache.video_hash(second_upload) == sampled_key
+        print(f"same key for both uploads: {same_key}, cache entries: {len(entries)}")
+        if not same_key or len(entries) != 1:
+            raise SystemExit("FAIL: uploads of the same video should share one cache entry")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
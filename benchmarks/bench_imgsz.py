@@ -0,0 +1,120 @@
+import os
+import sys
+import time
+import argparse
+import cv2
+import numpy as np
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.Letterbox import Letterbox
+from utils.FrameSampler import FrameSampler
+from utils.detection_utils import build_fraud_class_mask, detect_frames
+from utils.box_ops import average_precision
+
+
+def legacy_letterbox(frame, imgsz, stride=32):
+    """Letterbox cap phat anh moi moi lan goi (resize + copyMakeBorder, giong preprocessing cua ultralytics)"""
+    height, width = frame.shape[:2]
+    ratio = imgsz / max(height, width)
+    new_width, new_height = int(round(width * ratio)), int(round(height * ratio))
+    pad_width, pad_height = (imgsz - new_width) % stride, (imgsz - new_height) % stride
+    resized = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    return cv2.copyMakeBorder(
+        resized, pad_height // 2, pad_height - pad_height // 2, pad_width // 2, pad_width - pad_width // 2,
+        cv2.BORDER_CONSTANT, value=(114, 114, 114)
+    )
+
+
+def bench_preprocessing(sizes, batch_size, repeats):
+    print(f"\nPreprocessing a batch of {batch_size} 1920x1080 frames")
+    print(f"{'imgsz':>6} {'input':>10} {'legacy ms':>10} {'reused ms':>10}")
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, size=(1080, 1920, 3), dtype=np.uint8) for _ in range(batch_size)]
+    for imgsz in sizes:
+        letterbox = Letterbox(imgsz)
+        letterbox.apply(frames)
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            [legacy_letterbox(frame, letterbox.imgsz) for frame in frames]
+        legacy_time = (time.perf_counter() - start) / repeats * 1e3
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            letterbox.apply(frames)
+        reused_time = (time.perf_counter() - start) / repeats * 1e3
+
+        height, width = letterbox.input_shape(frames[0].shape)
+        print(f"{letterbox.imgsz:>6} {f'{width}x{height}':>10} {legacy_time:>10.2f} {reused_time:>10.2f}")
+
+
+def read_frames(video_path, frame_skip, max_frames):
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video: {video_path}")
+    frames = []
+    try:
+        for _, frame in FrameSampler(cap, frame_skip):
+            frames.append(frame)
+            if len(frames) >= max_frames:
+                break
+    finally:
+        cap.release()
+    return frames
+
+
+def bench_model(model_path, video_path, sizes, reference_size, batch_size, frame_skip, max_frames, confidence):
+    from ultralytics import YOLO
+
+    model = YOLO(model_path)
+    fraud_class_mask = build_fraud_class_mask(model.names)
+    frames = read_frames(video_path, frame_skip, max_frames)
+    print(f"\n{len(frames)} frames of {video_path} ({frames[0].shape[1]}x{frames[0].shape[0]}), batch {batch_size}")
+
+    def run(imgsz):
+        letterbox = Letterbox.for_model(model, imgsz)
+        detections = []
+        # lan dau chay rieng de khong tinh thoi gian khoi tao
+        detect_frames(model, frames[:batch_size], confidence, fraud_class_mask, letterbox=letterbox)
+        start = time.perf_counter()
+        for index in range(0, len(frames), batch_size):
+            detections.extend(detect_frames(
+                model, frames[index:index + batch_size], confidence, fraud_class_mask, letterbox=letterbox
+            ))
+        return detections, len(frames) / (time.perf_counter() - start), letterbox
+
+    # khong co nhan tren clip tham chieu: ket qua o kich thuoc lon nhat duoc coi la ground truth
+    references, _, _ = run(reference_size)
+    print(f"reference: imgsz {reference_size}, {sum(len(d.class_ids) for d in references)} fraud boxes")
+    print(f"{'imgsz':>6} {'input':>10} {'fps':>8} {'ms/frame':>9} {'boxes':>6} {'mAP50':>7}")
+    for imgsz in sizes:
+        detections, fps, letterbox = run(imgsz)
+        height, width = letterbox.input_shape(frames[0].shape)
+        ap = average_precision(detections, references)
+        print(f"{letterbox.imgsz:>6} {f'{width}x{height}':>10} {fps:>8.1f} {1000 / fps:>9.1f} "
+              f"{sum(len(d.class_ids) for d in detections):>6} {ap if ap is not None else float('nan'):>7.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Speed / accuracy of the detection model per input size")
+    parser.add_argument('--model', help="YOLO weights (.pt); without it only preprocessing is measured")
+    parser.add_argument('--video', help="reference clip")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[320, 416, 512, 640, 768, 960])
+    parser.add_argument('--reference-size', type=int, default=1280)
+    parser.add_argument('--batch-size', type=int, default=4)
+    parser.add_argument('--frame-skip', type=int, default=10)
+    parser.add_argument('--max-frames', type=int, default=200)
+    parser.add_argument('--conf', type=float, default=0.25)
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    bench_preprocessing(args.sizes, args.batch_size, args.repeats)
+    if args.model and args.video:
+        bench_model(args.model, args.video, args.sizes, args.reference_size, args.batch_size, args.frame_skip,
+                    args.max_frames, args.conf)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+import os
+import sys
+import time
+import numpy as np
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.detection_utils import Detections
+from utils.box_ops import detections_similar
+
+
+def legacy_calculate_iou(box1, box2):
+    """IoU cua hai box - ban cu trong VideoDetectionService"""
+    x1, y1, x2, y2 = box1
+    x1_2, y1_2, x2_2, y2_2 = box2
+    xi1, yi1 = max(x1, x1_2), max(y1, y1_2)
+    xi2, yi2 = min(x2, x2_2), min(y2, y2_2)
+    if xi2 < xi1 or yi2 < yi1:
+        return 0.0
+    intersection = (xi2 - xi1) * (yi2 - yi1)
+    union = (x2 - x1) * (y2 - y1) + (x2_2 - x1_2) * (y2_2 - y1_2) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def legacy_are_detections_similar(prev, curr, threshold):
+    """Ban cu: sap xep theo (class, -confidence), zip tung cap va tinh IoU vo huong"""
+    if len(prev) != len(curr) or not prev:
+        return len(prev) == len(curr) == 0
+    prev_sorted = sorted(prev, key=lambda x: (x['class_id'], -x['confidence']))
+    curr_sorted = sorted(curr, key=lambda x: (x['class_id'], -x['confidence']))
+    for p, c in zip(prev_sorted, curr_sorted):
+        if p['class_id'] != c['class_id'] or abs(p['confidence'] - c['confidence']) > (1 - threshold):
+            return False
+        if legacy_calculate_iou(p['bbox'], c['bbox']) < threshold:
+            return False
+    return True
+
+
+def random_frame(rng, box_count, class_count, unique_classes=False):
+    top_left = rng.uniform(0, 1600, size=(box_count, 2))
+    size = rng.uniform(40, 300, size=(box_count, 2))
+    if unique_classes:
+        class_ids = rng.permutation(class_count)[:box_count]
+    else:
+        class_ids = rng.integers(0, class_count, size=box_count)
+    return Detections(
+        np.hstack([top_left, top_left + size]).astype(np.float32),
+        rng.uniform(0.3, 0.95, size=box_count).astype(np.float32),
+        class_ids
+    )
+
+
+def jitter_frame(rng, detections, shuffle=True):
+    """Frame tiep theo cua cung mot canh: box dich chuyen nhe, confidence dao dong, thu tu box co the bi xao tron"""
+    order = rng.permutation(len(detections.class_ids)) if shuffle else np.arange(len(detections.class_ids))
+    xyxy = detections.xyxy + rng.normal(0, 2.0, size=detections.xyxy.shape).astype(np.float32)
+    noise = 0.03 if shuffle else 0.0
+    confidence = np.clip(detections.confidence + rng.normal(0, noise, size=detections.confidence.shape), 0, 1)
+    return Detections(xyxy[order], confidence[order].astype(np.float32), detections.class_ids[order])
+
+
+def to_legacy(detections):
+    return [
+        {'class_id': int(class_id), 'confidence': float(confidence), 'bbox': box}
+        for box, confidence, class_id in zip(
+            detections.xyxy.tolist(), detections.confidence.tolist(), detections.class_ids.tolist())
+    ]
+
+
+def run_scenario(rng, name, shuffle, threshold=0.8, pairs_per_size=300, box_counts=(1, 5, 10, 20, 40),
+                 unique_classes=False):
+    print(f"\n{name}")
+    print(f"{'boxes':>6} {'legacy us':>10} {'matrix us':>10} {'legacy similar':>15} {'matrix similar':>15}")
+    for box_count in box_counts:
+        pairs = []
+        for _ in range(pairs_per_size):
+            previous = random_frame(rng, box_count, class_count=4, unique_classes=unique_classes)
+            pairs.append((previous, jitter_frame(rng, previous, shuffle)))
+        legacy_pairs = [(to_legacy(p), to_legacy(c)) for p, c in pairs]
+
+        start = time.perf_counter()
+        legacy_similar = sum(legacy_are_detections_similar(p, c, threshold) for p, c in legacy_pairs)
+        legacy_time = (time.perf_counter() - start) / pairs_per_size * 1e6
+
+        start = time.perf_counter()
+        matrix_similar = sum(detections_similar(p, c, threshold) for p, c in pairs)
+        matrix_time = (time.perf_counter() - start) / pairs_per_size * 1e6
+
+        # moi cap deu la cung mot canh nen ket qua dung la "similar" cho tat ca
+        print(f"{box_count:>6} {legacy_time:>10.1f} {matrix_time:>10.1f} "
+              f"{legacy_similar:>9}/{pairs_per_size} {matrix_similar:>9}/{pairs_per_size}")
+
+
+def main():
+    rng = np.random.default_rng(0)
+    # box giu nguyen thu tu, confidence khong doi: ban cu phai so sanh het tat ca cac cap
+    run_scenario(rng, "Stable order (worst case for the legacy loop)", shuffle=False)
+    # box doi thu tu va confidence dao dong giua hai frame: ban cu danh gia sai
+    run_scenario(rng, "Reordered boxes with confidence jitter", shuffle=True)
+    # frame thuong gap: moi class toi da mot box, di qua nhanh khong can linear_sum_assignment
+    run_scenario(rng, "At most one box per class (typical frame)", shuffle=True, box_counts=(1, 2, 3, 4),
+                 unique_classes=True)
+
+
+if __name__ == '__main__':
+    main()
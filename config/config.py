@@ -25,6 +25,100 @@ class Config:
     # Detection configurations
     DELETE_IMAGES_ON_DETECTION_DELETE = False
     DELETE_IMAGES_ON_RESULT_DELETE = False
+    # So frame duoc gom lai cho mot lan goi model (co the ghi de bang batch_size trong request)
+    DETECTION_BATCH_SIZE = int(os.getenv("DETECTION_BATCH_SIZE", "4"))
+    # Tu frame_skip nay tro len thi nhay toi frame can lay bang seek thay vi grab tung frame
+    FRAME_SEEK_MIN_SKIP = int(os.getenv("FRAME_SEEK_MIN_SKIP", "90"))
+    # Kich thuoc toi da cua queue giua cac stage decode / inference / luu ket qua
+    DETECTION_QUEUE_SIZE = int(os.getenv("DETECTION_QUEUE_SIZE", "8"))
+    # So process xu ly song song cac doan cua mot video (1 = tat), moi process duoc chia nhieu segment
+    DETECTION_SEGMENT_WORKERS = int(os.getenv("DETECTION_SEGMENT_WORKERS", "1"))
+    SEGMENTS_PER_WORKER = int(os.getenv("SEGMENTS_PER_WORKER", "4"))
+    # Do khac biet trung binh (0-1) cua anh thu nho duoi nguong nay thi bo qua inference (0 = tat)
+    MOTION_GATE_THRESHOLD = float(os.getenv("MOTION_GATE_THRESHOLD", "0"))
+    # Sample thua dan lai sau bao nhieu giay khong thay gian lan (khi dung min_frame_skip / max_frame_skip)
+    ADAPTIVE_QUIET_SECONDS = float(os.getenv("ADAPTIVE_QUIET_SECONDS", "5"))
+    # Scan hai buoc (scan_mode = coarse_to_fine): khoang cach giua cac frame o buoc tho
+    # va do rong cua so scan day quanh moi frame co gian lan, tinh bang giay
+    COARSE_SCAN_INTERVAL_SECONDS = float(os.getenv("COARSE_SCAN_INTERVAL_SECONDS", "2"))
+    COARSE_SCAN_WINDOW_SECONDS = float(os.getenv("COARSE_SCAN_WINDOW_SECONDS", "4"))
+    # kich thuoc anh dua vao model (canh dai, lam tron len boi so stride), 0 = dung kich thuoc model duoc train
+    DETECTION_IMGSZ = int(os.getenv("DETECTION_IMGSZ", "0"))
+    # backend chay model .pt: ultralytics (pytorch), onnx (ONNX Runtime) hoac openvino;
+    # (can cai them onnxruntime / openvino), model duoc export mot lan va luu canh file .pt
+    INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "ultralytics")
+    # so lan goi model chay dong thoi trong process, cac request khac xep hang (round robin theo request)
+    INFERENCE_SLOTS = int(os.getenv("INFERENCE_SLOTS", "1"))
+    # so thread cua moi model (0 = so core / INFERENCE_SLOTS)
+    INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", "0"))
+    OPENVINO_PERFORMANCE_HINT = os.getenv("OPENVINO_PERFORMANCE_HINT", "LATENCY")
+    # NMS cho backend onnx / openvino, cung gia tri mac dinh voi ultralytics
+    NMS_IOU_THRESHOLD = float(os.getenv("NMS_IOU_THRESHOLD", "0.7"))
+    MAX_DETECTIONS = int(os.getenv("MAX_DETECTIONS", "300"))
+    # bo nho toi da (MB, uoc tinh theo kich thuoc weight) cho cac model dang load, vuot thi bo model
+    # it dung gan day nhat; 0 = khong gioi han
+    MODEL_MEMORY_BUDGET_MB = float(os.getenv("MODEL_MEMORY_BUDGET_MB", "2048"))
+    # So worker process chay model (0 = chay trong process Flask): frame duoc dua qua shared memory,
+    # moi worker giu toi da INFERENCE_WORKER_MAX_MODELS model
+    INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0"))
+    INFERENCE_WORKER_MAX_MODELS = int(os.getenv("INFERENCE_WORKER_MAX_MODELS", "4"))
+    # so slot cua ring buffer (0 = 2 x so worker) va kich thuoc moi slot (du cho mot phan batch)
+    INFERENCE_RING_SLOTS = int(os.getenv("INFERENCE_RING_SLOTS", "0"))
+    INFERENCE_SLOT_MB = float(os.getenv("INFERENCE_SLOT_MB", "32"))
+    INFERENCE_TIMEOUT = float(os.getenv("INFERENCE_TIMEOUT", "120"))
+    # bao lau kiem tra model dang load co bi thay weight (model_url / last_update / file) mot lan, 0 = tat
+    MODEL_RELOAD_INTERVAL = float(os.getenv("MODEL_RELOAD_INTERVAL", "30"))
+    # Model load san luc khoi dong server: danh sach id (phan cach bang dau phay) va / hoac
+    # ban moi nhat cua moi ten model; moi model chay vai lan inference tren frame trong de warmup
+    PRELOAD_MODEL_IDS = [int(model_id) for model_id in os.getenv("PRELOAD_MODEL_IDS", "").split(",") if model_id.strip()]
+    PRELOAD_LATEST_MODELS = os.getenv("PRELOAD_LATEST_MODELS", "False").lower() in ('true', '1', 't')
+    WARMUP_ITERATIONS = int(os.getenv("WARMUP_ITERATIONS", "3"))
+    WARMUP_FRAME_WIDTH = int(os.getenv("WARMUP_FRAME_WIDTH", "1280"))
+    WARMUP_FRAME_HEIGHT = int(os.getenv("WARMUP_FRAME_HEIGHT", "720"))
+    # fps dung khi video khong cho biet fps
+    DEFAULT_VIDEO_FPS = 25
+    
+    # Detection job configurations
+    DETECTION_JOB_WORKERS = int(os.getenv("DETECTION_JOB_WORKERS", "2"))
+    DETECTION_JOB_MAX_PENDING = int(os.getenv("DETECTION_JOB_MAX_PENDING", "20"))
+    DETECTION_JOB_PROGRESS_INTERVAL = float(os.getenv("DETECTION_JOB_PROGRESS_INTERVAL", "2"))
+    
+    # Stream ingestion configurations
+    # file / named pipe dang duoc ghi chi duoc doc trong thu muc nay
+    STREAM_FOLDER = 'uploads/streams'
+    # stream url chi duoc mo voi scheme va host trong danh sach (cach nhau boi dau phay), khong co host nao thi tu choi moi url
+    STREAM_ALLOWED_SCHEMES = [scheme.strip().lower() for scheme in os.getenv("STREAM_ALLOWED_SCHEMES", "rtsp,rtmp,http,https").split(",") if scheme.strip()]
+    STREAM_ALLOWED_HOSTS = [host.strip().lower() for host in os.getenv("STREAM_ALLOWED_HOSTS", "").split(",") if host.strip()]
+    # thoi gian cho toi da khi mo stream url va khi doc mot frame
+    STREAM_OPEN_TIMEOUT_MS = int(os.getenv("STREAM_OPEN_TIMEOUT_MS", "10000"))
+    STREAM_READ_TIMEOUT_MS = int(os.getenv("STREAM_READ_TIMEOUT_MS", "10000"))
+    # file khong ghi them trong bao nhieu giay thi coi nhu stream da ket thuc
+    STREAM_IDLE_TIMEOUT = float(os.getenv("STREAM_IDLE_TIMEOUT", "30"))
+    STREAM_POLL_INTERVAL = float(os.getenv("STREAM_POLL_INTERVAL", "0.5"))
+    STREAM_RECONNECT_ATTEMPTS = int(os.getenv("STREAM_RECONNECT_ATTEMPTS", "5"))
+    STREAM_RECONNECT_DELAY = float(os.getenv("STREAM_RECONNECT_DELAY", "2"))
+    # so frame toi da cho xu ly cua stream live, day thi bo frame cu nhat
+    STREAM_BUFFER_SIZE = int(os.getenv("STREAM_BUFFER_SIZE", "16"))
+    
+    # Quantization configurations
+    # anh mau de calibrate / danh gia model INT8 chi duoc doc trong thu muc nay
+    CALIBRATION_FOLDER = 'uploads/calibration'
+    # so anh toi da dung de calibrate (quantize static) va de so sanh voi model goc
+    QUANTIZATION_CALIBRATION_FRAMES = int(os.getenv("QUANTIZATION_CALIBRATION_FRAMES", "200"))
+    QUANTIZATION_REPORT_FRAMES = int(os.getenv("QUANTIZATION_REPORT_FRAMES", "100"))
+    
+    # Frame cache configurations
+    # frame da sample cua moi video (thu nho ve kich thuoc inference) duoc luu lai, chay lai khong phai decode
+    FRAME_CACHE_FOLDER = 'uploads/frame_cache'
+    # tong dung luong toi da cua cache, cache cu nhat bi xoa truoc; 0 = tat cache
+    FRAME_CACHE_MAX_MB = int(os.getenv("FRAME_CACHE_MAX_MB", "10240"))
+    
+    # Raw detection configurations
+    # luu box cua moi frame da inference (moi class, confidence tu RAW_DETECTION_CONFIDENCE) cho tung PhaseDetection,
+    # doi confidence_threshold / similarity_threshold sau do khong can chay lai model
+    SAVE_RAW_DETECTIONS = os.getenv("SAVE_RAW_DETECTIONS", "True").lower() in ('true', '1', 't')
+    RAW_DETECTION_CONFIDENCE = float(os.getenv("RAW_DETECTION_CONFIDENCE", "0.05"))
+    RAW_DETECTION_FOLDER = 'uploads/raw_detections'
     
     # External service configurations (optional)
     FRAUD_LABEL_SERVICE_URL = os.getenv("FRAUD_LABEL_SERVICE_URL", None)
@@ -38,4 +132,20 @@ class Config:
         
         model_path = os.path.join(Config.BASE_DIR, Config.MODEL_FOLDER)
         if not os.path.exists(model_path):
-            os.makedirs(model_path)
\ No newline at end of file
+            os.makedirs(model_path)
+        
+        stream_path = os.path.join(Config.BASE_DIR, Config.STREAM_FOLDER)
+        if not os.path.exists(stream_path):
+            os.makedirs(stream_path)
+        
+        calibration_path = os.path.join(Config.BASE_DIR, Config.CALIBRATION_FOLDER)
+        if not os.path.exists(calibration_path):
+            os.makedirs(calibration_path)
+        
+        frame_cache_path = os.path.join(Config.BASE_DIR, Config.FRAME_CACHE_FOLDER)
+        if not os.path.exists(frame_cache_path):
+            os.makedirs(frame_cache_path)
+        
+        raw_detection_path = os.path.join(Config.BASE_DIR, Config.RAW_DETECTION_FOLDER)
+        if not os.path.exists(raw_detection_path):
+            os.makedirs(raw_detection_path)
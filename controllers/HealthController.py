@@ -0,0 +1,23 @@
+from flask import jsonify
+
+
+class HealthController:
+    def __init__(self, model_warmup_service):
+        self.model_warmup_service = model_warmup_service
+
+    def get_health(self):
+        """Liveness: the process is up and serving requests"""
+        return jsonify({'status': 'ok'}), 200
+
+    def get_readiness(self):
+        """Readiness: 503 until the preloaded models are loaded and warmed up"""
+        try:
+            status = self.model_warmup_service.get_status()
+            return jsonify(status), 200 if status['ready'] else 503
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    def register_routes(self, app):
+        """Register routes with Flask app"""
+        app.add_url_rule('/api/health', 'get_health', self.get_health, methods=['GET'])
+        app.add_url_rule('/api/health/ready', 'get_readiness', self.get_readiness, methods=['GET'])
@@ -1,10 +1,12 @@
-from flask import jsonify
+from flask import jsonify, request
 from services.ModelService import ModelService
+from services.ModelQuantizationService import ModelQuantizationService
 
 
 class ModelController:
     def __init__(self):
         self.model_service = ModelService()
+        self.model_quantization_service = ModelQuantizationService()
     
     def get_all_models(self):
         try:
@@ -27,6 +29,53 @@ class ModelController:
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
+    def get_registry_stats(self):
+        try:
+            return jsonify(self.model_service.get_registry_stats()), 200
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    def get_scheduler_stats(self):
+        try:
+            return jsonify(self.model_service.get_scheduler_stats()), 200
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    def get_model_variants(self, model_id):
+        try:
+            variants = self.model_quantization_service.get_variants(model_id)
+            return jsonify([variant.to_dict() for variant in variants]), 200
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 404
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    def create_model_variant(self, model_id):
+        """Quantize a model to INT8 (JSON body: mode, calibrationFolder, evaluationFolder, imgsz, conf)"""
+        try:
+            data = request.get_json(silent=True) or {}
+            variant = self.model_quantization_service.create_variant(
+                model_id,
+                data.get('mode', 'static'),
+                data.get('calibrationFolder'),
+                evaluation_folder=data.get('evaluationFolder'),
+                imgsz=data.get('imgsz'),
+                conf=float(data.get('conf', 0.25))
+            )
+            return jsonify(variant.to_dict()), 201
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except RuntimeError as e:
+            return jsonify({'error': str(e)}), 501
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
     def register_routes(self, app):
         """Register routes with Flask app"""
-        app.add_url_rule('/api/models', 'get_all_models', self.get_all_models, methods=['GET'])
\ No newline at end of file
+        app.add_url_rule('/api/models', 'get_all_models', self.get_all_models, methods=['GET'])
+        app.add_url_rule('/api/models/registry', 'get_registry_stats', self.get_registry_stats, methods=['GET'])
+        app.add_url_rule('/api/models/scheduler', 'get_scheduler_stats', self.get_scheduler_stats, methods=['GET'])
+        app.add_url_rule('/api/models/<int:model_id>/variants', 'get_model_variants',
+                         self.get_model_variants, methods=['GET'])
+        app.add_url_rule('/api/models/<int:model_id>/variants', 'create_model_variant',
+                         self.create_model_variant, methods=['POST'])
\ No newline at end of file
@@ -1,5 +1,5 @@
 import json
-from flask import request, jsonify
+from flask import request, jsonify, Response
 from models.PhaseDetection import PhaseDetection
 from datetime import datetime
 
@@ -7,6 +7,8 @@ from services import VideoDetectionService
 from services.PhaseDetectionService import PhaseDetectionService
 from services.FileStorageService import FileStorageService
 from services.ModelService import ModelService
+from services.DetectionJobService import DetectionJobService
+from utils.RegionOfInterest import RegionOfInterest
 
 class VideoDetectionController:
     def __init__(self):
@@ -14,46 +16,97 @@ class VideoDetectionController:
         self.video_detection_service = VideoDetectionService()
         self.file_storage_service = FileStorageService()
         self.detection_service = PhaseDetectionService()
+        self.detection_job_service = DetectionJobService()
+    
+    def _build_detection(self, allow_multiple=False):
+        """Parse the multipart request, save the video and return (detection, error_response)"""
+        if 'video' not in request.files:
+            return None, (jsonify({'error': 'Video file is required'}), 400)
+        if 'detection' not in request.form:
+            return None, (jsonify({'error': 'Detection data is required'}), 400)
+        try:
+            detection_data = json.loads(request.form.get('detection'))
+        except json.JSONDecodeError:
+            return None, (jsonify({'error': 'Invalid detection data format'}), 400)
         
-    def detect_video(self):
+        print(f"Received detection data: {detection_data}")  # Debugging line
+        # Tạo đối tượng Detection từ dict
+        detection = PhaseDetection.from_dict(detection_data)
+        
+        
+        error_response = self._prepare_detection(detection, allow_multiple)
+        if error_response:
+            return None, error_response
+        
+        # Save video file
         try:
-            if 'video' not in request.files:
-                return jsonify({'error': 'Video file is required'}), 400    
-            if 'detection' not in request.form:
-                return jsonify({'error': 'Detection data is required'}), 400
+            video_path, video_url = self.file_storage_service.save_video(
+                request.files['video'], 
+                prefix='detection'
+            )
+            detection.videoUrl = video_path  
+        except Exception as e:
+            return None, (jsonify({'error': f'Failed to save video: {str(e)}'}), 500)
+      
+        if detection.timeDetect is None:
+            detection.timeDetect = datetime.now()
+        
+        return detection, None
+        
+    def _prepare_detection(self, detection, allow_multiple=False):
+        """Validate the detection options and replace detection.model with the stored Model,
+        return an error response if something is wrong"""
+        # id trong request bi bo qua: ket qua khong duoc gan vao PhaseDetection co san
+        detection.id = None
+        if detection.roi:
             try:
-                detection_data = json.loads(request.form.get('detection'))
-            except json.JSONDecodeError:
-                return jsonify({'error': 'Invalid detection data format'}), 400
-            
-            print(f"Received detection data: {detection_data}")  # Debugging line
-            # Tạo đối tượng Detection từ dict
-            detection = PhaseDetection.from_dict(detection_data)
-            
-            
-            if not detection.model or not hasattr(detection.model, 'id'):
-                return jsonify({'error': 'Model ID is required'}), 400
-                
-            
+                RegionOfInterest(detection.roi)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        
+        if detection.model_ids is not None:
+            if not allow_multiple:
+                return jsonify({'error': 'model_ids is only supported by /api/detection/video'}), 400
+            model_ids = detection.model_ids
+            if (not isinstance(model_ids, list) or not model_ids
+                    or not all(isinstance(model_id, int) and not isinstance(model_id, bool) for model_id in model_ids)):
+                return jsonify({'error': 'model_ids must be a non-empty list of model IDs'}), 400
+            if len(set(model_ids)) != len(model_ids):
+                return jsonify({'error': 'model_ids must not contain duplicates'}), 400
             try:
-                model = self.model_service.get_by_id(detection.model.id)
-                detection.model = model
+                models = [self.model_service.get_by_id(model_id) for model_id in model_ids]
             except Exception as e:
                 return jsonify({'error': f'Invalid model_id: {str(e)}'}), 404
+            # model dau tien dung lam model chinh cua detection
+            detection.model = models[0]
+            return None
+        
+        if not detection.model or not hasattr(detection.model, 'id'):
+            return jsonify({'error': 'Model ID is required'}), 400
             
-            # Save video file
-            try:
-                video_path, video_url = self.file_storage_service.save_video(
-                    request.files['video'], 
-                    prefix='detection'
-                )
-                detection.videoUrl = video_path  
-            except Exception as e:
-                return jsonify({'error': f'Failed to save video: {str(e)}'}), 500
-          
-            if detection.timeDetect is None:
-                detection.timeDetect = datetime.now()
+        
+        try:
+            model = self.model_service.get_by_id(detection.model.id)
+            detection.model = model
+        except Exception as e:
+            return jsonify({'error': f'Invalid model_id: {str(e)}'}), 404
+        return None
+        
+    def detect_video(self):
+        try:
+            detection, error_response = self._build_detection(allow_multiple=True)
+            if error_response:
+                return error_response
             
+            # nhieu model: decode video mot lan, tra ve mot PhaseDetection cho moi model va bang so sanh
+            if detection.model_ids and len(detection.model_ids) > 1:
+                results, agreement = self.video_detection_service.process_video_models(
+                    detection, detection.model_ids
+                )
+                return jsonify({
+                    'detections': [result.to_dict() for result in results],
+                    'agreement': agreement
+                }), 200
             
             # print(f"Detection object: {detection.to_dict()}")  # Debugging line
             # Process video với detection object
@@ -70,7 +123,189 @@ class VideoDetectionController:
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
+    def detect_video_stream(self):
+        """Same input as detect_video, but every FrameDetection is sent as soon as it is saved.
+
+        Server-sent events when the client asks for text/event-stream (or ?format=sse),
+        newline-delimited JSON otherwise. The last record is the summary (or error).
+        """
+        try:
+            detection, error_response = self._build_detection()
+            if error_response:
+                return error_response
+            
+            use_sse = (request.args.get('format') == 'sse'
+                       or 'text/event-stream' in request.headers.get('Accept', ''))
+            events = self.video_detection_service.iter_detection_events(detection)
+            
+            def generate():
+                try:
+                    for event, data in events:
+                        if use_sse:
+                            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+                        else:
+                            yield json.dumps(dict(data, type=event)) + "\n"
+                finally:
+                    # client dong ket noi: dung xu ly video
+                    events.close()
+            
+            return Response(
+                generate(),
+                mimetype='text/event-stream' if use_sse else 'application/x-ndjson',
+                # tat buffer cua proxy de client nhan duoc tung record ngay
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+            
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    def submit_detection_job(self):
+        try:
+            detection, error_response = self._build_detection()
+            if error_response:
+                return error_response
+            
+            # tra ve job id ngay, video duoc xu ly trong worker pool
+            job = self.detection_job_service.submit(detection)
+            return jsonify(job.to_dict()), 202
+            
+        except RuntimeError as e:
+            return jsonify({'error': str(e)}), 429
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    def submit_stream_job(self):
+        """Start a job on a stream URL, named pipe or growing file (JSON body: detection, source)"""
+        try:
+            data = request.get_json(silent=True) or {}
+            if not isinstance(data.get('detection'), dict):
+                return jsonify({'error': 'Detection data is required'}), 400
+            
+            detection = PhaseDetection.from_dict(data['detection'])
+            error_response = self._prepare_detection(detection)
+            if error_response:
+                return error_response
+            
+            try:
+                detection.videoUrl = self.file_storage_service.resolve_stream_source(data.get('source'))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            if detection.timeDetect is None:
+                detection.timeDetect = datetime.now()
+            
+            # frame gian lan duoc luu ngay khi phat hien, xem qua phaseDetectionId cua job
+            job = self.detection_job_service.submit(detection, stream=True)
+            return jsonify(job.to_dict()), 202
+            
+        except RuntimeError as e:
+            return jsonify({'error': str(e)}), 429
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    def stop_detection_job(self, job_id):
+        try:
+            job = self.detection_job_service.stop(job_id)
+            return jsonify(job.to_dict()), 200
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 404
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    def resume_detection_job(self, job_id):
+        try:
+            job = self.detection_job_service.resume(job_id)
+            return jsonify(job.to_dict()), 202
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 404
+        except RuntimeError as e:
+            return jsonify({'error': str(e)}), 409
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    def get_detection_jobs(self):
+        try:
+            jobs = self.detection_job_service.get_all()
+            return jsonify([job.to_dict() for job in jobs]), 200
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    def get_detection_job(self, job_id):
+        try:
+            job = self.detection_job_service.get_by_id(job_id)
+            return jsonify(job.to_dict()), 200
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 404
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    def get_detection_job_result(self, job_id):
+        try:
+            job, result = self.detection_job_service.get_result(job_id)
+            if result:
+                return jsonify(result.to_dict()), 200
+            if job.status == job.FAILED:
+                return jsonify({'error': job.error, 'job': job.to_dict()}), 500
+            # job chua xong, client hoi lai sau
+            return jsonify(job.to_dict()), 202
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 404
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    def rethreshold_detection(self, detection_id):
+        """Flagged frames of a finished detection for new thresholds, derived from its raw detections
+        (JSON body: confidence_threshold, similarity_threshold, save).
+
+        Raw detections are recorded for uploaded videos (single or multi-model) when
+        SAVE_RAW_DETECTIONS is on; stream detections have none and get a 409.
+        """
+        try:
+            data = request.get_json(silent=True) or {}
+            thresholds = {}
+            for name in ('confidence_threshold', 'similarity_threshold'):
+                value = data.get(name)
+                if value is None:
+                    continue
+                if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 1:
+                    return jsonify({'error': f'{name} must be a number between 0 and 1'}), 400
+                thresholds[name] = float(value)
+            
+            summary, frames = self.video_detection_service.rethreshold(
+                detection_id, save=bool(data.get('save')), **thresholds
+            )
+            summary['result'] = [
+                dict(frame_detection.to_dict(), frameNumber=frame_number)
+                for frame_number, frame_detection in frames
+            ]
+            return jsonify(summary), 200
+            
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 404
+        except RuntimeError as e:
+            return jsonify({'error': str(e)}), 409
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
     def register_routes(self, app):
         """Register routes with Flask app"""
         app.add_url_rule('/api/detection/video', 'detect_video', 
-                         self.detect_video, methods=['POST'])
\ No newline at end of file
+                         self.detect_video, methods=['POST'])
+        app.add_url_rule('/api/detection/video/stream', 'detect_video_stream',
+                         self.detect_video_stream, methods=['POST'])
+        app.add_url_rule('/api/detection/jobs', 'submit_detection_job',
+                         self.submit_detection_job, methods=['POST'])
+        app.add_url_rule('/api/detection/jobs', 'get_detection_jobs',
+                         self.get_detection_jobs, methods=['GET'])
+        app.add_url_rule('/api/detection/jobs/<job_id>', 'get_detection_job',
+                         self.get_detection_job, methods=['GET'])
+        app.add_url_rule('/api/detection/jobs/<job_id>/result', 'get_detection_job_result',
+                         self.get_detection_job_result, methods=['GET'])
+        app.add_url_rule('/api/detection/jobs/<job_id>/stop', 'stop_detection_job',
+                         self.stop_detection_job, methods=['POST'])
+        app.add_url_rule('/api/detection/jobs/<job_id>/resume', 'resume_detection_job',
+                         self.resume_detection_job, methods=['POST'])
+        app.add_url_rule('/api/detection/stream', 'submit_stream_job',
+                         self.submit_stream_job, methods=['POST'])
+        app.add_url_rule('/api/detection/<int:detection_id>/rethreshold', 'rethreshold_detection',
+                         self.rethreshold_detection, methods=['POST'])
@@ -2,8 +2,10 @@
 
 from .VideoDetectionController import VideoDetectionController
 from .ModelController import ModelController
+from .HealthController import HealthController
 
 __all__ = [
     'VideoDetectionController',
-    'ModelController'
+    'ModelController',
+    'HealthController'
 ]
\ No newline at end of file
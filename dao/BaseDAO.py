@@ -83,6 +83,17 @@ class BaseDAO(ABC):
             cursor.close()
             connection.close()
     
+    def ensure_column(self, table, column, definition):
+        """Add a column to an existing table if it is missing (tables created before the column existed)"""
+        query = """
+        SELECT COUNT(*) AS count FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND COLUMN_NAME = %s
+        """
+        result = self.fetch_one(query, (self.config['database'], table, column))
+        if result and result.get('count') == 0:
+            return self.execute_query(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        return True
+    
     @abstractmethod
     def create_table(self):
         """Create table if not exists"""
@@ -0,0 +1,129 @@
+import json
+from dao.BaseDAO import BaseDAO
+from models.DetectionJob import DetectionJob
+
+
+class DetectionJobDAO(BaseDAO):
+    def __init__(self):
+        super().__init__()
+        self.create_table()
+
+    def create_table(self):
+        # Ensure phase_detection table exists first
+        from dao.PhaseDetectionDAO import PhaseDetectionDAO
+        phase_detection_dao = PhaseDetectionDAO()
+        phase_detection_dao.create_table()
+
+        query = """
+        CREATE TABLE IF NOT EXISTS detection_job (
+            id VARCHAR(32) PRIMARY KEY,
+            status VARCHAR(20),
+            phase_detection_id INT,
+            video_url VARCHAR(500),
+            total_frames INT,
+            frames_processed INT,
+            frames_gated INT,
+            last_frame INT,
+            error TEXT,
+            created_at DATETIME,
+            started_at DATETIME,
+            finished_at DATETIME,
+            checkpoint_frame INT,
+            checkpoint_state TEXT,
+            options TEXT,
+            FOREIGN KEY (phase_detection_id) REFERENCES phase_detection(id) ON DELETE SET NULL
+        )
+        """
+        self.execute_query(query)
+        # bang tao truoc khi co checkpoint
+        self.ensure_column('detection_job', 'checkpoint_frame', 'INT')
+        self.ensure_column('detection_job', 'checkpoint_state', 'TEXT')
+        self.ensure_column('detection_job', 'options', 'TEXT')
+
+    def insert(self, job):
+        query = """
+        INSERT INTO detection_job
+        (id, status, phase_detection_id, video_url, total_frames, frames_processed, frames_gated, last_frame,
+         error, created_at, started_at, finished_at, checkpoint_frame, checkpoint_state, options)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """
+        params = (
+            job.id,
+            job.status,
+            job.phaseDetectionId,
+            job.videoUrl,
+            job.totalFrames,
+            job.framesProcessed,
+            job.framesGated,
+            job.lastFrame,
+            job.error,
+            job.createdAt,
+            job.startedAt,
+            job.finishedAt,
+            job.checkpointFrame,
+            json.dumps(job.checkpointState) if job.checkpointState is not None else None,
+            json.dumps(job.options) if job.options is not None else None
+        )
+        # id do ung dung sinh ra nen khong dung lastrowid
+        if self.execute_query(query, params) is not False:
+            return job
+        return None
+
+    def update(self, job):
+        query = """
+        UPDATE detection_job
+        SET status = %s, phase_detection_id = %s, video_url = %s, total_frames = %s,
+            frames_processed = %s, frames_gated = %s, last_frame = %s, error = %s, started_at = %s,
+            finished_at = %s, checkpoint_frame = %s, checkpoint_state = %s
+        WHERE id = %s
+        """
+        params = (
+            job.status,
+            job.phaseDetectionId,
+            job.videoUrl,
+            job.totalFrames,
+            job.framesProcessed,
+            job.framesGated,
+            job.lastFrame,
+            job.error,
+            job.startedAt,
+            job.finishedAt,
+            job.checkpointFrame,
+            json.dumps(job.checkpointState) if job.checkpointState is not None else None,
+            job.id
+        )
+        return self.execute_query(query, params)
+
+    def delete(self, id):
+        query = "DELETE FROM detection_job WHERE id = %s"
+        return self.execute_query(query, (id,))
+
+    def find_by_id(self, id):
+        query = "SELECT * FROM detection_job WHERE id = %s"
+        result = self.fetch_one(query, (id,))
+        if result:
+            return self._map_to_detection_job(result)
+        return None
+
+    def find_all(self):
+        query = "SELECT * FROM detection_job ORDER BY created_at DESC"
+        results = self.fetch_all(query)
+        return [self._map_to_detection_job(row) for row in results]
+
+    def _map_to_detection_job(self, row):
+        job = DetectionJob(id=row.get('id'))
+        job.status = row.get('status')
+        job.phaseDetectionId = row.get('phase_detection_id')
+        job.videoUrl = row.get('video_url')
+        job.totalFrames = row.get('total_frames')
+        job.framesProcessed = row.get('frames_processed') or 0
+        job.framesGated = row.get('frames_gated') or 0
+        job.lastFrame = row.get('last_frame')
+        job.error = row.get('error')
+        job.createdAt = row.get('created_at')
+        job.startedAt = row.get('started_at')
+        job.finishedAt = row.get('finished_at')
+        job.checkpointFrame = row.get('checkpoint_frame')
+        job.checkpointState = json.loads(row['checkpoint_state']) if row.get('checkpoint_state') else None
+        job.options = json.loads(row['options']) if row.get('options') else None
+        return job
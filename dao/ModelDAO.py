@@ -1,3 +1,4 @@
+import json
 from dao import TrainInfoDAO
 from models import Model
 from .BaseDAO import BaseDAO
@@ -18,18 +19,25 @@ class ModelDAO(BaseDAO):
             last_update DATETIME,
             train_info_id INT,
             model_url VARCHAR(500),
+            parent_id INT,
+            variant VARCHAR(50),
+            report TEXT,
             FOREIGN KEY (train_info_id) REFERENCES train_info(id) ON DELETE SET NULL
         )
         """
         self.execute_query(query)
+        # bang tao truoc khi co variant quantize
+        self.ensure_column('model', 'parent_id', 'INT')
+        self.ensure_column('model', 'variant', 'VARCHAR(50)')
+        self.ensure_column('model', 'report', 'TEXT')
     def insert(self, model):
         train_info_id = None
         if model.trainInfo: 
             train_info_id = self.train_info_dao.insert(model.trainInfo)
         
         query = """
-        INSERT INTO model (name, version, description, last_update, train_info_id, model_url)
-        VALUES (%s, %s, %s, %s, %s, %s)
+        INSERT INTO model (name, version, description, last_update, train_info_id, model_url, parent_id, variant, report)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
         """
         params = (
             model.name,
@@ -37,7 +45,10 @@ class ModelDAO(BaseDAO):
             model.description,
             model.lastUpdate,
             train_info_id,
-            model.modelUrl
+            model.modelUrl,
+            model.parentId,
+            model.variant,
+            json.dumps(model.report) if model.report is not None else None
         )
         result = self.execute_query(query, params)
         if result and isinstance(result, int):
@@ -52,7 +63,8 @@ class ModelDAO(BaseDAO):
         query = """
         UPDATE model
         SET name = %s, version = %s, description = %s, 
-            last_update = %s, train_info_id = %s, model_url = %s
+            last_update = %s, train_info_id = %s, model_url = %s,
+            parent_id = %s, variant = %s, report = %s
         WHERE id = %s
         """
         params = (
@@ -62,6 +74,9 @@ class ModelDAO(BaseDAO):
             model.lastUpdate,
             model.trainInfo.id if model.trainInfo else None,
             model.modelUrl,
+            model.parentId,
+            model.variant,
+            json.dumps(model.report) if model.report is not None else None,
             model.id
         )
         return self.execute_query(query, params)
@@ -90,6 +105,10 @@ class ModelDAO(BaseDAO):
         model.description = row.get('description')
         model.lastUpdate = row.get('last_update')
         model.modelUrl = row.get('model_url')
+        model.parentId = row.get('parent_id')
+        model.variant = row.get('variant')
+        report = row.get('report')
+        model.report = json.loads(report) if report else None
         train_info_id = row.get('train_info_id')
         if train_info_id:
             model.trainInfo = self.train_info_dao.find_by_id(train_info_id)
@@ -103,13 +122,24 @@ class ModelDAO(BaseDAO):
         results = self.fetch_all(query, (f"%{name}%",))
         return [self.map_to_model(row) for row in results]
     def find_latest_version(self, name):
+        # chi model goc: variant INT8 giu ten model goc va version "<version>-int8-..." xep tren version goc
         query = """
         SELECT * FROM model 
-        WHERE name = %s 
+        WHERE name = %s AND parent_id IS NULL
         ORDER BY version DESC, last_update DESC 
         LIMIT 1
         """
         result = self.fetch_one(query, (name,))
         if result:
             return self.map_to_model(result)
-        return None
\ No newline at end of file
+        return None
+    def find_variants(self, parent_id):
+        query = "SELECT * FROM model WHERE parent_id = %s ORDER BY last_update DESC"
+        results = self.fetch_all(query, (parent_id,))
+        return [self.map_to_model(row) for row in results]
+    def find_variant(self, parent_id, variant):
+        query = "SELECT * FROM model WHERE parent_id = %s AND variant = %s LIMIT 1"
+        result = self.fetch_one(query, (parent_id, variant))
+        if result:
+            return self.map_to_model(result)
+        return None
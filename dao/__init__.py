@@ -6,12 +6,14 @@ from .ModelDAO import ModelDAO
 from .PhaseDetectionDAO import PhaseDetectionDAO
 from .FrameDetectionDAO import FrameDetectionDAO
 from .BoundingBoxDetectionDAO import BoundingBoxDetectionDAO
+from .DetectionJobDAO import DetectionJobDAO
 __all__ = [
     'BaseDAO',
     'TrainInfoDAO',
     'ModelDAO',
     'PhaseDetectionDAO',
     'FrameDetectionDAO',
-    'BoundingBoxDetectionDAO'
+    'BoundingBoxDetectionDAO',
+    'DetectionJobDAO'
     
 ]
\ No newline at end of file
@@ -0,0 +1,152 @@
+import time
+import uuid
+from datetime import datetime
+
+
+class DetectionJob:
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    STOPPED = 'stopped'
+
+    def __init__(self, id=None, status=None, phaseDetectionId=None, videoUrl=None, totalFrames=None,
+                 framesProcessed=0, framesGated=0, lastFrame=None, error=None, createdAt=None, startedAt=None,
+                 finishedAt=None, checkpointFrame=None, checkpointState=None, options=None):
+        self.id = id if id else uuid.uuid4().hex
+        self.status = status if status else self.QUEUED
+        self.phaseDetectionId = phaseDetectionId
+        self.videoUrl = videoUrl
+        self.totalFrames = totalFrames
+        self.framesProcessed = framesProcessed
+        # so frame duoc sample nhung bo qua inference vi gan nhu khong doi (motion gate)
+        self.framesGated = framesGated
+        self.lastFrame = lastFrame
+        self.error = error
+        self.createdAt = createdAt if createdAt else datetime.now()
+        self.startedAt = startedAt
+        self.finishedAt = finishedAt
+        # frame cuoi cung ma moi frame truoc no da xu ly xong va ket qua da luu, cung trang thai
+        # dedup / stride tai frame do (dung de chay tiep job tu giua video)
+        self.checkpointFrame = checkpointFrame
+        self.checkpointState = checkpointState
+        # tham so cua request (model, threshold, frame_skip ...) de tao lai detection khi resume
+        self.options = options
+        # thoi diem bat dau xu ly theo monotonic clock, chi dung de tinh fps khi job dang chay
+        self._started_clock = None
+        # client yeu cau dung job (stream live khong tu ket thuc)
+        self.stop_requested = False
+        # goi lai (frame_number, frame_detection) ngay khi mot FrameDetection vua duoc luu
+        self.frame_listeners = []
+        # goi lai (job) khi can ghi checkpoint xuong database ngay (vua luu them frame)
+        self.on_checkpoint = None
+
+    def start(self, phase_detection_id, total_frames):
+        self.phaseDetectionId = phase_detection_id
+        self.totalFrames = total_frames
+        self.status = self.RUNNING
+        self.startedAt = datetime.now()
+        self._started_clock = time.monotonic()
+
+    def record_progress(self, frames, last_frame):
+        """Count `frames` more sampled frames as processed, up to frame number `last_frame`"""
+        self.framesProcessed += frames
+        self.lastFrame = last_frame
+
+    def record_gated(self, frames, last_frame):
+        """Count `frames` sampled frames that skipped inference because they were static"""
+        self.framesProcessed += frames
+        self.framesGated += frames
+        self.lastFrame = last_frame
+
+    def record_frame_saved(self, frame_number, frame_detection):
+        for listener in self.frame_listeners:
+            listener(frame_number, frame_detection)
+
+    def record_checkpoint(self, frame_number, state, flush=False):
+        """Everything up to `frame_number` is processed and saved, `state` is what a resumed run needs"""
+        self.checkpointFrame = frame_number
+        self.checkpointState = state
+        if flush and self.on_checkpoint:
+            self.on_checkpoint(self)
+
+    def prepare_resume(self):
+        self.status = self.QUEUED
+        self.error = None
+        self.finishedAt = None
+        self.stop_requested = False
+
+    def request_stop(self):
+        self.stop_requested = True
+
+    def finish(self, error=None):
+        if error:
+            self.status = self.FAILED
+        else:
+            self.status = self.STOPPED if self.stop_requested else self.COMPLETED
+        self.error = str(error) if error else None
+        self.finishedAt = datetime.now()
+
+    @property
+    def fps(self):
+        """Sampled frames processed per second"""
+        if self._started_clock is not None and self.status == self.RUNNING:
+            elapsed = time.monotonic() - self._started_clock
+        elif isinstance(self.startedAt, datetime) and isinstance(self.finishedAt, datetime):
+            elapsed = (self.finishedAt - self.startedAt).total_seconds()
+        else:
+            return None
+        return self.framesProcessed / elapsed if elapsed > 0 else None
+
+    @property
+    def eta(self):
+        """Estimated seconds left, None when unknown"""
+        if self.status != self.RUNNING:
+            return 0 if self.status in (self.COMPLETED, self.STOPPED) else None
+        fps = self.fps
+        if not fps or not self.totalFrames:
+            return None
+        return max(self.totalFrames - self.framesProcessed, 0) / fps
+
+    def to_dict(self):
+        fps = self.fps
+        eta = self.eta
+        return {
+            'id': self.id,
+            'status': self.status,
+            'phaseDetectionId': self.phaseDetectionId,
+            'videoUrl': self.videoUrl,
+            'totalFrames': self.totalFrames,
+            'framesProcessed': self.framesProcessed,
+            'framesGated': self.framesGated,
+            'lastFrame': self.lastFrame,
+            'checkpointFrame': self.checkpointFrame,
+            'fps': round(fps, 2) if fps is not None else None,
+            'eta': round(eta, 1) if eta is not None else None,
+            'error': self.error,
+            'createdAt': self.createdAt.strftime('%Y-%m-%d %H:%M:%S') if isinstance(self.createdAt, datetime) else self.createdAt,
+            'startedAt': self.startedAt.strftime('%Y-%m-%d %H:%M:%S') if isinstance(self.startedAt, datetime) else self.startedAt,
+            'finishedAt': self.finishedAt.strftime('%Y-%m-%d %H:%M:%S') if isinstance(self.finishedAt, datetime) else self.finishedAt
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        job = cls(id=data.get('id'))
+        job.status = data.get('status') or cls.QUEUED
+        job.phaseDetectionId = data.get('phaseDetectionId')
+        job.videoUrl = data.get('videoUrl')
+        job.totalFrames = data.get('totalFrames')
+        job.framesProcessed = data.get('framesProcessed') or 0
+        job.framesGated = data.get('framesGated') or 0
+        job.lastFrame = data.get('lastFrame')
+        job.checkpointFrame = data.get('checkpointFrame')
+        job.error = data.get('error')
+        for field in ['createdAt', 'startedAt', 'finishedAt']:
+            value = data.get(field)
+            if value and isinstance(value, str):
+                try:
+                    value = datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+                except ValueError:
+                    pass
+            setattr(job, field, value)
+        return job
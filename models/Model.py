@@ -2,7 +2,12 @@ from datetime import datetime
 
 from models import TrainInfo
 class Model:
-    def __init__(self, id = None, name = None, version = None, description = None, lastUpdate = None, trainInfo = None, modelUrl = None):
+    # variant cua model goc (parentId = None): model quantize INT8 tu model goc
+    INT8_DYNAMIC = 'int8_dynamic'
+    INT8_STATIC = 'int8_static'
+
+    def __init__(self, id = None, name = None, version = None, description = None, lastUpdate = None, trainInfo = None, modelUrl = None,
+                 parentId = None, variant = None, report = None):
         self.id = id
         self.name = name
         self.version = version
@@ -10,6 +15,10 @@ class Model:
         self.lastUpdate = lastUpdate if lastUpdate else datetime.now()
         self.trainInfo = trainInfo
         self.modelUrl = modelUrl
+        self.parentId = parentId
+        self.variant = variant
+        # so sanh toc do / do trung khop detection voi model goc, ghi lai khi tao variant
+        self.report = report
     def to_dict(self):
         dict = {
             'id': self.id,
@@ -17,7 +26,10 @@ class Model:
             'version': self.version, 
             'description': self.description, 
             'lastUpdate': self.lastUpdate.strftime('%Y-%m-%d %H:%M:%S') if isinstance(self.lastUpdate, datetime) else self.lastUpdate,   #chuyen thanh string 
-            'modelUrl': self.modelUrl
+            'modelUrl': self.modelUrl,
+            'parentId': self.parentId,
+            'variant': self.variant,
+            'report': self.report
 
         }
         if self.trainInfo:
@@ -34,6 +46,9 @@ class Model:
         model.version = data.get('version')
         model.description = data.get('description')
         model.modelUrl = data.get('modelUrl')  
+        model.parentId = data.get('parentId')
+        model.variant = data.get('variant')
+        model.report = data.get('report')
         last_update = data.get('lastUpdate')
         if last_update and isinstance(last_update, str):
             try:
@@ -2,7 +2,9 @@ from datetime import datetime
 
 
 class PhaseDetection:
-    def __init__(self, id=None, model=None, timeDetect=None, videoUrl = None, description=None,  result=None, confidence_threshold = None, frame_skip = None, similarity_threshold = None):
+    def __init__(self, id=None, model=None, timeDetect=None, videoUrl = None, description=None,  result=None, confidence_threshold = None, frame_skip = None, similarity_threshold = None, batch_size = None, segment_workers = None, motion_threshold = None, min_frame_skip = None, max_frame_skip = None,
+                 scan_mode = None, coarse_interval = None, refine_window = None, roi = None,
+                 imgsz = None, model_ids = None):
         self.id = id  
         self.model = model
         self.timeDetect = timeDetect if timeDetect else datetime.now()
@@ -11,6 +13,19 @@ class PhaseDetection:
         self.frame_skip = frame_skip
         self.videoUrl = videoUrl if videoUrl else None
         self.similarity_threshold = similarity_threshold
+        self.batch_size = batch_size
+        self.segment_workers = segment_workers
+        self.motion_threshold = motion_threshold
+        self.min_frame_skip = min_frame_skip
+        self.max_frame_skip = max_frame_skip
+        self.scan_mode = scan_mode
+        self.coarse_interval = coarse_interval
+        self.refine_window = refine_window
+        # cac vung (hinh chu nhat / da giac, toa do pixel) can detect, None = ca frame
+        self.roi = roi
+        self.imgsz = imgsz
+        # chi dung trong request: chay nhieu model tren cung mot lan decode video
+        self.model_ids = model_ids
         self.result = result if result else []
 
     def to_dict(self):
@@ -22,6 +37,17 @@ class PhaseDetection:
             'similarity_threshold': self.similarity_threshold, 
             'frame_skip': self.frame_skip,
             'confidence_threshold': self.confidence_threshold,
+            'batch_size': self.batch_size,
+            'segment_workers': self.segment_workers,
+            'motion_threshold': self.motion_threshold,
+            'min_frame_skip': self.min_frame_skip,
+            'max_frame_skip': self.max_frame_skip,
+            'scan_mode': self.scan_mode,
+            'coarse_interval': self.coarse_interval,
+            'refine_window': self.refine_window,
+            'roi': self.roi,
+            'imgsz': self.imgsz,
+            'model_ids': self.model_ids,
             'videoUrl': self.videoUrl
             
         }
@@ -48,6 +74,17 @@ class PhaseDetection:
         detection.confidence_threshold = data.get('confidence_threshold')
         detection.similarity_threshold = data.get('similarity_threshold')
         detection.frame_skip = data.get('frame_skip')
+        detection.batch_size = data.get('batch_size')
+        detection.segment_workers = data.get('segment_workers')
+        detection.motion_threshold = data.get('motion_threshold')
+        detection.min_frame_skip = data.get('min_frame_skip')
+        detection.max_frame_skip = data.get('max_frame_skip')
+        detection.scan_mode = data.get('scan_mode')
+        detection.coarse_interval = data.get('coarse_interval')
+        detection.refine_window = data.get('refine_window')
+        detection.roi = data.get('roi')
+        detection.imgsz = data.get('imgsz')
+        detection.model_ids = data.get('model_ids')
         detection.videoUrl = data.get('videoUrl')
         
         time_detect = data.get('timeDetect')
@@ -4,11 +4,13 @@ from .TrainInfo import TrainInfo
 from .FrameDetection import FrameDetection
 from .FraudLabel import FraudLabel
 from .BoundingBoxDetection import BoundingBoxDetection
+from .DetectionJob import DetectionJob
 __all__ = [
     'Model',
     'PhaseDetection',
     'TrainInfo',
     'FrameDetection',
     'FraudLabel',
-    'BoundingBoxDetection'
+    'BoundingBoxDetection',
+    'DetectionJob'
 ]
\ No newline at end of file
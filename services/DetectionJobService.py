@@ -0,0 +1,156 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dao.DetectionJobDAO import DetectionJobDAO
+from models.DetectionJob import DetectionJob
+from models.PhaseDetection import PhaseDetection
+from services.VideoDetectionService import VideoDetectionService
+from services.PhaseDetectionService import PhaseDetectionService
+from services.ModelService import ModelService
+from config.config import Config
+
+
+class DetectionJobService:
+    """Run process_video in a bounded worker pool and keep job state queryable while it runs"""
+
+    def __init__(self):
+        self.dao = DetectionJobDAO()
+        self.video_detection_service = VideoDetectionService()
+        self.phase_detection_service = PhaseDetectionService()
+        self.model_service = ModelService()
+        self.executor = ThreadPoolExecutor(
+            max_workers=Config.DETECTION_JOB_WORKERS,
+            thread_name_prefix='detection-job'
+        )
+        # cac job dang cho / dang chay, job da xong chi con luu trong database
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+        self._flusher = threading.Thread(target=self._flush_progress_loop, name='detection-job-flusher', daemon=True)
+        self._flusher.start()
+
+    def submit(self, detection, stream=False):
+        """Queue a detection job, with stream=True detection.videoUrl is read as a live source (process_stream)"""
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if job.status == DetectionJob.QUEUED)
+            if pending >= Config.DETECTION_JOB_MAX_PENDING:
+                raise RuntimeError(f"Too many pending detection jobs ({pending}), try again later")
+
+        # detection moi luon tao PhaseDetection moi, chi resume moi gan vao PhaseDetection co san
+        detection.id = None
+        job = DetectionJob(videoUrl=detection.videoUrl, options=self._build_options(detection, stream))
+        job.on_checkpoint = self.dao.update
+        if not self.dao.insert(job):
+            raise Exception("Failed to create detection job")
+
+        with self._lock:
+            self._jobs[job.id] = job
+        self.executor.submit(self._run_job, job, detection, stream)
+        return job
+
+    def resume(self, job_id):
+        """Queue an interrupted job again, it continues after its checkpoint and adds results
+        to the same PhaseDetection"""
+        with self._lock:
+            if job_id in self._jobs:
+                raise RuntimeError(f"DetectionJob {job_id} is still queued or running")
+        job = self.get_by_id(job_id)
+        if job.status == DetectionJob.COMPLETED:
+            raise RuntimeError(f"DetectionJob {job_id} has already completed")
+
+        options = job.options or {}
+        if options.get('stream'):
+            raise RuntimeError("Stream jobs cannot be resumed, start a new stream job instead")
+        if options.get('scan_mode') == VideoDetectionService.SCAN_COARSE_TO_FINE:
+            raise RuntimeError("Jobs using the coarse_to_fine scan mode cannot be resumed")
+        if not options.get('model'):
+            raise RuntimeError(f"DetectionJob {job_id} has no saved options to resume from")
+
+        # tao lai detection tu tham so cua request, PhaseDetection cu (neu da tao) giu nguyen id
+        detection = PhaseDetection.from_dict(options)
+        detection.model = self.model_service.get_by_id(options['model']['id'])
+        detection.videoUrl = job.videoUrl
+        if job.phaseDetectionId and self.phase_detection_service.dao.find_by_id(job.phaseDetectionId):
+            detection.id = job.phaseDetectionId
+        else:
+            # chua tao PhaseDetection (hoac da bi xoa) thi chay lai tu dau
+            detection.id = None
+            job.checkpointFrame = None
+            job.checkpointState = None
+
+        job.prepare_resume()
+        job.on_checkpoint = self.dao.update
+        self.dao.update(job)
+        with self._lock:
+            self._jobs[job.id] = job
+        self.executor.submit(self._run_job, job, detection, False, True)
+        return job
+
+    def get_by_id(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job:
+            return job
+
+        job = self.dao.find_by_id(job_id)
+        if not job:
+            raise ValueError(f"DetectionJob with ID {job_id} not found")
+        return job
+
+    def stop(self, job_id):
+        """Ask a queued or running job to stop, frames already processed are kept"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if not job:
+            # job da ket thuc (hoac khong ton tai)
+            return self.get_by_id(job_id)
+        job.request_stop()
+        return job
+
+    def get_all(self):
+        jobs = self.dao.find_all()
+        with self._lock:
+            # job dang chay thi lay trang thai moi nhat trong bo nho
+            return [self._jobs.get(job.id, job) for job in jobs]
+
+    def get_result(self, job_id):
+        """Return (job, PhaseDetection) - the detection is None until the job has completed"""
+        job = self.get_by_id(job_id)
+        if job.status not in (DetectionJob.COMPLETED, DetectionJob.STOPPED) or not job.phaseDetectionId:
+            return job, None
+        return job, self.phase_detection_service.get_by_id(job.phaseDetectionId)
+
+    def _build_options(self, detection, stream):
+        options = detection.to_dict()
+        options.pop('result', None)
+        options.pop('id', None)
+        options['model'] = {'id': detection.model.id}
+        options['stream'] = stream
+        return options
+
+    def _run_job(self, job, detection, stream=False, resume=False):
+        try:
+            if job.stop_requested:
+                # bi dung khi con dang cho trong queue
+                pass
+            elif stream:
+                self.video_detection_service.process_stream(detection, job=job)
+            else:
+                self.video_detection_service.process_video(detection, job=job, resume=resume)
+            job.finish()
+        except Exception as e:
+            print(f"Detection job {job.id} failed: {e}")
+            job.finish(e)
+
+        if self.dao.update(job):
+            with self._lock:
+                self._jobs.pop(job.id, None)
+
+    def _flush_progress_loop(self):
+        # ghi tien do cua cac job dang chay xuong database theo chu ky, khong ghi sau moi batch
+        while True:
+            time.sleep(Config.DETECTION_JOB_PROGRESS_INTERVAL)
+            with self._lock:
+                running = [job for job in self._jobs.values() if job.status == DetectionJob.RUNNING]
+            for job in running:
+                self.dao.update(job)
@@ -1,6 +1,7 @@
 import os
 import shutil
 from datetime import datetime
+from urllib.parse import urlparse
 from werkzeug.utils import secure_filename
 from config.config import Config
 
@@ -12,6 +13,7 @@ class FileStorageService:
         self.upload_dir = os.path.join(self.base_dir, 'uploads')
         self.video_dir = os.path.join(self.upload_dir, 'videos')
         self.flagged_frames_dir = os.path.join(self.upload_dir, 'flagged_frames')
+        self.raw_detections_dir = os.path.join(self.base_dir, Config.RAW_DETECTION_FOLDER)
         
         
         
@@ -28,7 +30,7 @@ class FileStorageService:
             self.video_dir,
             
             self.flagged_frames_dir,
-            
+            self.raw_detections_dir
             
         ]
         
@@ -65,6 +67,69 @@ class FileStorageService:
     
    
     
+    def resolve_stream_source(self, source):
+        """Validate a stream source: a stream URL must use a scheme and host allowed by
+        Config.STREAM_ALLOWED_SCHEMES / STREAM_ALLOWED_HOSTS and is returned as is, a file or
+        named pipe must be inside the stream folder and is returned as an absolute path"""
+        from utils.StreamFrameSource import StreamFrameSource
+        if not source:
+            raise ValueError("Stream source is required")
+        if StreamFrameSource.is_stream_url(source):
+            self._check_stream_url(source)
+            return source
+        
+        # chi cho doc file / pipe trong thu muc stream, khong cho tro toi file bat ky tren server
+        stream_dir = os.path.realpath(os.path.join(self.base_dir, Config.STREAM_FOLDER))
+        absolute_path = os.path.realpath(os.path.join(stream_dir, source))
+        if os.path.commonpath([stream_dir, absolute_path]) != stream_dir:
+            raise ValueError(f"Stream file must be inside {Config.STREAM_FOLDER}")
+        if not os.path.exists(absolute_path):
+            raise ValueError(f"Stream file not found: {source}")
+        return absolute_path
+    
+    def _check_stream_url(self, source):
+        # server tu mo url nay: khong cho tro toi host noi bo hay giao thuc khac cua ffmpeg
+        if any(char.isspace() or char == '\\' for char in source):
+            raise ValueError("Stream URL must not contain whitespace or backslashes")
+        try:
+            parsed = urlparse(source)
+            host = (parsed.hostname or '').lower()
+        except ValueError:
+            raise ValueError(f"Invalid stream URL: {source}")
+        if parsed.scheme.lower() not in Config.STREAM_ALLOWED_SCHEMES:
+            raise ValueError(f"Stream scheme '{parsed.scheme}' is not allowed")
+        if not host or host not in Config.STREAM_ALLOWED_HOSTS:
+            raise ValueError(f"Stream host '{host}' is not allowed")
+    
+    def is_stream_source(self, source):
+        """True for a stream URL or a file / pipe of the stream folder (see resolve_stream_source)"""
+        from utils.StreamFrameSource import StreamFrameSource
+        if not source:
+            return False
+        if StreamFrameSource.is_stream_url(source):
+            return True
+        stream_dir = os.path.realpath(os.path.join(self.base_dir, Config.STREAM_FOLDER))
+        return os.path.commonpath([stream_dir, os.path.realpath(source)]) == stream_dir
+    
+    def resolve_calibration_folder(self, folder):
+        """Absolute path of a folder of sample frames inside the calibration folder"""
+        calibration_dir = os.path.realpath(os.path.join(self.base_dir, Config.CALIBRATION_FOLDER))
+        absolute_path = os.path.realpath(os.path.join(calibration_dir, folder or ''))
+        if os.path.commonpath([calibration_dir, absolute_path]) != calibration_dir:
+            raise ValueError(f"Calibration folder must be inside {Config.CALIBRATION_FOLDER}")
+        if not os.path.isdir(absolute_path):
+            raise ValueError(f"Calibration folder not found: {folder}")
+        return absolute_path
+    
+    def get_raw_detections_path(self, phase_detection_id):
+        """Path of the RawDetections file of a PhaseDetection (may not exist)"""
+        return os.path.join(self.raw_detections_dir, f"phase_detection_{int(phase_detection_id)}.npz")
+    
+    def delete_raw_detections(self, phase_detection_id):
+        path = self.get_raw_detections_path(phase_detection_id)
+        if os.path.exists(path):
+            os.remove(path)
+    
     def save_flagged_frame(self, frame, frame_number, timestamp_suffix=True):
         prefixFilename = "http://localhost:5000"
         import cv2
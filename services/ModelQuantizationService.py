@@ -0,0 +1,148 @@
+import os
+import time
+from datetime import datetime
+import cv2
+import numpy as np
+from config.config import Config
+from dao.ModelDAO import ModelDAO
+from models.Model import Model
+from services.ModelService import ModelService
+from services.FileStorageService import FileStorageService
+from backends import ModelExporter, ModelQuantizer, OnnxRuntimeBackend
+from utils.Letterbox import Letterbox
+from utils.detection_utils import build_fraud_class_mask, detect_frames
+from utils.box_ops import average_precision, match_detections
+
+
+class ModelQuantizationService:
+    """Create INT8 variants of a model and record how they compare with the FP32 model.
+
+    A variant is a model row linked to its parent (parentId) whose modelUrl is the quantized
+    .onnx file, so a PhaseDetection uses it by selecting the variant's model id.
+    """
+
+    VARIANTS = {
+        ModelQuantizer.DYNAMIC: Model.INT8_DYNAMIC,
+        ModelQuantizer.STATIC: Model.INT8_STATIC
+    }
+
+    def __init__(self):
+        self.dao = ModelDAO()
+        self.model_service = ModelService()
+        self.file_storage_service = FileStorageService()
+        self.exporter = ModelExporter()
+        self.quantizer = ModelQuantizer()
+
+    def get_variants(self, model_id):
+        self.model_service.get_by_id(model_id)
+        return self.dao.find_variants(model_id)
+
+    def create_variant(self, model_id, mode, calibration_folder, evaluation_folder=None, imgsz=None, conf=0.25):
+        """Quantize a model, compare it with the FP32 model on sample frames and save it as a variant row.
+        Quantizing the same mode again replaces the file and the report of the existing variant."""
+        if mode not in self.VARIANTS:
+            raise ValueError(f"Unsupported quantization mode: {mode}. Available: {', '.join(self.VARIANTS)}")
+        parent = self.model_service.get_by_id(model_id)
+        if parent.parentId:
+            raise ValueError(f"Model {model_id} is already a variant, quantize model {parent.parentId} instead")
+
+        calibration_dir = self.file_storage_service.resolve_calibration_folder(calibration_folder)
+        evaluation_dir = calibration_dir
+        if evaluation_folder:
+            evaluation_dir = self.file_storage_service.resolve_calibration_folder(evaluation_folder)
+        calibration_images = self.quantizer.list_images(calibration_dir, Config.QUANTIZATION_CALIBRATION_FRAMES)
+        evaluation_images = self.quantizer.list_images(evaluation_dir, Config.QUANTIZATION_REPORT_FRAMES)
+        if not calibration_images or not evaluation_images:
+            raise ValueError("Calibration folder has no images")
+
+        try:
+            fp32_path = self._get_fp32_onnx(self.model_service.get_model_path(parent))
+            parent_backend = OnnxRuntimeBackend(fp32_path)
+            # calibrate o dung kich thuoc anh se dung luc inference
+            letterbox = Letterbox.for_model(parent_backend, imgsz)
+            variant_path = self.quantizer.quantize(
+                fp32_path, mode, calibration_images, letterbox.imgsz, parent_backend.stride
+            )
+            variant_backend = OnnxRuntimeBackend(variant_path)
+        except ImportError as e:
+            raise RuntimeError(f"Quantization is not available ({e}), install onnxruntime and onnx")
+
+        report = self._build_report(parent_backend, variant_backend, evaluation_images, letterbox.imgsz, conf)
+        report.update({
+            'mode': mode,
+            'calibrationFolder': calibration_folder,
+            'calibrationFrames': len(calibration_images),
+            'evaluationFolder': evaluation_folder or calibration_folder,
+            'parentSizeMb': round(os.path.getsize(fp32_path) / 1024 ** 2, 2),
+            'variantSizeMb': round(os.path.getsize(variant_path) / 1024 ** 2, 2)
+        })
+
+        variant = self.dao.find_variant(parent.id, self.VARIANTS[mode]) or Model()
+        variant.name = parent.name
+        variant.version = f"{parent.version}-int8-{mode}" if parent.version else f"int8-{mode}"
+        variant.description = f"INT8 {mode} quantization of {parent.name} (model {parent.id})"
+        variant.lastUpdate = datetime.now()
+        variant.modelUrl = os.path.relpath(variant_path, Config.BASE_DIR)
+        variant.parentId = parent.id
+        variant.variant = self.VARIANTS[mode]
+        variant.report = report
+        if variant.id:
+            self.dao.update(variant)
+            # file quantize da bi ghi de, model cu dang load khong con dung
+            self.model_service.registry.evict(predicate=lambda key: key[0] == variant.id)
+        else:
+            self.dao.insert(variant)
+        return variant
+
+    def _get_fp32_onnx(self, model_path):
+        if model_path.endswith('.onnx'):
+            return model_path
+        if model_path.endswith('.pt'):
+            return self.exporter.export(model_path, ModelExporter.ONNX)
+        raise ValueError("Only .pt and .onnx models can be quantized")
+
+    def _build_report(self, parent_backend, variant_backend, image_paths, imgsz, conf):
+        frames = [frame for frame in (cv2.imread(path) for path in image_paths) if frame is not None]
+        if not frames:
+            raise ValueError("No readable evaluation images")
+        fraud_class_mask = build_fraud_class_mask(parent_backend.names)
+        parent_detections, parent_latency = self._measure(parent_backend, frames, imgsz, conf, fraud_class_mask)
+        variant_detections, variant_latency = self._measure(variant_backend, frames, imgsz, conf, fraud_class_mask)
+
+        # model FP32 la tham chieu: box cua variant trung class va IoU >= 0.5 voi box FP32 la khop
+        matched = 0
+        for parent_frame, variant_frame in zip(parent_detections, variant_detections):
+            _, _, ious = match_detections(parent_frame, variant_frame)
+            matched += int(np.count_nonzero(ious >= 0.5))
+        parent_boxes = sum(len(detections.class_ids) for detections in parent_detections)
+        variant_boxes = sum(len(detections.class_ids) for detections in variant_detections)
+        ap = average_precision(variant_detections, parent_detections)
+
+        return {
+            'frames': len(frames),
+            'imgsz': imgsz,
+            'conf': conf,
+            'parentLatencyMs': round(parent_latency, 2),
+            'variantLatencyMs': round(variant_latency, 2),
+            'speedup': round(parent_latency / variant_latency, 2) if variant_latency else None,
+            'parentBoxes': parent_boxes,
+            'variantBoxes': variant_boxes,
+            # ti le box FP32 variant tim lai duoc / ti le box cua variant co trong FP32
+            'recall': round(matched / parent_boxes, 4) if parent_boxes else None,
+            'precision': round(matched / variant_boxes, 4) if variant_boxes else None,
+            'mAP50': round(ap, 4) if ap is not None else None,
+            'createdAt': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+    def _measure(self, backend, frames, imgsz, conf, fraud_class_mask):
+        """Detections of every frame and the median latency in ms of one frame (batch 1, preprocessing included)"""
+        letterbox = Letterbox.for_model(backend, imgsz)
+        # lan chay dau khoi tao session, khong tinh thoi gian
+        detect_frames(backend, frames[:1], conf, fraud_class_mask, letterbox=letterbox)
+        detections = []
+        latencies = []
+        for frame in frames:
+            start = time.perf_counter()
+            detections.extend(detect_frames(backend, [frame], conf, fraud_class_mask, letterbox=letterbox))
+            latencies.append(time.perf_counter() - start)
+        return detections, float(np.median(latencies)) * 1000
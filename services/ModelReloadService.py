@@ -0,0 +1,92 @@
+import threading
+import time
+from config.config import Config
+from services.ModelService import ModelService
+
+
+class ModelReloadService:
+    """Reload loaded models whose weights changed, without restarting the server.
+
+    Every Config.MODEL_RELOAD_INTERVAL seconds each model in the registry is compared with its
+    row (model_url, last_update) and its weights file (size and mtime, then the content hash so
+    a file touched or copied again unchanged is not reloaded). New weights are loaded in this
+    thread, off the request path, and swapped into the registry in one step: new requests get
+    the new model while detections already running finish with the one they hold.
+    """
+
+    # file vua duoc ghi trong khoang nay thi co the chua copy xong, doi lan kiem tra sau
+    SETTLE_SECONDS = 2
+
+    def __init__(self):
+        self.model_service = ModelService()
+        self.registry = self.model_service.registry
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if Config.MODEL_RELOAD_INTERVAL <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._watch_loop, name='model-reload', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch_loop(self):
+        while not self._stop.wait(Config.MODEL_RELOAD_INTERVAL):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Model reload check failed: {e}")
+
+    def check(self):
+        """Compare every loaded model with its row and file once; return the keys that were reloaded"""
+        reloaded = []
+        for key, entry in self.registry.entries():
+            model_id, backend = key
+            try:
+                reason = self._get_change(model_id, entry)
+            except (ValueError, FileNotFoundError) as e:
+                # row da bi xoa, loi database hoac file dang duoc thay: giu model dang load
+                print(f"Cannot check model {model_id} for changes: {e}")
+                continue
+            if reason is None:
+                continue
+
+            print(f"Model {model_id} changed ({reason}), reloading")
+            try:
+                new_entry = self.model_service.load_uncached(model_id, backend)
+            except Exception as e:
+                print(f"Reload of model {model_id} failed, keeping the loaded weights: {e}")
+                continue
+            if self.registry.replace(key, new_entry):
+                reloaded.append(key)
+        return reloaded
+
+    def _get_change(self, model_id, entry):
+        fingerprint = entry.get('fingerprint')
+        if fingerprint is None:
+            return None
+
+        model_info = self.model_service.get_by_id(model_id)
+        if model_info.modelUrl != fingerprint['modelUrl']:
+            return 'model_url changed'
+        if model_info.lastUpdate != fingerprint['lastUpdate']:
+            return 'last_update changed'
+
+        model_path = self.model_service.get_model_path(model_info)
+        size, mtime = self.model_service.stat_weights(model_path)
+        if (size, mtime) == (fingerprint['size'], fingerprint['mtime']):
+            if fingerprint['hash'] is None:
+                # hash cua ban dang load, tinh o day de khong lam cham lan load dau
+                fingerprint['hash'] = self.model_service.hash_weights(model_path)
+            return None
+        if time.time() - mtime < self.SETTLE_SECONDS:
+            return None
+
+        content_hash = self.model_service.hash_weights(model_path)
+        if content_hash == fingerprint['hash']:
+            # chi doi mtime (touch / copy lai cung file), khong can load lai
+            fingerprint['size'], fingerprint['mtime'] = size, mtime
+            return None
+        return 'weights file changed'
@@ -1,6 +1,6 @@
 import os
 import shutil
-from ultralytics import YOLO
+import hashlib
 from datetime import datetime
 from services.BaseService import BaseService
 
@@ -8,13 +8,14 @@ from dao.ModelDAO import ModelDAO
 from models.Model import Model
 from models.TrainInfo import TrainInfo
 from config.config import Config
+from backends import create_backend, prepare_model, ModelRegistry, InferenceServer, InferenceScheduler, RemoteModel
 
 
 class ModelService():
     def __init__(self):
         super().__init__()
         self.dao = ModelDAO()
-        self.loaded_models = {}
+        self.registry = ModelRegistry.get_instance()
         
     def get_by_id(self, id):
         model = self.dao.find_by_id(id)
@@ -23,25 +24,86 @@ class ModelService():
         return model
     def get_all(self):
         return self.dao.find_all()
-    def load_model(self, model_id):
-        
-        if model_id in self.loaded_models:
-            return self.loaded_models[model_id]
-        model_info = self.get_by_id(model_id)
+    def get_model_path(self, model_info):
+        """Absolute path of the weights file of a model, raise if it is missing"""
         if not model_info.modelUrl:
             raise ValueError(f"Model {model_info.name} has no model file")
         
-        # Load YOLO model
         model_path = os.path.join(Config.BASE_DIR, model_info.modelUrl)
         if not os.path.exists(model_path):
             raise FileNotFoundError(f"Model file not found: {model_path}")
+        return model_path
+    def load_model(self, model_id, backend=None):
+        """Load a model with an inference backend (default Config.INFERENCE_BACKEND).
+        'model' is called like an ultralytics YOLO model whatever the backend.
+        Loaded models are shared by every ModelService through the ModelRegistry"""
+        key = (model_id, backend or Config.INFERENCE_BACKEND)
+        return self.registry.get(key, lambda: self.load_uncached(model_id, backend))
+    
+    def load_uncached(self, model_id, backend=None):
+        """Load the model from its weights file, bypassing the registry"""
+        model_info = self.get_by_id(model_id)
+        
+        # Load YOLO model
+        model_path = self.get_model_path(model_info)
         
         try:
-            yolo_model = YOLO(model_path)
-            self.loaded_models[model_id] = {
+            # lay truoc khi load: file bi ghi de trong luc load thi lan kiem tra sau van thay khac
+            fingerprint = self.get_fingerprint(model_info, model_path)
+            if Config.INFERENCE_WORKERS > 0:
+                # model chay trong cac worker process, export (neu can) mot lan o day truoc khi worker load
+                export_path, backend_name = prepare_model(model_path, backend)
+                yolo_model = RemoteModel(
+                    InferenceServer.get_instance(), export_path, backend_name, version=fingerprint['mtime']
+                )
+            else:
+                # moi model dung so thread cua mot slot scheduler, cac request chay song song khong tranh core
+                threads = Config.INFERENCE_THREADS or InferenceScheduler.get_instance().threads_per_slot
+                yolo_model = create_backend(model_path, backend, threads=threads)
+            return {
                 'model': yolo_model,
-                'info': model_info
+                'info': model_info,
+                'backend': yolo_model.name,
+                'fingerprint': fingerprint
             }
-            return self.loaded_models[model_id]
         except Exception as e:
-            raise Exception(f"Failed to load YOLO model: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Failed to load YOLO model: {str(e)}")
+    
+    def get_fingerprint(self, model_info, model_path=None):
+        """What identifies the loaded weights: model row (model_url, last_update) and file (size, mtime).
+        The content hash is filled in later by the reload watcher"""
+        model_path = model_path or self.get_model_path(model_info)
+        size, mtime = self.stat_weights(model_path)
+        return {
+            'modelUrl': model_info.modelUrl,
+            'lastUpdate': model_info.lastUpdate,
+            'size': size,
+            'mtime': mtime,
+            'hash': None
+        }
+    
+    def _weight_files(self, model_path):
+        # model openvino la ca mot thu muc
+        if os.path.isdir(model_path):
+            return sorted(os.path.join(root, name) for root, _, names in os.walk(model_path) for name in names)
+        return [model_path]
+    
+    def stat_weights(self, model_path):
+        """(total size, latest mtime) of the weights file or folder"""
+        stats = [os.stat(path) for path in self._weight_files(model_path)]
+        return sum(stat.st_size for stat in stats), max((stat.st_mtime for stat in stats), default=0)
+    
+    def hash_weights(self, model_path):
+        """sha256 of the weights file or folder content"""
+        digest = hashlib.sha256()
+        for path in self._weight_files(model_path):
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+        return digest.hexdigest()
+    
+    def get_registry_stats(self):
+        return self.registry.get_stats()
+    
+    def get_scheduler_stats(self):
+        return InferenceScheduler.get_instance().get_stats()
@@ -0,0 +1,95 @@
+import threading
+import time
+import numpy as np
+from config.config import Config
+from services.ModelService import ModelService
+from utils.Letterbox import Letterbox
+from utils.detection_utils import build_fraud_class_mask, detect_frames
+
+
+class ModelWarmupService:
+    """Load the configured models at startup and run a few inferences on blank frames,
+    so the first requests after a deploy don't pay for weight loading and lazy initialization.
+
+    Models are Config.PRELOAD_MODEL_IDS, plus the latest version of every model name when
+    Config.PRELOAD_LATEST_MODELS is set. The server is ready once every model has been tried.
+    """
+
+    PENDING = 'pending'
+    WARMING = 'warming'
+    READY = 'ready'
+
+    def __init__(self):
+        self.model_service = ModelService()
+        self.status = self.PENDING
+        self.models = {}
+        self.started_at = None
+        self.finished_at = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Warm the models up in a background thread (the server answers health checks meanwhile)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self.run, name='model-warmup', daemon=True)
+            self._thread.start()
+
+    def is_ready(self):
+        return self.status == self.READY
+
+    def run(self):
+        self.status = self.WARMING
+        self.started_at = time.time()
+        try:
+            model_ids = self.get_model_ids()
+        except Exception as e:
+            print(f"Cannot list models to preload: {e}")
+            model_ids = []
+
+        for model_id in model_ids:
+            self.models[model_id] = {'status': self.WARMING}
+            start = time.perf_counter()
+            try:
+                self.warmup(model_id)
+                self.models[model_id] = {'status': self.READY, 'seconds': round(time.perf_counter() - start, 2)}
+            except Exception as e:
+                # model loi khong chan ca server, chi ghi lai de xem o health
+                print(f"Warmup of model {model_id} failed: {e}")
+                self.models[model_id] = {'status': 'failed', 'error': str(e)}
+
+        self.finished_at = time.time()
+        self.status = self.READY
+        print(f"Model warmup done in {self.finished_at - self.started_at:.1f}s: {self.models}")
+
+    def get_model_ids(self):
+        model_ids = list(Config.PRELOAD_MODEL_IDS)
+        if Config.PRELOAD_LATEST_MODELS:
+            # chi model goc, variant quantize duoc chon rieng qua PRELOAD_MODEL_IDS
+            names = {model.name for model in self.model_service.get_all() if not model.parentId}
+            for name in sorted(names):
+                latest = self.model_service.dao.find_latest_version(name)
+                if latest and latest.id not in model_ids:
+                    model_ids.append(latest.id)
+        return model_ids
+
+    def warmup(self, model_id):
+        model_data = self.model_service.load_model(model_id)
+        model = model_data['model']
+        letterbox = Letterbox.for_model(model)
+        fraud_class_mask = build_fraud_class_mask(model.names)
+        # batch day du voi kich thuoc frame hay gap nhat, giong luc xu ly video
+        frame = np.zeros((Config.WARMUP_FRAME_HEIGHT, Config.WARMUP_FRAME_WIDTH, 3), dtype=np.uint8)
+        frames = [frame] * max(1, Config.DETECTION_BATCH_SIZE)
+        for _ in range(Config.WARMUP_ITERATIONS):
+            detect_frames(model, frames, 0.25, fraud_class_mask, letterbox=letterbox)
+
+    def get_status(self):
+        return {
+            'status': self.status,
+            'ready': self.is_ready(),
+            'startedAt': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started_at)) if self.started_at else None,
+            'seconds': round((self.finished_at or time.time()) - self.started_at, 2) if self.started_at else None,
+            'models': {str(model_id): state for model_id, state in self.models.items()}
+        }
@@ -2,6 +2,7 @@ import os
 from datetime import datetime, timedelta
 from services.BaseService import BaseService
 from services.ModelService import ModelService
+from services.FileStorageService import FileStorageService
 from dao.PhaseDetectionDAO import PhaseDetectionDAO
 from dao.FrameDetectionDAO import FrameDetectionDAO
 from models.PhaseDetection import PhaseDetection
@@ -14,6 +15,7 @@ class PhaseDetectionService(BaseService):
         super().__init__()
         self.dao = PhaseDetectionDAO()
         self.model_service = ModelService()
+        self.file_storage_service = FileStorageService()
         
     
     def create(self, detection):
@@ -58,6 +60,7 @@ class PhaseDetectionService(BaseService):
         
         # Delete (will cascade delete result detections)
         if self.dao.delete(id):
+            self.file_storage_service.delete_raw_detections(id)
             return True
         
         raise Exception("Failed to delete detection")
@@ -0,0 +1,170 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+from config.config import Config
+from utils.FrameSampler import FrameSampler
+from utils.MotionGate import MotionGate
+from utils.AdaptiveStride import AdaptiveStride
+from utils.RegionOfInterest import RegionOfInterest
+from utils.Letterbox import Letterbox
+from utils.detection_utils import (
+    DEFAULT_CONFIDENCE_THRESHOLD, build_fraud_class_mask, detect_frames, detect_frames_raw, filter_detections
+)
+
+
+# model YOLO rieng cua moi worker process, duoc load mot lan trong initializer
+_worker_model = None
+_worker_fraud_class_mask = None
+
+
+def _init_segment_worker(model_path, torch_threads):
+    global _worker_model, _worker_fraud_class_mask
+    import torch
+    from backends import create_backend
+
+    # chia deu so core cho cac process de khong bi oversubscription
+    torch.set_num_threads(torch_threads)
+    # model da duoc export (neu can) trong process chinh nen worker chi load ban cache
+    _worker_model = create_backend(model_path, threads=torch_threads)
+    _worker_fraud_class_mask = build_fraud_class_mask(_worker_model.names)
+
+
+def _detect_segment(video_path, start_frame, end_frame, frame_skip, confidence_threshold, batch_size, motion_threshold,
+                    adaptive_stride=None, roi=None, imgsz=None, raw_confidence=None):
+    """Decode and infer frames start_frame..end_frame,
+    return (sampled_count, gated_count, [(frame_number, Detections)], raw detections).
+    With a raw_confidence the raw detections (every class, confidence >= raw_confidence) of every
+    inferred frame are returned as [(frame_number, Detections)], otherwise None"""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video: {video_path}")
+
+    sampled_count = 0
+    gated_count = 0
+    detections = []
+    raw_detections = [] if raw_confidence is not None else None
+    batch = []
+    motion_gate = MotionGate(motion_threshold) if motion_threshold > 0 else None
+    # moi segment co bo dieu khien stride rieng, bat dau thua o dau segment
+    stride_controller = AdaptiveStride(*adaptive_stride) if adaptive_stride else None
+    region_of_interest = RegionOfInterest(roi) if roi else None
+    letterbox = Letterbox.for_model(_worker_model, imgsz)
+    try:
+        sampler = FrameSampler(
+            cap, frame_skip, start_frame=start_frame, end_frame=end_frame, stride_controller=stride_controller
+        )
+        for frame_number, frame in sampler:
+            sampled_count += 1
+            if motion_gate and not motion_gate.should_infer(
+                    region_of_interest.crop(frame) if region_of_interest else frame):
+                gated_count += 1
+                continue
+
+            batch.append((frame_number, frame))
+            if len(batch) < batch_size:
+                continue
+            detections.extend(_infer_batch(
+                batch, confidence_threshold, stride_controller, region_of_interest, letterbox,
+                raw_confidence, raw_detections
+            ))
+            batch = []
+
+        if batch:
+            detections.extend(_infer_batch(
+                batch, confidence_threshold, stride_controller, region_of_interest, letterbox,
+                raw_confidence, raw_detections
+            ))
+    finally:
+        cap.release()
+
+    return sampled_count, gated_count, detections, raw_detections
+
+
+def _infer_batch(batch, confidence_threshold, stride_controller=None, roi=None, letterbox=None,
+                 raw_confidence=None, raw_detections=None):
+    images = [frame for _, frame in batch]
+    if raw_detections is None:
+        batch_detections = detect_frames(
+            _worker_model, images, confidence_threshold, _worker_fraud_class_mask, roi, letterbox
+        )
+    else:
+        # model chay o nguong thap voi moi class, ket qua loc lai giong detect_frames
+        if confidence_threshold is None:
+            confidence_threshold = DEFAULT_CONFIDENCE_THRESHOLD
+        raw_batch = detect_frames_raw(
+            _worker_model, images, min(confidence_threshold, raw_confidence), roi, letterbox
+        )
+        raw_detections.extend(
+            (frame_number, frame_detections) for (frame_number, _), frame_detections in zip(batch, raw_batch)
+        )
+        batch_detections = [
+            filter_detections(frame_detections, _worker_fraud_class_mask, confidence_threshold)
+            for frame_detections in raw_batch
+        ]
+
+    detections = []
+    for (frame_number, _), frame_detections in zip(batch, batch_detections):
+        if stride_controller:
+            stride_controller.observe(frame_number, len(frame_detections.class_ids) > 0)
+        # frame khong co box gian lan thi khong bao gio duoc luu, khong can gui ve process chinh
+        if len(frame_detections.class_ids):
+            detections.append((frame_number, frame_detections))
+    return detections
+
+
+class SegmentDetectionService:
+    """Split one video into frame ranges and decode + infer each range in its own worker process"""
+
+    def split_segments(self, total_frames, segment_count):
+        """Split frames 1..total_frames into at most segment_count inclusive (start, end) ranges"""
+        segment_count = max(1, min(segment_count, total_frames))
+        size = -(-total_frames // segment_count)
+        return [
+            (start, min(start + size - 1, total_frames))
+            for start in range(1, total_frames + 1, size)
+        ]
+
+    def detect(self, video_path, model_path, phase_detection, total_frames, workers, job=None, stride_controller=None,
+               raw_detections=None):
+        """Yield (frame_number, Detections) of every sampled frame with fraud boxes, in frame order.
+        The unfiltered detections of every inferred frame are added to `raw_detections` (RawDetections) if given"""
+        # chia nhieu segment hon so process de can bang tai va cap nhat tien do thuong xuyen hon
+        segments = self.split_segments(total_frames, workers * Config.SEGMENTS_PER_WORKER)
+        torch_threads = max(1, (os.cpu_count() or 1) // workers)
+        batch_size = phase_detection.batch_size or Config.DETECTION_BATCH_SIZE
+        motion_threshold = phase_detection.motion_threshold
+        if motion_threshold is None:
+            motion_threshold = Config.MOTION_GATE_THRESHOLD
+        adaptive_stride = None
+        if stride_controller:
+            adaptive_stride = (stride_controller.min_stride, stride_controller.max_stride, stride_controller.quiet_frames)
+
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_segment_worker,
+            initargs=(model_path, torch_threads)
+        )
+        try:
+            futures = [
+                executor.submit(
+                    _detect_segment, video_path, start, end, phase_detection.frame_skip,
+                    phase_detection.confidence_threshold, batch_size, motion_threshold, adaptive_stride,
+                    phase_detection.roi, phase_detection.imgsz,
+                    raw_detections.confidence_floor if raw_detections is not None else None
+                )
+                for start, end in segments
+            ]
+            # segment sau co the xong truoc, nhung ket qua van tra ve theo dung thu tu frame
+            for (start, end), future in zip(segments, futures):
+                sampled_count, gated_count, detections, segment_raw_detections = future.result()
+                if job:
+                    job.record_progress(sampled_count - gated_count, end)
+                    job.record_gated(gated_count, end)
+                if raw_detections is not None:
+                    for frame_number, frame_detections in segment_raw_detections:
+                        raw_detections.add(frame_number, frame_detections)
+                yield from detections
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -1,19 +1,49 @@
 import cv2
+import copy
 import numpy as np
 from datetime import datetime
 import os
+import queue
+import threading
+import time
+from collections import namedtuple
 from models.PhaseDetection import PhaseDetection
 from models.FrameDetection import FrameDetection
 from models.BoundingBoxDetection import BoundingBoxDetection
+from models.DetectionJob import DetectionJob
 from services.FrameDetectionService import FrameDetectionService
 from services.PhaseDetectionService import PhaseDetectionService
 from services.FileStorageService import FileStorageService
 from services.FraudLabelService import FraudLabelService
 from services.ModelService import ModelService
 from services.BoundingBoxDetectionService import BoundingBoxDetectionService
+from services.SegmentDetectionService import SegmentDetectionService
+from config.config import Config
+from utils.FrameSampler import FrameSampler
+from utils.StreamFrameSource import StreamFrameSource
+from utils.StagePipeline import StagePipeline
+from utils.MotionGate import MotionGate
+from utils.AdaptiveStride import AdaptiveStride
+from utils.RegionOfInterest import RegionOfInterest
+from utils.Letterbox import Letterbox
+from utils.FrameCache import FrameCache
+from utils.RawDetections import RawDetections
+from utils.ModelAgreement import ModelAgreement
+from utils.detection_utils import (
+    DEFAULT_CONFIDENCE_THRESHOLD, build_fraud_class_mask, empty_detections, detect_frames, detect_frames_raw,
+    filter_detections, scale_detections, detections_to_dict, detections_from_dict
+)
+from utils.box_ops import detections_similar
+
+
+# danh dau trong queue giua inference va luu ket qua: moi frame den frame_number da xu ly xong
+_Checkpoint = namedtuple('_Checkpoint', ['frame_number', 'state'])
 
 
 class VideoDetectionService:
+    SCAN_DENSE = 'dense'
+    SCAN_COARSE_TO_FINE = 'coarse_to_fine'
+    
     def __init__(self):
         self.model_service = ModelService()
         self.phase_detection_service = PhaseDetectionService()
@@ -21,9 +51,13 @@ class VideoDetectionService:
         self.fraud_label_service = FraudLabelService()
         self.frame_detection_service = FrameDetectionService()
         self.bounding_box_detection_service = BoundingBoxDetectionService()
-        self.phase_detection = None
+        self.segment_detection_service = SegmentDetectionService()
+        self.frame_cache = FrameCache()
     
-    def process_video(self, detection):
+    def process_video(self, detection, job=None, resume=False):
+        """Detect fraud in detection.videoUrl and return the PhaseDetection with its FrameDetections.
+        With `resume` (DetectionJobService.resume) the job continues after its checkpoint and
+        results are added to the existing PhaseDetection detection.id"""
         model_data = self.model_service.load_model(detection.model.id)
         yolo_model = model_data['model']
         model_info = model_data['info']
@@ -32,174 +66,731 @@ class VideoDetectionService:
 
         if not cap.isOpened():
             raise ValueError(f"Cannot open video: {detection.videoUrl}")
-        self.phase_detection = self.phase_detection_service.create(detection)
-        self._process_frames(cap, yolo_model)
-        
-     
-        cap.release()
-        cv2.destroyAllWindows()
+        raw_detections = None
+        try:
+            # chay tiep job tu checkpoint, ket qua gan vao PhaseDetection cu
+            resuming = resume and detection.id is not None
+            if resuming:
+                phase_detection = detection
+            else:
+                phase_detection = self.phase_detection_service.create(detection)
+            start_frame = (job.checkpointFrame or 0) + 1 if resuming and job else 1
+            raw_detections = self._open_raw_detections(phase_detection, yolo_model, start_frame)
+            
+            # chi decode cac frame duoc sample, cac frame bi bo qua chi grab (hoac seek qua neu frame_skip lon)
+            sampler = FrameSampler(cap, phase_detection.frame_skip, start_frame=start_frame)
+            sampler.stride_controller = self._create_adaptive_stride(phase_detection, sampler.fps)
+            if job:
+                # stride thay doi theo noi dung hoac chi scan mot phan video thi khong biet truoc so frame se duoc sample
+                total_samples = (sampler.total_frames // sampler.frame_skip
+                                 - (start_frame - 1) // sampler.frame_skip)
+                if sampler.stride_controller or phase_detection.scan_mode == self.SCAN_COARSE_TO_FINE:
+                    total_samples = None
+                job.start(phase_detection.id, total_samples)
+            
+            # video dai thi chia thanh nhieu segment, moi segment chay trong mot process rieng
+            segment_workers = detection.segment_workers or Config.DETECTION_SEGMENT_WORKERS
+            # video da chay truoc do: doc frame da sample tu cache, khong decode lai
+            cache_key = self._frame_cache_key(phase_detection, yolo_model, sampler)
+            cached_frames = self.frame_cache.open(*cache_key) if cache_key else None
+            if phase_detection.scan_mode == self.SCAN_COARSE_TO_FINE:
+                self._process_coarse_to_fine(cap, sampler, yolo_model, phase_detection, job, raw_detections)
+            elif cached_frames is not None:
+                self._process_frames(
+                    cached_frames.iter_from(start_frame), yolo_model, phase_detection, job,
+                    frame_scale=cached_frames.scale, read_frame=sampler.read_frame, raw_detections=raw_detections
+                )
+            elif segment_workers > 1 and sampler.total_frames > 0 and start_frame == 1:
+                model_path = self.model_service.get_model_path(model_info)
+                self._process_segments(sampler, model_path, phase_detection, segment_workers, job, raw_detections)
+            else:
+                # chay ca video lan dau thi vua sample vua ghi cache cho cac lan sau
+                writer = None
+                if cache_key and start_frame == 1:
+                    writer = self.frame_cache.writer(*cache_key, sampler.total_frames // sampler.frame_skip)
+                try:
+                    self._process_frames(
+                        writer.wrap(sampler) if writer else sampler, yolo_model, phase_detection, job,
+                        raw_detections=raw_detections
+                    )
+                finally:
+                    if writer:
+                        writer.close()
+        finally:
+            cap.release()
+            cv2.destroyAllWindows()
+            # luu ca khi dung giua chung / loi: chay tiep job se cat bo phan sau checkpoint
+            if raw_detections is not None:
+                raw_detections.save(self.file_storage_service.get_raw_detections_path(phase_detection.id))
         
       
-        return self.phase_detection
+        return phase_detection
     
-    def _process_frames(self, cap, yolo_model):
-        frame_count = 0
-        previous_bounding_boxes = []
+    def process_video_models(self, detection, model_ids):
+        """Run several models over one decode of the video.
+
+        Every sampled frame goes to each model, so the video is decoded once however many
+        models are compared. Returns (one PhaseDetection per model, agreement summary).
+        Frames are sampled every frame_skip frames; adaptive stride, coarse_to_fine and
+        segments pick frames per model, so they are not used here. Raw detections are
+        recorded per model, so each PhaseDetection can be re-thresholded on its own.
+        """
+        models = [self.model_service.load_model(model_id) for model_id in model_ids]
         
-        while True:
-          
-            ret, frame = cap.read()
-            if not ret:
-                break 
-            
-            frame_count += 1
-            
-            
-            if frame_count % self.phase_detection.frame_skip != 0:
-                continue
-            
-           #thuc hien lay result frame detect yolo model 
-            results = yolo_model(frame, conf=self.phase_detection.confidence_threshold)
+        cap = cv2.VideoCapture(detection.videoUrl)
+        if not cap.isOpened():
+            raise ValueError(f"Cannot open video: {detection.videoUrl}")
+        try:
+            phase_detections = []
+            for model_data in models:
+                phase_detection = copy.copy(detection)
+                phase_detection.id = None
+                phase_detection.model = model_data['info']
+                phase_detection.result = []
+                phase_detections.append(self.phase_detection_service.create(phase_detection))
             
-          
-          # thuc hien kiem tra va lay ra cac bouding box 
-            bounding_boxes, is_similar = self._process_detection_results(
-                results, 
-                yolo_model, 
-                previous_bounding_boxes, 
-                self.phase_detection.similarity_threshold
+            agreement = ModelAgreement(len(models))
+            yolo_models = [model_data['model'] for model_data in models]
+            raw_detections = [
+                self._open_raw_detections(phase_detection, yolo_model)
+                for phase_detection, yolo_model in zip(phase_detections, yolo_models)
+            ]
+            sampler = FrameSampler(cap, detection.frame_skip)
+            pipeline = StagePipeline(
+                sampler,
+                [
+                    lambda items: self._multi_inference_stage(
+                        items, yolo_models, phase_detections, agreement, raw_detections
+                    ),
+                    lambda items: self._multi_persistence_stage(items, phase_detections)
+                ],
+                queue_size=Config.DETECTION_QUEUE_SIZE,
+                name='multi-model-detection'
             )
-            if is_similar or not bounding_boxes:
-                continue
-            self._save_frame_detections(frame, bounding_boxes, frame_count)
-            
-            previous_bounding_boxes = bounding_boxes
+            try:
+                pipeline.run()
+            finally:
+                for phase_detection, model_raw_detections in zip(phase_detections, raw_detections):
+                    if model_raw_detections is not None:
+                        model_raw_detections.save(self.file_storage_service.get_raw_detections_path(phase_detection.id))
+        finally:
+            cap.release()
+        
+        summary = agreement.summary(list(model_ids))
+        for model_summary, phase_detection in zip(summary['models'], phase_detections):
+            model_summary['phaseDetectionId'] = phase_detection.id
+            model_summary['flaggedFrames'] = len(phase_detection.result)
+        return phase_detections, summary
     
-    def _process_detection_results(self, results, yolo_model, previous_bounding_boxes, similarity_threshold):
-        current_raw_detections = []
-        bounding_boxes = []
+    def rethreshold(self, phase_detection_id, confidence_threshold=None, similarity_threshold=None, save=False):
+        """Re-derive the flagged frames of a PhaseDetection for other thresholds from its stored
+        RawDetections, without running the model. Thresholds left out keep the detection's values.
 
-        #thuc hien get ra cac bounding box tu ket qua cua model va check similarity
-        # doi voi mot lan detect voi mot frame, se co mot list bounding box 
-        # thuc hien trich rut cac list bounding box tu ket qua cuar model 
-        if results[0].boxes is not None:
-            for box in results[0].boxes:
-                if not hasattr(box, 'xyxy'):
-                    continue
-                    
-                class_id = int(box.cls[0])
-                class_name = yolo_model.names[class_id]
-                confidence = float(box.conf[0])
-                bbox = box.xyxy[0].tolist()
-                
-             
-                if class_name.lower() == "normal":
-                    continue
-                
-               
-                current_raw_detections.append({
-                    'class_id': class_id,
-                    'confidence': confidence,
-                    'bbox': bbox
-                })
-                
+        Returns (summary, [(frame_number, FrameDetection)]). With `save` the frames are read
+        back from the video and stored as a new PhaseDetection, returned in summary['detection'].
+        Stream detections have no raw detections (the stream can't be read again), a
+        RuntimeError says so.
+        """
+        phase_detection = self.phase_detection_service.get_by_id(phase_detection_id)
+        path = self.file_storage_service.get_raw_detections_path(phase_detection_id)
+        if not os.path.exists(path):
+            if self.file_storage_service.is_stream_source(phase_detection.videoUrl):
+                raise RuntimeError(
+                    f"Detection {phase_detection_id} was run on a stream, raw detections are only "
+                    f"recorded for uploaded videos so it can't be re-thresholded"
+                )
+            raise ValueError(f"No raw detections stored for detection {phase_detection_id}")
+        
+        start = time.perf_counter()
+        raw_detections = RawDetections.load(path)
+        if confidence_threshold is None:
+            confidence_threshold = phase_detection.confidence_threshold
+        if confidence_threshold is None:
+            confidence_threshold = DEFAULT_CONFIDENCE_THRESHOLD
+        if similarity_threshold is None:
+            similarity_threshold = phase_detection.similarity_threshold
+        if similarity_threshold is None:
+            raise RuntimeError(f"Detection {phase_detection_id} has no similarity_threshold, pass one")
+        flagged = raw_detections.derive(confidence_threshold, similarity_threshold)
+        
+        # moi class chi hoi fraud label service mot lan
+        fraud_labels = {}
+        frames = []
+        for frame_number, detections in flagged:
+            frame_detection = FrameDetection()
+            frame_detection.detection = phase_detection
+            frame_detection.listBoundingBoxDetection = self._build_bounding_boxes(detections, fraud_labels)
+            frames.append((frame_number, frame_detection))
+        
+        summary = {
+            'detectionId': phase_detection_id,
+            'confidence_threshold': confidence_threshold,
+            'similarity_threshold': similarity_threshold,
+            'confidenceFloor': raw_detections.confidence_floor,
+            'framesEvaluated': len(raw_detections),
+            'framesFlagged': len(frames),
+            'elapsedMs': round((time.perf_counter() - start) * 1000, 2)
+        }
+        if save:
+            new_detection = self._save_rethreshold(
+                phase_detection, raw_detections, frames, confidence_threshold, similarity_threshold
+            )
+            summary['detection'] = new_detection.to_dict()
+        return summary, frames
+    
+    def _save_rethreshold(self, phase_detection, raw_detections, frames, confidence_threshold, similarity_threshold):
+        cap = cv2.VideoCapture(phase_detection.videoUrl)
+        if not cap.isOpened():
+            raise ValueError(f"Cannot open video: {phase_detection.videoUrl}")
+        try:
+            new_detection = copy.copy(phase_detection)
+            new_detection.id = None
+            new_detection.result = []
+            new_detection.timeDetect = datetime.now()
+            new_detection.confidence_threshold = confidence_threshold
+            new_detection.similarity_threshold = similarity_threshold
+            new_detection = self.phase_detection_service.create(new_detection)
             
-                fraud_label = None
-                try:
-                    fraud_label = self.fraud_label_service.get_by_class_id(class_id)
-                except Exception as e:
-                    pass
-                
-               
-                bbox_obj = BoundingBoxDetection()
-                bbox_obj.fraudLabel = fraud_label
-                bbox_obj.confidence = confidence
-                
-              
-                x1, y1, x2, y2 = bbox
-                bbox_obj.xCenter = x1
-                bbox_obj.yCenter = y1
-                bbox_obj.width = x2 - x1
-                bbox_obj.height = y2 - y1
-                
-                bounding_boxes.append(bbox_obj)
+            # box da co, chi doc lai cac frame can luu anh
+            sampler = FrameSampler(cap, phase_detection.frame_skip)
+            for frame_number, frame_detection in frames:
+                frame = sampler.read_frame(frame_number)
+                if frame is None:
+                    raise ValueError(f"Cannot read frame {frame_number} from video: {phase_detection.videoUrl}")
+                self._save_frame_detections(
+                    new_detection, frame, frame_detection.listBoundingBoxDetection, frame_number
+                )
+        finally:
+            cap.release()
+        # detection moi cung doi nguong duoc tiep
+        raw_detections.save(self.file_storage_service.get_raw_detections_path(new_detection.id))
+        return new_detection
+    
+    def process_stream(self, detection, job=None):
+        """Process a stream URL, named pipe or still-growing file as frames arrive.
+
+        FrameDetections are saved as soon as a frame is flagged and are not kept on
+        phase_detection.result, so memory does not grow with the length of the stream.
+        Raw detections are not recorded for the same reason, see rethreshold.
+        """
+        model_data = self.model_service.load_model(detection.model.id)
+        yolo_model = model_data['model']
         
-      
-        # thuc hien kiem tra xem hai list bounding box co giong nhau hay khong
-        is_similar = self._are_detections_similar(
-            previous_bounding_boxes, 
-            current_raw_detections, 
-            bounding_boxes,
-            similarity_threshold
+        phase_detection = self.phase_detection_service.create(detection)
+        frames = StreamFrameSource(
+            detection.videoUrl,
+            phase_detection.frame_skip,
+            should_stop=(lambda: job.stop_requested) if job else None
         )
+        frames.stride_controller = self._create_adaptive_stride(phase_detection, None)
+        if job:
+            # stream khong biet truoc so frame
+            job.start(phase_detection.id, None)
         
-        return bounding_boxes, is_similar
+        self._process_frames(frames, yolo_model, phase_detection, job, keep_results=False)
+        if frames.frames_dropped:
+            print(f"Stream {detection.videoUrl}: dropped {frames.frames_dropped} frames because processing fell behind")
+        return phase_detection
     
-    def _are_detections_similar(self, prev_bounding_boxes, curr_raw_detections, curr_bounding_boxes, threshold):
-
-        # kiem tra xem so luong bounding box co giong nhau khong
-        if len(prev_bounding_boxes) != len(curr_bounding_boxes) or not prev_bounding_boxes:
-            return len(prev_bounding_boxes) == len(curr_bounding_boxes) == 0
+    def iter_detection_events(self, detection):
+        """Run process_video on a background thread and yield (event, data) while it runs:
+        'frame' for every FrameDetection as soon as it is saved, 'progress' every few seconds
+        in between, and a final 'summary' (or 'error'). Closing the generator stops processing.
+        """
+        job = DetectionJob(videoUrl=detection.videoUrl)
+        events = queue.Queue()
+        flagged = [0]
         
-       
-       # thuc hien sap xep lai previouse_bounding boxes 
-        prev_sorted = sorted(prev_bounding_boxes, 
-                             key=lambda x: (x.fraudLabel.id if x.fraudLabel else -1, -x.confidence))
-        curr_raw_sorted = sorted(curr_raw_detections, 
-                              key=lambda x: (x['class_id'], -x['confidence']))
+        def on_frame_saved(frame_number, frame_detection):
+            flagged[0] += 1
+            data = frame_detection.to_dict()
+            data['frameNumber'] = frame_number
+            events.put(('frame', data))
+        job.frame_listeners.append(on_frame_saved)
         
+        def run():
+            try:
+                self.process_video(detection, job=job)
+                job.finish()
+                events.put(('summary', self._build_event_summary(job, flagged[0])))
+            except Exception as e:
+                job.finish(e)
+                events.put(('error', dict(self._build_event_summary(job, flagged[0]), error=str(e))))
         
-
-        # so sanh theo tung bounding box doi tuong, neu class id khac thi khong giong, hoac la confidence chenh lech nhau khong qua 1-threshold 
-        for p, c in zip(prev_sorted, curr_raw_sorted):
-            p_class_id = p.fraudLabel.id if p.fraudLabel else -1
-            c_class_id = c['class_id']
+        threading.Thread(target=run, name='detection-events', daemon=True).start()
+        try:
+            while True:
+                try:
+                    event, data = events.get(timeout=Config.DETECTION_JOB_PROGRESS_INTERVAL)
+                except queue.Empty:
+                    # giu ket noi va bao tien do khi chua co frame moi
+                    yield 'progress', self._build_event_summary(job, flagged[0])
+                    continue
+                yield event, data
+                if event != 'frame':
+                    return
+        finally:
+            # client ngat ket noi giua chung thi dung xu ly, cac frame da luu van duoc giu
+            job.request_stop()
+    
+    def _build_event_summary(self, job, frames_flagged):
+        fps = job.fps
+        return {
+            'phaseDetectionId': job.phaseDetectionId,
+            'status': job.status,
+            'totalFrames': job.totalFrames,
+            'framesProcessed': job.framesProcessed,
+            'framesGated': job.framesGated,
+            'framesFlagged': frames_flagged,
+            'lastFrame': job.lastFrame,
+            'fps': round(fps, 2) if fps is not None else None
+        }
+    
+    def _process_frames(self, frames, yolo_model, phase_detection, job=None, keep_results=True,
+                        frame_scale=1.0, read_frame=None, raw_detections=None):
+        """`frame_scale` is the size of the given frames relative to the video (frames from the
+        FrameCache), `read_frame` then returns the full-size frame to save for a frame number.
+        The unfiltered detections of every inferred frame are added to `raw_detections` if given"""
+        # decode -> inference -> luu ket qua chay tren cac thread rieng, noi voi nhau bang queue co gioi han
+        pipeline = StagePipeline(
+            frames,
+            [
+                lambda items: self._inference_stage(
+                    items, yolo_model, phase_detection, job, getattr(frames, 'stride_controller', None),
+                    frame_scale, raw_detections
+                ),
+                lambda items: self._persistence_stage(items, phase_detection, job, keep_results, read_frame)
+            ],
+            queue_size=Config.DETECTION_QUEUE_SIZE,
+            name='video-detection'
+        )
+        pipeline.run()
+    
+    def _process_coarse_to_fine(self, cap, sampler, yolo_model, phase_detection, job=None, raw_detections=None):
+        """Two-pass scan: seek through the video at a coarse time interval, then scan densely
+        (every frame_skip-th frame) only inside windows around coarse frames with fraud"""
+        fps = sampler.fps or Config.DEFAULT_VIDEO_FPS
+        coarse_interval = phase_detection.coarse_interval or Config.COARSE_SCAN_INTERVAL_SECONDS
+        refine_window = phase_detection.refine_window or Config.COARSE_SCAN_WINDOW_SECONDS
+        
+        # pass 1: chi seek toi tung frame cach nhau coarse_interval giay, khong decode tuan tu
+        coarse_sampler = FrameSampler(cap, max(1, int(round(coarse_interval * fps))), strategy=FrameSampler.SEEK)
+        hit_frames = self._coarse_scan(coarse_sampler, yolo_model, phase_detection, job)
+        if job and job.stop_requested:
+            return
+        windows = self._merge_windows(hit_frames, int(round(refine_window * fps)), sampler.total_frames)
+        print(f"Coarse scan found {len(hit_frames)} frames with fraud, refining {len(windows)} windows")
+        
+        # pass 2: scan day trong cac cua so, frame lay tren cung luoi frame_skip voi scan day ca video
+        # va trang thai dedup duoc giu qua cac cua so nen ket qua giong scan day trong cac cua so do
+        frames = self._iter_windows(cap, phase_detection.frame_skip, windows)
+        self._process_frames(frames, yolo_model, phase_detection, job, raw_detections=raw_detections)
+    
+    def _coarse_scan(self, coarse_sampler, yolo_model, phase_detection, job=None):
+        """Frame numbers of the coarse frames with fraud; stops early when the job is asked to stop"""
+        fraud_class_mask = build_fraud_class_mask(yolo_model.names)
+        batch_size = phase_detection.batch_size or Config.DETECTION_BATCH_SIZE
+        roi = self._create_roi(phase_detection)
+        letterbox = Letterbox.for_model(yolo_model, phase_detection.imgsz)
+        hit_frames = []
+        batch = []
+        
+        for frame_number, frame in coarse_sampler:
+            if job and job.stop_requested:
+                return hit_frames
+            batch.append((frame_number, frame))
+            if len(batch) < batch_size:
+                continue
+            hit_frames.extend(self._find_fraud_frames(
+                batch, yolo_model, fraud_class_mask, phase_detection, roi, letterbox
+            ))
+            if job:
+                # frame cua pass 1 cung tinh vao tien do, video dai thi pass 1 chay lau
+                job.record_progress(len(batch), batch[-1][0])
+            batch = []
+        
+        if batch:
+            hit_frames.extend(self._find_fraud_frames(
+                batch, yolo_model, fraud_class_mask, phase_detection, roi, letterbox
+            ))
+            if job:
+                job.record_progress(len(batch), batch[-1][0])
+        return hit_frames
+    
+    def _find_fraud_frames(self, batch, yolo_model, fraud_class_mask, phase_detection, roi=None, letterbox=None):
+        detections = detect_frames(
+            yolo_model, [frame for _, frame in batch], phase_detection.confidence_threshold,
+            fraud_class_mask, roi, letterbox
+        )
+        return [
+            frame_number
+            for (frame_number, _), frame_detections in zip(batch, detections)
+            if len(frame_detections.class_ids)
+        ]
+    
+    def _merge_windows(self, hit_frames, window, total_frames):
+        """Turn fraud frame numbers into sorted, non-overlapping (start, end) frame ranges of +/- window"""
+        windows = []
+        for frame_number in sorted(hit_frames):
+            start = max(1, frame_number - window)
+            end = frame_number + window
+            if total_frames:
+                end = min(end, total_frames)
+            if windows and start <= windows[-1][1] + 1:
+                windows[-1] = (windows[-1][0], max(windows[-1][1], end))
+            else:
+                windows.append((start, end))
+        return windows
+    
+    def _iter_windows(self, cap, frame_skip, windows):
+        for start, end in windows:
+            yield from FrameSampler(cap, frame_skip, start_frame=start, end_frame=end)
+    
+    def _process_segments(self, sampler, model_path, phase_detection, workers, job=None, raw_detections=None):
+        previous_detections = empty_detections()
+        segment_detections = self.segment_detection_service.detect(
+            phase_detection.videoUrl, model_path, phase_detection, sampler.total_frames, workers, job,
+            sampler.stride_controller, raw_detections
+        )
+        
+        for frame_number, detections in segment_detections:
+            if job and job.stop_requested:
+                break
+            # dedup chay tuan tu tren ket qua da gop theo thu tu frame, nen dung ca o ranh gioi giua hai segment
+            bounding_boxes = self._evaluate_detections(
+                detections, previous_detections, phase_detection.similarity_threshold
+            )
+            if not bounding_boxes:
+                continue
             
-           
-            if p_class_id != c_class_id or abs(p.confidence - c['confidence']) > (1 - threshold):
-                return False
+            # worker chi tra ve box, doc lai frame can luu tu video
+            frame = sampler.read_frame(frame_number)
+            if frame is None:
+                raise ValueError(f"Cannot read frame {frame_number} from video: {phase_detection.videoUrl}")
+            frame_detection = self._save_frame_detections(phase_detection, frame, bounding_boxes, frame_number)
+            previous_detections = detections
+            if job:
+                job.record_frame_saved(frame_number, frame_detection)
+                # dedup chi phu thuoc frame da luu cuoi cung nen checkpoint tai day la du
+                checkpoint = self._build_checkpoint(frame_number, previous_detections)
+                job.record_checkpoint(checkpoint.frame_number, checkpoint.state, flush=True)
+    
+    def _inference_stage(self, frames, yolo_model, phase_detection, job=None, stride_controller=None,
+                         frame_scale=1.0, raw_detections=None):
+        """Batch sampled frames, run the model and yield (frame_number, frame, bounding_boxes, checkpoint)
+        to be saved, followed by a _Checkpoint after every batch when running as a job"""
+        previous_detections = empty_detections()
+        if job and job.checkpointState:
+            # chay tiep tu checkpoint: dedup so voi frame da luu cuoi cung truoc khi dung
+            previous_detections = detections_from_dict(job.checkpointState.get('previous_detections'))
+            if stride_controller and job.checkpointState.get('stride'):
+                stride_controller.set_state(job.checkpointState['stride'])
+        # tinh san mask cac class can giu lai (bo "normal") mot lan cho ca video
+        fraud_class_mask = build_fraud_class_mask(yolo_model.names)
+        batch_size = phase_detection.batch_size or Config.DETECTION_BATCH_SIZE
+        motion_gate = self._create_motion_gate(phase_detection)
+        roi = self._create_roi(phase_detection)
+        # anh dua vao model duoc resize san vao buffer dung lai cho moi batch
+        letterbox = Letterbox.for_model(yolo_model, phase_detection.imgsz)
+        batch = []
+        
+        for frame_number, frame in frames:
+            if job and job.stop_requested:
+                break
             
-           
-           # so sanh bang tham so iou. tham so iou duoc tinh bang insertion / union
-            if hasattr(p, 'xCenter') and c['bbox']:
-                p_box = [p.xCenter, p.yCenter, p.xCenter + p.width, p.yCenter + p.height]
-                if self._calculate_iou(p_box, c['bbox']) < threshold:
-                    return False
+            # frame gan nhu khong doi so voi frame inference gan nhat thi dung lai ket qua cu:
+            # ket qua do giong frame truoc nen chac chan bi dedup, bo qua luon khong can goi model
+            # chi so sanh phan anh trong roi, chuyen dong ngoai roi khong anh huong
+            if motion_gate and not motion_gate.should_infer(roi.crop(frame) if roi else frame):
+                if job:
+                    job.record_gated(1, frame_number)
+                continue
+            
+            # gom cac frame duoc sample thanh mot batch roi moi goi model
+            batch.append((frame_number, frame))
+            if len(batch) < batch_size:
+                continue
+            
+            flagged_frames, previous_detections = self._process_batch(
+                batch, yolo_model, fraud_class_mask, phase_detection, previous_detections, stride_controller,
+                roi, letterbox, frame_scale, raw_detections
+            )
+            yield from flagged_frames
+            if job:
+                job.record_progress(len(batch), batch[-1][0])
+                yield self._build_checkpoint(batch[-1][0], previous_detections, stride_controller)
+            batch = []
         
-        return True
+        # xu ly not cac frame con lai chua du mot batch
+        if batch:
+            flagged_frames, previous_detections = self._process_batch(
+                batch, yolo_model, fraud_class_mask, phase_detection, previous_detections, stride_controller,
+                roi, letterbox, frame_scale, raw_detections
+            )
+            yield from flagged_frames
+            if job:
+                job.record_progress(len(batch), batch[-1][0])
+                yield self._build_checkpoint(batch[-1][0], previous_detections, stride_controller)
     
-    def _calculate_iou(self, box1, box2):
-       
-        # Extract coordinates
-        x1, y1, x2, y2 = box1
-        x1_2, y1_2, x2_2, y2_2 = box2
+    def _build_checkpoint(self, frame_number, previous_detections, stride_controller=None):
+        return _Checkpoint(frame_number, {
+            'previous_detections': detections_to_dict(previous_detections),
+            'stride': stride_controller.get_state() if stride_controller else None
+        })
+    
+    def _open_raw_detections(self, phase_detection, yolo_model, start_frame=1):
+        """RawDetections to record this run in, None when Config.SAVE_RAW_DETECTIONS is off"""
+        if not Config.SAVE_RAW_DETECTIONS:
+            return None
+        if start_frame == 1:
+            return RawDetections(yolo_model.names, Config.RAW_DETECTION_CONFIDENCE)
+        # chay tiep job: giu cac frame truoc checkpoint cua lan chay truoc
+        path = self.file_storage_service.get_raw_detections_path(phase_detection.id)
+        if not os.path.exists(path):
+            return None
+        raw_detections = RawDetections.load(path)
+        raw_detections.truncate(start_frame - 1)
+        return raw_detections
+    
+    def _frame_cache_key(self, phase_detection, yolo_model, sampler):
+        """(video hash, frame_skip, imgsz) of the FrameCache entry for this run, or None when the
+        cache does not apply: adaptive stride and coarse_to_fine sample off the frame_skip grid,
+        and an roi crop is resized to imgsz on its own so it needs the full-size frame"""
+        if (not self.frame_cache.enabled or sampler.stride_controller or phase_detection.roi
+                or phase_detection.scan_mode == self.SCAN_COARSE_TO_FINE or sampler.total_frames <= 0):
+            return None
+        imgsz = Letterbox.for_model(yolo_model, phase_detection.imgsz).imgsz
+        return FrameCache.video_hash(phase_detection.videoUrl), sampler.frame_skip, imgsz
+    
+    def _create_adaptive_stride(self, phase_detection, fps):
+        """AdaptiveStride when the request sets min_frame_skip < max_frame_skip, otherwise None (fixed frame_skip)"""
+        min_frame_skip = phase_detection.min_frame_skip
+        max_frame_skip = phase_detection.max_frame_skip
+        if not min_frame_skip or not max_frame_skip or max_frame_skip <= min_frame_skip:
+            return None
+        quiet_frames = Config.ADAPTIVE_QUIET_SECONDS * (fps or Config.DEFAULT_VIDEO_FPS)
+        return AdaptiveStride(min_frame_skip, max_frame_skip, quiet_frames)
+    
+    def _create_roi(self, phase_detection):
+        return RegionOfInterest(phase_detection.roi) if phase_detection.roi else None
+    
+    def _create_motion_gate(self, phase_detection):
+        motion_threshold = phase_detection.motion_threshold
+        if motion_threshold is None:
+            motion_threshold = Config.MOTION_GATE_THRESHOLD
+        return MotionGate(motion_threshold) if motion_threshold > 0 else None
+    
+    def _multi_inference_stage(self, frames, yolo_models, phase_detections, agreement, raw_detections=None):
+        """Like _inference_stage for several models: each batch goes to every model, yields
+        (model index, frame_number, frame, bounding_boxes) for the frames each model keeps.
+        `raw_detections` holds one RawDetections (or None) per model"""
+        # motion gate va roi dung chung, dedup va letterbox rieng cho tung model
+        detection = phase_detections[0]
+        batch_size = detection.batch_size or Config.DETECTION_BATCH_SIZE
+        motion_gate = self._create_motion_gate(detection)
+        roi = self._create_roi(detection)
+        states = [
+            {
+                'fraud_class_mask': build_fraud_class_mask(yolo_model.names),
+                'letterbox': Letterbox.for_model(yolo_model, detection.imgsz),
+                'previous_detections': empty_detections(),
+                'raw_detections': raw_detections[index] if raw_detections else None
+            }
+            for index, yolo_model in enumerate(yolo_models)
+        ]
+        batch = []
         
-        # Calculate intersection coordinates
-        xi1, yi1 = max(x1, x1_2), max(y1, y1_2)
-        xi2, yi2 = min(x2, x2_2), min(y2, y2_2)
+        for frame_number, frame in frames:
+            if motion_gate and not motion_gate.should_infer(roi.crop(frame) if roi else frame):
+                continue
+            batch.append((frame_number, frame))
+            if len(batch) < batch_size:
+                continue
+            yield from self._process_multi_batch(batch, yolo_models, phase_detections, states, agreement, roi)
+            batch = []
         
-        # No intersection
-        if xi2 < xi1 or yi2 < yi1:
-            return 0.0
+        if batch:
+            yield from self._process_multi_batch(batch, yolo_models, phase_detections, states, agreement, roi)
+    
+    def _process_multi_batch(self, batch, yolo_models, phase_detections, states, agreement, roi=None):
+        images = [frame for _, frame in batch]
+        model_detections = []
+        for index, (yolo_model, state) in enumerate(zip(yolo_models, states)):
+            confidence_threshold = phase_detections[index].confidence_threshold
+            raw_detections = state['raw_detections']
+            start = time.perf_counter()
+            if raw_detections is None:
+                batch_detections = detect_frames(
+                    yolo_model, images, confidence_threshold, state['fraud_class_mask'], roi, state['letterbox']
+                )
+            else:
+                # giong _process_batch: chay o nguong thap, ghi lai roi moi loc theo class / confidence
+                if confidence_threshold is None:
+                    confidence_threshold = DEFAULT_CONFIDENCE_THRESHOLD
+                batch_detections = detect_frames_raw(
+                    yolo_model, images, min(confidence_threshold, raw_detections.confidence_floor),
+                    roi, state['letterbox']
+                )
+                for (frame_number, _), detections in zip(batch, batch_detections):
+                    raw_detections.add(frame_number, detections)
+                batch_detections = [
+                    filter_detections(detections, state['fraud_class_mask'], confidence_threshold)
+                    for detections in batch_detections
+                ]
+            agreement.record_time(index, time.perf_counter() - start)
+            model_detections.append(batch_detections)
         
-        # Calculate areas
-        intersection = (xi2 - xi1) * (yi2 - yi1)
-        box1_area = (x2 - x1) * (y2 - y1)
-        box2_area = (x2_2 - x1_2) * (y2_2 - y1_2)
-        union = box1_area + box2_area - intersection
+        flagged_frames = []
+        for position, (frame_number, frame) in enumerate(batch):
+            frame_detections = [detections[position] for detections in model_detections]
+            agreement.observe(frame_detections)
+            for index, detections in enumerate(frame_detections):
+                bounding_boxes = self._evaluate_detections(
+                    detections, states[index]['previous_detections'], phase_detections[index].similarity_threshold
+                )
+                if not bounding_boxes:
+                    continue
+                states[index]['previous_detections'] = detections
+                flagged_frames.append((index, frame_number, frame, bounding_boxes))
+        return flagged_frames
+    
+    def _multi_persistence_stage(self, flagged_frames, phase_detections):
+        # frame duoc nhieu model danh dau chi luu anh mot lan, cac frame den theo thu tu nen chi can nho frame cuoi
+        saved_frame = (None, None)
+        for index, frame_number, frame, bounding_boxes in flagged_frames:
+            image_url = saved_frame[1] if saved_frame[0] == frame_number else None
+            frame_detection = self._save_frame_detections(
+                phase_detections[index], frame, bounding_boxes, frame_number, image_url=image_url
+            )
+            saved_frame = (frame_number, frame_detection.imageUrl)
+            yield frame_number
+    
+    def _persistence_stage(self, flagged_frames, phase_detection, job=None, keep_results=True, read_frame=None):
+        for item in flagged_frames:
+            if isinstance(item, _Checkpoint):
+                # queue giu dung thu tu nen moi frame truoc checkpoint da duoc luu xong,
+                # checkpoint nay chi ghi xuong database theo chu ky
+                job.record_checkpoint(item.frame_number, item.state)
+                continue
+            
+            frame_number, frame, bounding_boxes, checkpoint = item
+            if read_frame:
+                # frame tu cache da bi thu nho, anh luu lai lay dung do phan giai cua video
+                frame = read_frame(frame_number)
+                if frame is None:
+                    raise ValueError(f"Cannot read frame {frame_number} from video: {phase_detection.videoUrl}")
+            frame_detection = self._save_frame_detections(
+                phase_detection, frame, bounding_boxes, frame_number, keep_results
+            )
+            if job:
+                job.record_frame_saved(frame_number, frame_detection)
+                # vua luu frame thi ghi checkpoint ngay, resume se khong luu trung frame nay
+                job.record_checkpoint(checkpoint.frame_number, checkpoint.state, flush=True)
+            yield frame_number
+    
+    def _process_batch(self, batch, yolo_model, fraud_class_mask, phase_detection, previous_detections,
+                       stride_controller=None, roi=None, letterbox=None, frame_scale=1.0, raw_detections=None):
+        """Run one inference call over a batch of (frame_number, frame) and handle results in frame order.
+        Returns ([(frame_number, frame, bounding_boxes, checkpoint)] to save, previous_detections)"""
+        #thuc hien lay result frame detect yolo model cho ca batch, ket qua tra ve theo dung thu tu frame
+        # co roi thi model chi nhan phan anh trong roi, box tra ve da o toa do frame day du
+        images = [frame for _, frame in batch]
+        confidence_threshold = phase_detection.confidence_threshold
+        if raw_detections is None:
+            batch_detections = detect_frames(
+                yolo_model, images, confidence_threshold, fraud_class_mask, roi, letterbox
+            )
+        else:
+            # model chay o nguong thap voi moi class, NMS chi de box co confidence cao hon loai box khac
+            # nen loc lai theo class / confidence_threshold cho ra dung cac box nhu khi chay o nguong do
+            if confidence_threshold is None:
+                confidence_threshold = DEFAULT_CONFIDENCE_THRESHOLD
+            batch_detections = detect_frames_raw(
+                yolo_model, images, min(confidence_threshold, raw_detections.confidence_floor), roi, letterbox
+            )
+        if frame_scale != 1.0:
+            # frame tu cache da bi thu nho, dua box ve toa do cua video
+            batch_detections = [scale_detections(detections, 1.0 / frame_scale) for detections in batch_detections]
+        if raw_detections is not None:
+            for (frame_number, _), detections in zip(batch, batch_detections):
+                raw_detections.add(frame_number, detections)
+            batch_detections = [
+                filter_detections(detections, fraud_class_mask, confidence_threshold)
+                for detections in batch_detections
+            ]
+        
+        flagged_frames = []
+        for (frame_number, frame), detections in zip(batch, batch_detections):
+            if stride_controller:
+                # co box gian lan (ke ca frame trung lap) thi sample day hon
+                stride_controller.observe(frame_number, len(detections.class_ids) > 0)
+            bounding_boxes = self._evaluate_detections(
+                detections, previous_detections, phase_detection.similarity_threshold
+            )
+            if not bounding_boxes:
+                continue
+            previous_detections = detections
+            # checkpoint ngay sau frame nay: dedup tiep theo chi so voi frame nay
+            checkpoint = self._build_checkpoint(frame_number, previous_detections, stride_controller)
+            flagged_frames.append((frame_number, frame, bounding_boxes, checkpoint))
+        
+        return flagged_frames, previous_detections
+    
+    def _evaluate_detections(self, detections, previous_detections, similarity_threshold):
+        """Return the BoundingBoxDetection list to save for a frame, or None if it has no fraud box
+        or is similar to the previous saved frame"""
+        if not len(detections.class_ids):
+            return None
+      
+        # thuc hien kiem tra xem hai list bounding box co giong nhau hay khong
+        # ghep cap box cung class theo IoU lon nhat nen khong phu thuoc thu tu box giua hai frame
+        if detections_similar(previous_detections, detections, similarity_threshold):
+            return None
         
-        # Return IoU
-        return intersection / union if union > 0 else 0.0
+        # chi tao object (va goi fraud label service) cho cac box cua frame se duoc luu
+        return self._build_bounding_boxes(detections)
+    
+    def _build_bounding_boxes(self, detections, fraud_labels=None):
+        """`fraud_labels` (dict class_id -> FraudLabel) caches label lookups across calls"""
+        bounding_boxes = []
+        for (x1, y1, x2, y2), confidence, class_id in zip(
+                detections.xyxy.tolist(), detections.confidence.tolist(), detections.class_ids.tolist()):
+            if fraud_labels is not None and class_id in fraud_labels:
+                fraud_label = fraud_labels[class_id]
+            else:
+                fraud_label = None
+                try:
+                    fraud_label = self.fraud_label_service.get_by_class_id(class_id)
+                except Exception as e:
+                    pass
+                if fraud_labels is not None:
+                    fraud_labels[class_id] = fraud_label
+            
+           
+            bbox_obj = BoundingBoxDetection()
+            bbox_obj.fraudLabel = fraud_label
+            bbox_obj.confidence = confidence
+            
+          
+            bbox_obj.xCenter = x1
+            bbox_obj.yCenter = y1
+            bbox_obj.width = x2 - x1
+            bbox_obj.height = y2 - y1
+            
+            bounding_boxes.append(bbox_obj)
+        return bounding_boxes
     
-    def _save_frame_detections(self, frame, bounding_boxes, frame_number):
+    def _save_frame_detections(self, phase_detection, frame, bounding_boxes, frame_number, keep_result=True,
+                               image_url=None):
        
-     
-        _, image_url = self.file_storage_service.save_flagged_frame(frame, frame_number)
+        # image_url co san: anh frame da duoc luu (vd. boi model khac tren cung frame)
+        if image_url is None:
+            _, image_url = self.file_storage_service.save_flagged_frame(frame, frame_number)
         
       
         frame_detection = FrameDetection()
         frame_detection.imageUrl = image_url
-        frame_detection.detection = self.phase_detection
+        frame_detection.detection = phase_detection
         
         # Save to database
         new_frame_detection = self.frame_detection_service.create(frame_detection)
@@ -216,4 +807,6 @@ class VideoDetectionService:
             new_frame_detection.listBoundingBoxDetection.append(saved_bbox)
         
         # Add to the phase detection's results
-        self.phase_detection.result.append(new_frame_detection)
\ No newline at end of file
+        if keep_result:
+            phase_detection.result.append(new_frame_detection)
+        return new_frame_detection
\ No newline at end of file
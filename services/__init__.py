@@ -9,6 +9,10 @@ from .FileStorageService import FileStorageService
 from .BoundingBoxDetectionService import BoundingBoxDetectionService
 from .FrameDetectionService import FrameDetectionService
 from .PhaseDetectionService import PhaseDetectionService
+from .DetectionJobService import DetectionJobService
+from .ModelQuantizationService import ModelQuantizationService
+from .ModelWarmupService import ModelWarmupService
+from .ModelReloadService import ModelReloadService
 __all__ = [
     'BaseService',
     'ModelService',
@@ -17,5 +21,9 @@ __all__ = [
     'VideoDetectionService',
     'FileStorageService',
     'BoundingBoxDetectionService',
-    'FrameDetectionService'
+    'FrameDetectionService',
+    'DetectionJobService',
+    'ModelQuantizationService',
+    'ModelWarmupService',
+    'ModelReloadService'
 ]
\ No newline at end of file
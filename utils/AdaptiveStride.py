@@ -0,0 +1,32 @@
+class AdaptiveStride:
+    """Sampling stride driven by detection activity.
+
+    Starts sparse at max_stride, drops to min_stride as soon as a sampled frame has a
+    fraud box, and doubles again (up to max_stride) after every `quiet_frames` video
+    frames without one.
+    """
+
+    def __init__(self, min_stride, max_stride, quiet_frames):
+        self.min_stride = max(1, int(min_stride))
+        self.max_stride = max(self.min_stride, int(max_stride))
+        self.quiet_frames = max(1, int(quiet_frames))
+        self.stride = self.max_stride
+        # frame cuoi cung co gian lan (hoac lan noi rong stride gan nhat)
+        self._quiet_since = 0
+
+    def observe(self, frame_number, has_fraud):
+        if has_fraud:
+            self.stride = self.min_stride
+            self._quiet_since = frame_number
+            return
+
+        if self.stride < self.max_stride and frame_number - self._quiet_since >= self.quiet_frames:
+            self.stride = min(self.stride * 2, self.max_stride)
+            self._quiet_since = frame_number
+
+    def get_state(self):
+        return {'stride': self.stride, 'quiet_since': self._quiet_since}
+
+    def set_state(self, state):
+        self.stride = min(max(int(state.get('stride', self.max_stride)), self.min_stride), self.max_stride)
+        self._quiet_since = int(state.get('quiet_since', 0))
@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import cv2
+import numpy as np
+from config.config import Config
+
+
+class CachedFrames:
+    """Sampled frames of one video read back from the cache.
+
+    Iterating yields (frame_number, frame) like FrameSampler, but the frames are read-only
+    views on a memory-mapped array (no decode, no copy) scaled by `scale` from the video.
+    """
+
+    def __init__(self, path, metadata):
+        self.path = path
+        self.scale = metadata['scale']
+        self.frame_skip = metadata['frameSkip']
+        self.frame_numbers = np.load(os.path.join(path, FrameCache.INDEX_FILE))
+        shape = (len(self.frame_numbers), metadata['height'], metadata['width'], metadata['channels'])
+        self.frames = np.memmap(os.path.join(path, FrameCache.FRAMES_FILE), dtype=np.uint8, mode='r', shape=shape)
+
+    def __len__(self):
+        return len(self.frame_numbers)
+
+    def __iter__(self):
+        return self.iter_from(1)
+
+    def iter_from(self, start_frame=1):
+        # bo qua cac frame truoc start_frame (chay tiep job tu checkpoint)
+        start = int(np.searchsorted(self.frame_numbers, start_frame))
+        for index in range(start, len(self.frame_numbers)):
+            yield int(self.frame_numbers[index]), self.frames[index]
+
+
+class FrameCacheWriter:
+    """Fill a cache entry while the video is sampled: `wrap` passes frames through unchanged
+    and stores a resized copy of each. `close` publishes the entry only if the whole video
+    went through, otherwise it is dropped."""
+
+    def __init__(self, cache, path, capacity, frame_skip, imgsz):
+        self.cache = cache
+        self.path = path
+        self.capacity = capacity
+        self.frame_skip = frame_skip
+        self.imgsz = imgsz
+        self.tmp_path = tempfile.mkdtemp(prefix='.tmp-', dir=cache.folder)
+        self.frames = None
+        self.frame_numbers = []
+        self.source_shape = None
+        self.shape = None
+        self.complete = False
+        self.failed = False
+
+    def wrap(self, frames):
+        for frame_number, frame in frames:
+            if not self.failed:
+                self.add(frame_number, frame)
+            yield frame_number, frame
+        self.complete = True
+
+    def add(self, frame_number, frame):
+        if self.frames is None:
+            self._allocate(frame)
+        # video doi do phan giai hoac nhieu frame hon du kien thi khong cache
+        if self.failed or frame.shape != self.source_shape or len(self.frame_numbers) >= self.capacity:
+            self.failed = True
+            return
+        target = self.frames[len(self.frame_numbers)]
+        if self.shape[:2] == self.source_shape[:2]:
+            np.copyto(target, frame.reshape(self.shape))
+        else:
+            # resize thang vao memmap, khong tao anh trung gian
+            resized = target if frame.ndim == 3 else target[:, :, 0]
+            cv2.resize(frame, (self.shape[1], self.shape[0]), dst=resized, interpolation=cv2.INTER_AREA)
+        self.frame_numbers.append(frame_number)
+
+    def _allocate(self, frame):
+        height, width = frame.shape[:2]
+        self.scale = min(1.0, self.imgsz / max(height, width))
+        self.source_shape = frame.shape
+        self.shape = (max(1, int(round(height * self.scale))), max(1, int(round(width * self.scale))),
+                      frame.shape[2] if frame.ndim == 3 else 1)
+        self.frame_bytes = int(np.prod(self.shape))
+        if frame.dtype != np.uint8 or self.capacity * self.frame_bytes > self.cache.max_bytes:
+            self.failed = True
+            return
+        # file thua so voi so frame thuc te duoc cat bot khi publish
+        self.frames = np.memmap(
+            os.path.join(self.tmp_path, FrameCache.FRAMES_FILE), dtype=np.uint8, mode='w+',
+            shape=(self.capacity,) + self.shape
+        )
+
+    def close(self):
+        try:
+            if self.complete and not self.failed and self.frame_numbers:
+                self._publish()
+        finally:
+            self.frames = None
+            shutil.rmtree(self.tmp_path, ignore_errors=True)
+
+    def _publish(self):
+        self.frames.flush()
+        self.frames = None
+        os.truncate(os.path.join(self.tmp_path, FrameCache.FRAMES_FILE), len(self.frame_numbers) * self.frame_bytes)
+        np.save(os.path.join(self.tmp_path, FrameCache.INDEX_FILE), np.asarray(self.frame_numbers, dtype=np.int64))
+        metadata = {
+            'frameSkip': self.frame_skip,
+            'imgsz': self.imgsz,
+            'scale': self.scale,
+            'sourceHeight': self.source_shape[0],
+            'sourceWidth': self.source_shape[1],
+            'height': self.shape[0],
+            'width': self.shape[1],
+            'channels': self.shape[2],
+            'frames': len(self.frame_numbers),
+            'createdAt': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        with open(os.path.join(self.tmp_path, FrameCache.METADATA_FILE), 'w') as f:
+            json.dump(metadata, f)
+        try:
+            os.replace(self.tmp_path, self.path)
+        except OSError:
+            # mot lan chay khac da tao xong cung entry
+            return
+        self.cache.evict(keep=self.path)
+
+
+class FrameCache:
+    """On-disk cache of the sampled frames of a video, keyed by video_hash, frame_skip and imgsz.
+
+    Each entry is a folder with the frames resized so the long side is `imgsz` (never
+    enlarged) in one raw uint8 array opened as a memory map, the frame number of every row
+    and a metadata file with the array shape. The least recently used entries are deleted
+    above Config.FRAME_CACHE_MAX_MB.
+    """
+
+    FRAMES_FILE = 'frames.bin'
+    INDEX_FILE = 'frame_numbers.npy'
+    METADATA_FILE = 'metadata.json'
+    HASH_BLOCK = 1024 * 1024
+    HASH_SAMPLES = 16
+
+    def __init__(self, folder=None, max_mb=None):
+        self.folder = folder or os.path.join(Config.BASE_DIR, Config.FRAME_CACHE_FOLDER)
+        self.max_bytes = int((Config.FRAME_CACHE_MAX_MB if max_mb is None else max_mb) * 1024 ** 2)
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    @classmethod
+    def video_hash(cls, video_path):
+        """Content key of a video file: its size and HASH_SAMPLES blocks of HASH_BLOCK bytes spread
+        evenly over it (first and last block included). Only those blocks are read, however
+        long the video is."""
+        # video upload lai co ten file moi nen key chi theo noi dung, khong theo duong dan / mtime
+        size = os.path.getsize(video_path)
+        digest = hashlib.sha256(str(size).encode())
+        with open(video_path, 'rb') as f:
+            if size <= cls.HASH_BLOCK * cls.HASH_SAMPLES:
+                for chunk in iter(lambda: f.read(cls.HASH_BLOCK), b''):
+                    digest.update(chunk)
+            else:
+                last_block = size - cls.HASH_BLOCK
+                for index in range(cls.HASH_SAMPLES):
+                    f.seek(last_block * index // (cls.HASH_SAMPLES - 1))
+                    digest.update(f.read(cls.HASH_BLOCK))
+        return digest.hexdigest()
+
+    def entry_path(self, video_hash, frame_skip, imgsz):
+        return os.path.join(self.folder, f"{video_hash}_{int(frame_skip)}_{int(imgsz)}")
+
+    def open(self, video_hash, frame_skip, imgsz):
+        """CachedFrames of the entry, or None if the video is not cached"""
+        path = self.entry_path(video_hash, frame_skip, imgsz)
+        metadata_path = os.path.join(path, self.METADATA_FILE)
+        if not os.path.exists(metadata_path):
+            return None
+        try:
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+            frames = CachedFrames(path, metadata)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring broken frame cache {path}: {e}")
+            return None
+        # danh dau vua dung, entry it dung nhat bi xoa truoc
+        os.utime(metadata_path)
+        return frames
+
+    def writer(self, video_hash, frame_skip, imgsz, expected_frames):
+        """FrameCacheWriter for a video of about `expected_frames` sampled frames, None if caching is off"""
+        if not self.enabled or expected_frames <= 0:
+            return None
+        os.makedirs(self.folder, exist_ok=True)
+        # so frame doc tu header video co the lech mot chut so voi thuc te
+        capacity = expected_frames + max(16, expected_frames // 50)
+        return FrameCacheWriter(self, self.entry_path(video_hash, frame_skip, imgsz), capacity, frame_skip, imgsz)
+
+    def evict(self, keep=None):
+        """Delete the least recently used entries until the cache fits the size budget"""
+        entries = []
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            metadata_path = os.path.join(path, self.METADATA_FILE)
+            if name.startswith('.tmp-') or not os.path.exists(metadata_path):
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+            entries.append((os.path.getmtime(metadata_path), path, size))
+
+        total = sum(size for _, _, size in entries)
+        for _, path, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
@@ -0,0 +1,110 @@
+import cv2
+from config.config import Config
+
+
+class FrameSampler:
+    """Yield (frame_number, frame) for every frame_skip-th frame of an opened VideoCapture.
+
+    Frame numbers are 1-based, the first sampled frame is frame number frame_skip
+    (same numbering as the old cap.read() loop). Skipped frames are never decoded to BGR.
+    `start_frame` / `end_frame` restrict sampling to that (inclusive) range of frame numbers.
+    With a `stride_controller` (any object with a `stride` attribute) the distance to the
+    next sampled frame is read from it after every frame instead of using frame_skip.
+    """
+
+    GRAB = 'grab'
+    SEEK = 'seek'
+
+    def __init__(self, cap, frame_skip, strategy=None, start_frame=1, end_frame=None, stride_controller=None):
+        self.cap = cap
+        self.frame_skip = max(1, int(frame_skip or 1))
+        self.start_frame = max(1, int(start_frame or 1))
+        self.end_frame = end_frame
+        self.stride_controller = stride_controller
+        self.total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 0
+        # so frame da doc khoi capture (= so thu tu 1-based cua frame cuoi cung da doc),
+        # capture co the da duoc doc/seek truoc do boi mot sampler khac
+        self.position = max(0, int(round(cap.get(cv2.CAP_PROP_POS_FRAMES) or 0)))
+        self._seekable = True
+        # None = tu chon: seek khi khoang cach toi frame can lay du lon va video biet truoc so frame
+        self.strategy = strategy
+
+    @property
+    def stride(self):
+        if self.stride_controller is not None:
+            return max(1, int(self.stride_controller.stride))
+        return self.frame_skip
+
+    def _first_sample(self):
+        # frame duoc sample dau tien trong khoang, van nam tren luoi boi so cua frame_skip
+        return -(-self.start_frame // self.frame_skip) * self.frame_skip
+
+    def _should_seek(self, gap):
+        if self.strategy == self.SEEK:
+            return gap > 0
+        if self.strategy == self.GRAB:
+            return False
+        # stream (khong biet so frame) thi khong seek duoc
+        return gap >= Config.FRAME_SEEK_MIN_SKIP and self.total_frames > 0
+
+    def __iter__(self):
+        frame_number = self._first_sample()
+        while not self.end_frame or frame_number <= self.end_frame:
+            # bat dau giua video thi luon seek toi frame dau tien, khong grab tu dau;
+            # capture da di qua frame can lay thi phai seek lui
+            gap = frame_number - 1 - self.position
+            if self._should_seek(gap) or gap < 0 or (self.position == 0 and self.start_frame > 1):
+                if not self.seek(frame_number):
+                    return
+
+            # cac frame bi bo qua chi grab (demux/decode toi thieu), khong chuyen sang BGR
+            while self.position < frame_number:
+                if not self.cap.grab():
+                    return
+                self.position += 1
+
+            ret, frame = self.cap.retrieve()
+            if not ret:
+                return
+            yield frame_number, frame
+            frame_number += self.stride
+
+    def read_frame(self, frame_number):
+        """Decode a single frame by number, return None if it can't be reached"""
+        if not self.seek(frame_number):
+            return None
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        self.position = frame_number
+        return frame
+
+    def seek(self, frame_number):
+        """Position the capture so that the next read() returns frame `frame_number` (1-based)"""
+        target_index = frame_number - 1
+        if target_index == self.position:
+            return True
+
+        if self._seekable:
+            if self._try_seek(cv2.CAP_PROP_POS_FRAMES, target_index, target_index):
+                return True
+            # mot so backend khong ho tro seek theo so frame, thu lai theo thoi gian
+            if self.fps > 0 and self._try_seek(cv2.CAP_PROP_POS_MSEC, target_index * 1000.0 / self.fps, target_index):
+                return True
+            # backend khong seek chinh xac duoc, tu day chi grab tuan tu
+            self._seekable = False
+
+        if self.position > target_index:
+            return False
+        while self.position < target_index:
+            if not self.cap.grab():
+                return False
+            self.position += 1
+        return True
+
+    def _try_seek(self, prop, value, target_index):
+        ok = self.cap.set(prop, value)
+        # dong bo lai vi tri thuc te cua capture, ke ca khi seek that bai
+        self.position = int(round(self.cap.get(cv2.CAP_PROP_POS_FRAMES)))
+        return ok and self.position == target_index
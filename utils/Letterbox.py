@@ -0,0 +1,91 @@
+import cv2
+import numpy as np
+from config.config import Config
+from utils.detection_utils import Detections
+
+
+class Letterbox:
+    """Resize frames for the model into buffers that are reused between batches.
+
+    The frame is scaled so its long side is `imgsz` (rounded up to a multiple of
+    `stride`), placed at the top-left corner and padded on the bottom/right only up
+    to the next multiple of `stride`. Buffer i is overwritten by the next call, so
+    the images must be consumed (the model called) before preparing the next batch.
+    """
+
+    PAD_VALUE = 114
+
+    def __init__(self, imgsz, stride=32):
+        self.stride = max(1, int(stride))
+        self.imgsz = -(-max(int(imgsz), self.stride) // self.stride) * self.stride
+        # moi vi tri trong batch co buffer rieng: (buffer, ratio, kich thuoc frame goc)
+        self._slots = []
+
+    @classmethod
+    def for_model(cls, model, imgsz=None):
+        """Letterbox sized for a YOLO model: `imgsz`, else Config.DETECTION_IMGSZ, else the size it was trained at"""
+        # backend (backends.InferenceBackend) co san stride / imgsz, model YOLO thi doc tu model ben trong
+        stride = getattr(model, 'stride', None)
+        if stride is None:
+            stride = getattr(getattr(model, 'model', None), 'stride', None)
+        if stride is not None and not isinstance(stride, int):
+            stride = int(max(stride))
+        if not imgsz:
+            imgsz = (Config.DETECTION_IMGSZ or getattr(model, 'imgsz', None)
+                     or getattr(model, 'overrides', {}).get('imgsz') or 640)
+        if isinstance(imgsz, (list, tuple)):
+            imgsz = max(imgsz)
+        return cls(imgsz, stride or 32)
+
+    def input_shape(self, frame_shape):
+        """(height, width) of the model input for a frame of this shape"""
+        height, width = frame_shape[:2]
+        ratio = self.imgsz / max(height, width)
+        new_height, new_width = max(1, int(round(height * ratio))), max(1, int(round(width * ratio)))
+        return (
+            -(-new_height // self.stride) * self.stride,
+            -(-new_width // self.stride) * self.stride
+        )
+
+    def _slot(self, index, frame):
+        height, width = frame.shape[:2]
+        if index < len(self._slots):
+            buffer, ratio, source_shape = self._slots[index]
+            if source_shape == (height, width) and buffer.shape[2:] == frame.shape[2:]:
+                return self._slots[index]
+
+        # kich thuoc frame thay doi (hoac lan dau): cap phat lai buffer, phan padding chi can to mot lan
+        ratio = self.imgsz / max(height, width)
+        input_height, input_width = self.input_shape(frame.shape)
+        buffer = np.full((input_height, input_width) + frame.shape[2:], self.PAD_VALUE, dtype=frame.dtype)
+        slot = (buffer, ratio, (height, width))
+        if index < len(self._slots):
+            self._slots[index] = slot
+        else:
+            self._slots.append(slot)
+        return slot
+
+    def apply(self, frames):
+        """Letterbox a batch of frames, return the reused buffers in the same order"""
+        images = []
+        for index, frame in enumerate(frames):
+            buffer, ratio, (height, width) = self._slot(index, frame)
+            new_height, new_width = max(1, int(round(height * ratio))), max(1, int(round(width * ratio)))
+            if (new_height, new_width) == (height, width):
+                buffer[:height, :width] = frame
+            else:
+                # resize thang vao vung anh cua buffer, khong tao mang trung gian
+                cv2.resize(frame, (new_width, new_height), dst=buffer[:new_height, :new_width],
+                           interpolation=cv2.INTER_LINEAR)
+            images.append(buffer)
+        return images
+
+    def to_original(self, detections, index):
+        """Map Detections of batch image `index` back to the coordinates of the frame it came from"""
+        if not len(detections.class_ids):
+            return detections
+        _, ratio, (height, width) = self._slots[index]
+        xyxy = detections.xyxy / np.float32(ratio)
+        xyxy[:, [0, 2]] = np.clip(xyxy[:, [0, 2]], 0, width)
+        xyxy[:, [1, 3]] = np.clip(xyxy[:, [1, 3]], 0, height)
+        return Detections(xyxy.astype(np.float32, copy=False), detections.confidence, detections.class_ids)
@@ -0,0 +1,70 @@
+import numpy as np
+from utils.box_ops import match_detections
+
+
+class ModelAgreement:
+    """Side-by-side comparison of several models run on the same sampled frames.
+
+    `observe` takes the Detections of every model for one frame. A frame counts as fraud for
+    a model when it has at least one box; boxes of two models match when they have the same
+    class and IoU >= iou_threshold (optimal one-to-one pairing).
+    """
+
+    def __init__(self, model_count, iou_threshold=0.5):
+        self.model_count = model_count
+        self.iou_threshold = iou_threshold
+        self.frames = 0
+        self.fraud_frames = np.zeros(model_count, dtype=np.int64)
+        self.boxes = np.zeros(model_count, dtype=np.int64)
+        self.inference_seconds = np.zeros(model_count, dtype=np.float64)
+        # cap (a, b) voi a < b
+        self.pairs = {
+            (first, second): {'bothFraud': 0, 'onlyFirst': 0, 'onlySecond': 0, 'matchedBoxes': 0}
+            for first in range(model_count) for second in range(first + 1, model_count)
+        }
+
+    def record_time(self, index, seconds):
+        self.inference_seconds[index] += seconds
+
+    def observe(self, detections_per_model):
+        self.frames += 1
+        has_fraud = [len(detections.class_ids) > 0 for detections in detections_per_model]
+        for index, detections in enumerate(detections_per_model):
+            self.fraud_frames[index] += has_fraud[index]
+            self.boxes[index] += len(detections.class_ids)
+
+        for (first, second), pair in self.pairs.items():
+            if has_fraud[first] and has_fraud[second]:
+                pair['bothFraud'] += 1
+                _, _, ious = match_detections(detections_per_model[first], detections_per_model[second])
+                pair['matchedBoxes'] += int(np.count_nonzero(ious >= self.iou_threshold))
+            elif has_fraud[first]:
+                pair['onlyFirst'] += 1
+            elif has_fraud[second]:
+                pair['onlySecond'] += 1
+
+    def summary(self, model_ids):
+        frames = self.frames
+        models = [
+            {
+                'modelId': model_id,
+                'framesWithFraud': int(self.fraud_frames[index]),
+                'boxes': int(self.boxes[index]),
+                'avgInferenceMs': round(self.inference_seconds[index] / frames * 1000, 2) if frames else None
+            }
+            for index, model_id in enumerate(model_ids)
+        ]
+        pairs = []
+        for (first, second), pair in self.pairs.items():
+            boxes = int(self.boxes[first] + self.boxes[second])
+            pairs.append({
+                'models': [model_ids[first], model_ids[second]],
+                # ti le frame ca hai model cung ket luan (cung co hoac cung khong co gian lan)
+                'frameAgreement': round((frames - pair['onlyFirst'] - pair['onlySecond']) / frames, 4) if frames else None,
+                'bothFraud': pair['bothFraud'],
+                'onlyFirst': pair['onlyFirst'],
+                'onlySecond': pair['onlySecond'],
+                'matchedBoxes': pair['matchedBoxes'],
+                'boxF1': round(2 * pair['matchedBoxes'] / boxes, 4) if boxes else None
+            })
+        return {'framesCompared': frames, 'iouThreshold': self.iou_threshold, 'models': models, 'pairs': pairs}
@@ -0,0 +1,32 @@
+import cv2
+
+
+class MotionGate:
+    """Cheap pre-check that tells whether a frame changed enough since the last inferred frame.
+
+    Frames are compared as small grayscale thumbnails; `threshold` is the mean absolute
+    pixel difference as a fraction of 255 below which the frame counts as static.
+    """
+
+    def __init__(self, threshold, size=(64, 36)):
+        self.threshold = threshold
+        self.size = size
+        self._reference = None
+
+    def _thumbnail(self, frame):
+        # thu nho truoc roi moi chuyen xam de khong phai xu ly ca frame full size
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small
+
+    def should_infer(self, frame):
+        thumbnail = self._thumbnail(frame)
+        if self._reference is not None:
+            difference = cv2.absdiff(thumbnail, self._reference).mean() / 255.0
+            if difference < self.threshold:
+                return False
+
+        # chi cap nhat frame tham chieu khi frame nay duoc dua vao model
+        self._reference = thumbnail
+        return True
@@ -0,0 +1,111 @@
+import json
+import os
+import numpy as np
+from utils.detection_utils import Detections, build_fraud_class_mask, empty_detections
+from utils.box_ops import detections_similar
+
+
+class RawDetections:
+    """Detections of every inferred frame of a PhaseDetection before class / threshold filtering and dedup.
+
+    Stored column-wise in one compressed .npz: frame_numbers and box counts per frame, then
+    xyxy, confidence and class_ids of all boxes in frame order, plus the model class names
+    and the confidence floor the model ran at. `derive` replays the filtering and dedup of
+    VideoDetectionService for other thresholds without running the model again.
+    """
+
+    def __init__(self, names, confidence_floor):
+        items = names.items() if isinstance(names, dict) else enumerate(names)
+        self.names = {int(class_id): str(class_name) for class_id, class_name in items}
+        self.confidence_floor = float(confidence_floor)
+        self.frame_numbers = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros(0, dtype=np.int32)
+        self.xyxy = np.zeros((0, 4), dtype=np.float32)
+        self.confidence = np.zeros(0, dtype=np.float32)
+        self.class_ids = np.zeros(0, dtype=np.int16)
+        # frame moi them, chi gop vao cac cot khi can doc / ghi
+        self._pending = []
+
+    def __len__(self):
+        return len(self.frame_numbers) + len(self._pending)
+
+    def add(self, frame_number, detections):
+        self._pending.append((frame_number, detections))
+
+    def _flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        self.frame_numbers = np.concatenate([self.frame_numbers, [frame_number for frame_number, _ in pending]])
+        self.counts = np.concatenate([self.counts, [len(detections.class_ids) for _, detections in pending]])
+        self.xyxy = np.concatenate([self.xyxy] + [detections.xyxy.reshape(-1, 4) for _, detections in pending])
+        self.confidence = np.concatenate([self.confidence] + [detections.confidence for _, detections in pending])
+        self.class_ids = np.concatenate([self.class_ids] + [detections.class_ids for _, detections in pending])
+        self.frame_numbers = self.frame_numbers.astype(np.int64, copy=False)
+        self.counts = self.counts.astype(np.int32, copy=False)
+        self.xyxy = self.xyxy.astype(np.float32, copy=False)
+        self.confidence = self.confidence.astype(np.float32, copy=False)
+        self.class_ids = self.class_ids.astype(np.int16, copy=False)
+
+    def truncate(self, last_frame):
+        """Drop the frames after `last_frame` (resuming a job from its checkpoint)"""
+        self._flush()
+        frames = int(np.searchsorted(self.frame_numbers, last_frame, side='right'))
+        boxes = int(self.counts[:frames].sum())
+        self.frame_numbers = self.frame_numbers[:frames]
+        self.counts = self.counts[:frames]
+        self.xyxy = self.xyxy[:boxes]
+        self.confidence = self.confidence[:boxes]
+        self.class_ids = self.class_ids[:boxes]
+
+    def save(self, path):
+        self._flush()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # ghi file tam roi doi ten, request dang doc file cu khong thay file ghi do
+        tmp_path = path + '.tmp.npz'
+        np.savez_compressed(
+            tmp_path,
+            frame_numbers=self.frame_numbers, counts=self.counts, xyxy=self.xyxy,
+            confidence=self.confidence, class_ids=self.class_ids,
+            names=np.array(json.dumps(self.names)), confidence_floor=np.float64(self.confidence_floor)
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            raw = cls(json.loads(str(data['names'])), float(data['confidence_floor']))
+            raw.frame_numbers = data['frame_numbers']
+            raw.counts = data['counts']
+            raw.xyxy = data['xyxy']
+            raw.confidence = data['confidence']
+            raw.class_ids = data['class_ids']
+        return raw
+
+    def derive(self, confidence_threshold, similarity_threshold):
+        """[(frame_number, Detections)] of the frames that would be saved with these thresholds"""
+        if confidence_threshold < self.confidence_floor:
+            raise RuntimeError(
+                f"Raw detections were stored down to confidence {self.confidence_floor}, "
+                f"can't derive results for {confidence_threshold}"
+            )
+        self._flush()
+        # loc class / confidence tren ca cot mot lan, chi lap qua cac frame con box
+        class_ids = self.class_ids.astype(np.int64)
+        keep = build_fraud_class_mask(self.names)[class_ids] & (self.confidence >= np.float32(confidence_threshold))
+        rows = np.flatnonzero(keep)
+        frame_index = np.repeat(np.arange(len(self.frame_numbers)), self.counts)[rows]
+        frames, starts = np.unique(frame_index, return_index=True)
+        ends = np.append(starts[1:], len(rows))
+
+        flagged = []
+        previous = empty_detections()
+        for index, start, end in zip(frames, starts, ends):
+            frame_rows = rows[start:end]
+            detections = Detections(self.xyxy[frame_rows], self.confidence[frame_rows], class_ids[frame_rows])
+            # giong VideoDetectionService: frame giong frame da luu gan nhat thi bo qua
+            if detections_similar(previous, detections, similarity_threshold):
+                continue
+            previous = detections
+            flagged.append((int(self.frame_numbers[index]), detections))
+        return flagged
@@ -0,0 +1,88 @@
+import cv2
+import numpy as np
+from utils.detection_utils import Detections
+
+
+class RegionOfInterest:
+    """Restrict inference to parts of the frame.
+
+    `regions` is a list of rectangles {"x", "y", "width", "height"} and/or polygons
+    {"points": [[x, y], ...]} in full-frame pixels. The model sees only the bounding
+    crop of all regions, with pixels outside the regions blacked out when the regions
+    don't fill that crop. Boxes are mapped back to full-frame coordinates and boxes
+    whose center falls outside every region are dropped.
+    """
+
+    def __init__(self, regions):
+        if not isinstance(regions, (list, tuple)) or not regions:
+            raise ValueError("roi must be a non-empty list of regions")
+        self.polygons = [self._to_polygon(region) for region in regions]
+        # crop / mask tinh theo kich thuoc frame, video doi do phan giai thi tinh lai
+        self._shape = None
+        self._crop = None
+        self._mask = None
+
+    @staticmethod
+    def _to_polygon(region):
+        try:
+            if 'points' in region:
+                points = np.asarray(region['points'], dtype=np.float64).reshape(-1, 2)
+                if len(points) < 3:
+                    raise ValueError("a polygon needs at least 3 points")
+            else:
+                x, y = float(region['x']), float(region['y'])
+                width, height = float(region['width']), float(region['height'])
+                if width <= 0 or height <= 0:
+                    raise ValueError("width and height must be positive")
+                points = np.array([[x, y], [x + width, y], [x + width, y + height], [x, y + height]])
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Invalid roi region {region}: {e}")
+        return np.round(points).astype(np.int32)
+
+    def _prepare(self, shape):
+        if self._shape == shape[:2]:
+            return
+        height, width = shape[:2]
+        points = np.concatenate(self.polygons)
+        x1 = int(np.clip(points[:, 0].min(), 0, width))
+        y1 = int(np.clip(points[:, 1].min(), 0, height))
+        x2 = int(np.clip(points[:, 0].max(), 0, width))
+        y2 = int(np.clip(points[:, 1].max(), 0, height))
+        if x2 <= x1 or y2 <= y1:
+            raise ValueError(f"roi is outside the {width}x{height} frame")
+
+        mask = np.zeros((y2 - y1, x2 - x1), dtype=np.uint8)
+        cv2.fillPoly(mask, [polygon - (x1, y1) for polygon in self.polygons], 255)
+        self._shape = shape[:2]
+        self._crop = (x1, y1, x2, y2)
+        # cac vung phu kin khung crop (vd mot hinh chu nhat) thi khong can to den
+        self._mask = None if mask.all() else mask
+
+    def crop(self, frame):
+        """View of the frame inside the bounding crop (no copy, no masking)"""
+        self._prepare(frame.shape)
+        x1, y1, x2, y2 = self._crop
+        return frame[y1:y2, x1:x2]
+
+    def apply(self, frame):
+        """Image passed to the model: the crop with pixels outside the regions set to black"""
+        cropped = self.crop(frame)
+        if self._mask is None:
+            return cropped
+        return cv2.bitwise_and(cropped, cropped, mask=self._mask)
+
+    def to_full_frame(self, detections):
+        """Map Detections from crop coordinates back to the full frame, dropping boxes outside the regions"""
+        if not len(detections.class_ids):
+            return detections
+        x1, y1, _, _ = self._crop
+        xyxy = detections.xyxy + np.array([x1, y1, x1, y1], dtype=detections.xyxy.dtype)
+
+        if self._mask is not None:
+            # giu box co tam nam trong mot vung
+            height, width = self._mask.shape
+            centers_x = np.clip(((detections.xyxy[:, 0] + detections.xyxy[:, 2]) / 2).astype(np.int64), 0, width - 1)
+            centers_y = np.clip(((detections.xyxy[:, 1] + detections.xyxy[:, 3]) / 2).astype(np.int64), 0, height - 1)
+            keep = self._mask[centers_y, centers_x] > 0
+            return Detections(xyxy[keep], detections.confidence[keep], detections.class_ids[keep])
+        return Detections(xyxy, detections.confidence, detections.class_ids)
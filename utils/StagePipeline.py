@@ -0,0 +1,120 @@
+import queue
+import threading
+
+
+class PipelineStopped(Exception):
+    """Raised inside a stage when the pipeline is shutting down because another stage stopped"""
+    pass
+
+
+class StagePipeline:
+    """Run a source and a chain of stages in separate threads joined by bounded queues.
+
+    `source` is any iterable. Each stage is a callable that takes an iterator over the
+    previous stage's items and returns an iterator of its own items; whatever the last
+    stage yields is dropped. A full queue blocks the producer (backpressure). If any
+    stage raises, every other stage is stopped and run() re-raises the first error.
+    A stage that returns early stops everything upstream of it, while the stages
+    after it still finish the items already handed to them.
+    """
+
+    _END = object()
+    _POLL_INTERVAL = 0.1
+
+    def __init__(self, source, stages, queue_size=8, name='pipeline'):
+        self.source = source
+        self.stages = list(stages)
+        self.queue_size = max(1, int(queue_size))
+        self.name = name
+        self._stop = threading.Event()
+        self._errors = []
+        self._errors_lock = threading.Lock()
+
+    def run(self):
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        # queue i bi dong khi stage doc no da ket thuc, stage ghi vao se dung lai
+        closed = [threading.Event() for _ in self.stages]
+
+        threads = [threading.Thread(
+            target=self._run_source, args=(queues[0], closed[0]),
+            name=f"{self.name}-source", daemon=True
+        )]
+        for index, stage in enumerate(self.stages):
+            has_next = index + 1 < len(queues)
+            threads.append(threading.Thread(
+                target=self._run_stage,
+                args=(
+                    stage, queues[index], closed[index],
+                    queues[index + 1] if has_next else None,
+                    closed[index + 1] if has_next else None
+                ),
+                name=f"{self.name}-stage-{index}", daemon=True
+            ))
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self._errors:
+            raise self._errors[0]
+
+    def stop(self):
+        """Ask every stage to stop as soon as possible"""
+        self._stop.set()
+
+    @property
+    def stopped(self):
+        return self._stop.is_set()
+
+    def _run_source(self, out_queue, out_closed):
+        try:
+            for item in self.source:
+                self._put(out_queue, out_closed, item)
+            self._put(out_queue, out_closed, self._END)
+        except PipelineStopped:
+            pass
+        except Exception as e:
+            self._fail(e)
+
+    def _run_stage(self, stage, in_queue, in_closed, out_queue, out_closed):
+        try:
+            for item in stage(self._iter_queue(in_queue)):
+                if out_queue is not None:
+                    self._put(out_queue, out_closed, item)
+            if out_queue is not None:
+                self._put(out_queue, out_closed, self._END)
+        except PipelineStopped:
+            pass
+        except Exception as e:
+            self._fail(e)
+        finally:
+            # stage co the ket thuc som, bao cho stage truoc dung lai thay vi bi block o queue day
+            in_closed.set()
+
+    def _fail(self, error):
+        with self._errors_lock:
+            self._errors.append(error)
+        self._stop.set()
+
+    def _put(self, out_queue, out_closed, item):
+        while True:
+            if self._stop.is_set() or out_closed.is_set():
+                raise PipelineStopped()
+            try:
+                out_queue.put(item, timeout=self._POLL_INTERVAL)
+                return
+            except queue.Full:
+                continue
+
+    def _iter_queue(self, in_queue):
+        while True:
+            if self._stop.is_set():
+                raise PipelineStopped()
+            try:
+                item = in_queue.get(timeout=self._POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            if item is self._END:
+                return
+            yield item
@@ -0,0 +1,201 @@
+import os
+import queue
+import stat
+import threading
+import time
+import cv2
+from config.config import Config
+from utils.FrameSampler import FrameSampler
+
+
+class StreamFrameSource:
+    """Yield (frame_number, frame) for every frame_skip-th frame of a source that is still producing frames:
+    a stream URL (rtsp/http/...), a named pipe or a video file that is still being written.
+
+    Frame numbers are 1-based and keep counting across reconnects. Memory stays bounded:
+    a live stream is read by a background thread into a queue of at most `buffer_size`
+    frames and the oldest frames are dropped when processing falls behind (`frames_dropped`).
+    A file is re-opened from the last read frame whenever it grows and the source ends
+    once it has not grown for `idle_timeout` seconds. `should_stop` is polled so the
+    caller can end an endless stream.
+    """
+
+    LIVE_SCHEMES = ('rtsp://', 'rtsps://', 'rtmp://', 'http://', 'https://', 'udp://', 'tcp://', 'srt://')
+
+    def __init__(self, source, frame_skip, stride_controller=None, should_stop=None, idle_timeout=None,
+                 buffer_size=None):
+        self.source = source
+        self.frame_skip = max(1, int(frame_skip or 1))
+        self.stride_controller = stride_controller
+        self.should_stop = should_stop
+        self.idle_timeout = idle_timeout if idle_timeout is not None else Config.STREAM_IDLE_TIMEOUT
+        self.buffer_size = max(1, int(buffer_size or Config.STREAM_BUFFER_SIZE))
+        self.frames_dropped = 0
+        self.fps = 0
+        self._stop = threading.Event()
+
+    @classmethod
+    def is_stream_url(cls, source):
+        return isinstance(source, str) and source.lower().startswith(cls.LIVE_SCHEMES)
+
+    @staticmethod
+    def is_pipe(source):
+        try:
+            return stat.S_ISFIFO(os.stat(source).st_mode)
+        except OSError:
+            return False
+
+    @property
+    def stride(self):
+        if self.stride_controller is not None:
+            return max(1, int(self.stride_controller.stride))
+        return self.frame_skip
+
+    def stop(self):
+        self._stop.set()
+
+    def _stopped(self):
+        return self._stop.is_set() or (self.should_stop is not None and self.should_stop())
+
+    def __iter__(self):
+        if self.is_stream_url(self.source):
+            return self._iter_stream()
+        if self.is_pipe(self.source):
+            return self._iter_pipe()
+        return self._iter_growing_file()
+
+    def _open(self):
+        if self.is_stream_url(self.source):
+            # host khong tra loi thi khong treo reader thread
+            cap = cv2.VideoCapture(self.source, cv2.CAP_ANY, [
+                cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, Config.STREAM_OPEN_TIMEOUT_MS,
+                cv2.CAP_PROP_READ_TIMEOUT_MSEC, Config.STREAM_READ_TIMEOUT_MS
+            ])
+        else:
+            cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            cap.release()
+            return None
+        self.fps = self.fps or cap.get(cv2.CAP_PROP_FPS) or 0
+        return cap
+
+    def _iter_pipe(self):
+        # pipe chi doc duoc mot lan, het du lieu (writer dong pipe) la ket thuc
+        cap = self._open()
+        if cap is None:
+            raise ValueError(f"Cannot open stream: {self.source}")
+        try:
+            sampler = FrameSampler(cap, self.frame_skip, strategy=FrameSampler.GRAB,
+                                   stride_controller=self.stride_controller)
+            for item in sampler:
+                if self._stopped():
+                    return
+                yield item
+        finally:
+            cap.release()
+
+    def _iter_growing_file(self):
+        next_frame = self.frame_skip
+        last_size = None
+        last_growth = time.monotonic()
+
+        while not self._stopped():
+            size = os.path.getsize(self.source) if os.path.exists(self.source) else -1
+            if size != last_size:
+                last_size = size
+                last_growth = time.monotonic()
+                # file co them du lieu: mo lai va doc tiep tu frame can lay tiep theo
+                cap = self._open() if size > 0 else None
+                if cap is not None:
+                    try:
+                        sampler = FrameSampler(cap, self.frame_skip, start_frame=next_frame,
+                                               stride_controller=self.stride_controller)
+                        for frame_number, frame in sampler:
+                            if self._stopped():
+                                return
+                            yield frame_number, frame
+                            next_frame = frame_number + self.stride
+                            last_growth = time.monotonic()
+                    finally:
+                        cap.release()
+            elif time.monotonic() - last_growth >= self.idle_timeout:
+                # file khong ghi them trong idle_timeout giay: coi nhu da ghi xong
+                return
+            time.sleep(Config.STREAM_POLL_INTERVAL)
+
+    def _iter_stream(self):
+        buffer = queue.Queue(maxsize=self.buffer_size)
+        end = object()
+        reader = threading.Thread(target=self._read_stream, args=(buffer, end),
+                                  name='stream-frame-reader', daemon=True)
+        reader.start()
+        try:
+            while True:
+                try:
+                    item = buffer.get(timeout=Config.STREAM_POLL_INTERVAL)
+                except queue.Empty:
+                    if self._stopped() or not reader.is_alive():
+                        return
+                    continue
+                if item is end:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            self._stop.set()
+            reader.join(timeout=Config.STREAM_RECONNECT_DELAY + 1)
+
+    def _read_stream(self, buffer, end):
+        frame_count = 0
+        next_frame = self.frame_skip
+        failures = 0
+        try:
+            while not self._stopped():
+                cap = self._open()
+                if cap is None:
+                    failures += 1
+                    if failures > Config.STREAM_RECONNECT_ATTEMPTS:
+                        raise ValueError(f"Cannot open stream: {self.source}")
+                    time.sleep(Config.STREAM_RECONNECT_DELAY)
+                    continue
+                failures = 0
+                # url tro toi mot file (biet so frame) thi doc het la xong, khong bo frame va khong ket noi lai
+                is_live = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0) <= 0
+                try:
+                    while not self._stopped() and cap.grab():
+                        frame_count += 1
+                        if frame_count < next_frame:
+                            continue
+                        next_frame = frame_count + self.stride
+                        ret, frame = cap.retrieve()
+                        if ret:
+                            self._put(buffer, (frame_count, frame), drop_oldest=is_live)
+                finally:
+                    cap.release()
+                if not is_live:
+                    break
+                # mat ket noi: ket noi lai, so frame tiep tuc dem tu frame cuoi cung
+                print(f"Stream {self.source} disconnected after frame {frame_count}, reconnecting")
+                time.sleep(Config.STREAM_RECONNECT_DELAY)
+        except Exception as e:
+            self._put(buffer, e, drop_oldest=True)
+        self._put(buffer, end, drop_oldest=False)
+
+    def _put(self, buffer, item, drop_oldest):
+        while not self._stop.is_set():
+            try:
+                if drop_oldest:
+                    buffer.put_nowait(item)
+                else:
+                    buffer.put(item, timeout=Config.STREAM_POLL_INTERVAL)
+                return
+            except queue.Full:
+                if not drop_oldest:
+                    continue
+            # phia xu ly khong theo kip stream: bo frame cu nhat, giu frame moi nhat
+            try:
+                buffer.get_nowait()
+                self.frames_dropped += 1
+            except queue.Empty:
+                pass
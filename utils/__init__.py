@@ -0,0 +1,48 @@
+# utils/__init__.py
+
+from .FrameSampler import FrameSampler
+from .StreamFrameSource import StreamFrameSource
+from .AdaptiveStride import AdaptiveStride
+from .StagePipeline import StagePipeline, PipelineStopped
+from .MotionGate import MotionGate
+from .RegionOfInterest import RegionOfInterest
+from .Letterbox import Letterbox
+from .FrameCache import FrameCache, CachedFrames, FrameCacheWriter
+from .ModelAgreement import ModelAgreement
+from .RawDetections import RawDetections
+from .detection_utils import (
+    Detections, build_fraud_class_mask, empty_detections, extract_detections, filter_detections, detect_frames,
+    detect_frames_raw, to_numpy, scale_detections, detections_to_dict, detections_from_dict
+)
+from .box_ops import iou_matrix, match_detections, detections_similar, average_precision
+
+__all__ = [
+    'FrameSampler',
+    'StreamFrameSource',
+    'AdaptiveStride',
+    'StagePipeline',
+    'PipelineStopped',
+    'MotionGate',
+    'RegionOfInterest',
+    'Letterbox',
+    'FrameCache',
+    'CachedFrames',
+    'FrameCacheWriter',
+    'ModelAgreement',
+    'RawDetections',
+    'Detections',
+    'build_fraud_class_mask',
+    'empty_detections',
+    'extract_detections',
+    'filter_detections',
+    'detect_frames',
+    'detect_frames_raw',
+    'to_numpy',
+    'scale_detections',
+    'detections_to_dict',
+    'detections_from_dict',
+    'iou_matrix',
+    'match_detections',
+    'detections_similar',
+    'average_precision'
+]
@@ -0,0 +1,123 @@
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+
+def iou_matrix(boxes1, boxes2):
+    """IoU of every pair of xyxy boxes, shape (len(boxes1), len(boxes2))"""
+    boxes1 = np.asarray(boxes1, dtype=np.float32).reshape(-1, 4)
+    boxes2 = np.asarray(boxes2, dtype=np.float32).reshape(-1, 4)
+
+    size = np.minimum(boxes1[:, None, 2:], boxes2[None, :, 2:]) - np.maximum(boxes1[:, None, :2], boxes2[None, :, :2])
+    np.maximum(size, 0, out=size)
+    intersection = size[..., 0] * size[..., 1]
+
+    area1 = (boxes1[:, 2] - boxes1[:, 0]) * (boxes1[:, 3] - boxes1[:, 1])
+    area2 = (boxes2[:, 2] - boxes2[:, 0]) * (boxes2[:, 3] - boxes2[:, 1])
+    union = area1[:, None] + area2[None, :] - intersection
+
+    # box suy bien (dien tich 0) cho IoU = 0 thay vi chia cho 0
+    return intersection / np.maximum(union, np.finfo(np.float32).tiny)
+
+
+def _box_iou(box1, box2):
+    """IoU of two xyxy boxes given as lists of Python floats"""
+    width = min(box1[2], box2[2]) - max(box1[0], box2[0])
+    height = min(box1[3], box2[3]) - max(box1[1], box2[1])
+    if width <= 0 or height <= 0:
+        return 0.0
+    intersection = width * height
+    union = (box1[2] - box1[0]) * (box1[3] - box1[1]) + (box2[2] - box2[0]) * (box2[3] - box2[1]) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def match_detections(detections1, detections2):
+    """Pair boxes of the same class with maximum total IoU (one linear sum assignment).
+
+    Return (index1, index2, iou) arrays of the matched pairs; boxes of a class with more
+    boxes on one side than the other stay unmatched.
+    """
+    iou = iou_matrix(detections1.xyxy, detections2.xyxy)
+    same_class = detections1.class_ids[:, None] == detections2.class_ids[None, :]
+
+    # cap khac class bi phat nang hon tong IoU lon nhat co the, nen chi duoc ghep khi khong con cach nao khac
+    penalty = -float(max(iou.shape) + 1)
+    rows, cols = linear_sum_assignment(np.where(same_class, iou, penalty), maximize=True)
+
+    keep = same_class[rows, cols]
+    return rows[keep], cols[keep], iou[rows[keep], cols[keep]]
+
+
+def detections_similar(detections1, detections2, threshold):
+    """True when both frames have the same boxes per class: every optimally matched pair has
+    IoU >= threshold and confidences differing by at most 1 - threshold"""
+    count = len(detections1.class_ids)
+    if count != len(detections2.class_ids):
+        return False
+    if count == 0:
+        return True
+
+    classes1 = detections1.class_ids.tolist()
+    if len(set(classes1)) == count:
+        # truong hop thuong gap: moi class toi da mot box nen chi co mot cach ghep (theo class),
+        # so sanh tung cap bang so thuc Python, khong can ma tran IoU va linear_sum_assignment
+        index2_by_class = {class_id: index for index, class_id in enumerate(detections2.class_ids.tolist())}
+        if len(index2_by_class) != count or index2_by_class.keys() != set(classes1):
+            return False
+        boxes1, boxes2 = detections1.xyxy.tolist(), detections2.xyxy.tolist()
+        confidence1, confidence2 = detections1.confidence.tolist(), detections2.confidence.tolist()
+        for index1, class_id in enumerate(classes1):
+            index2 = index2_by_class[class_id]
+            if abs(confidence1[index1] - confidence2[index2]) > 1 - threshold:
+                return False
+            if _box_iou(boxes1[index1], boxes2[index2]) < threshold:
+                return False
+        return True
+
+    # so box cua tung class phai bang nhau thi moi co the ghep du cap
+    if not np.array_equal(np.sort(detections1.class_ids), np.sort(detections2.class_ids)):
+        return False
+
+    index1, index2, ious = match_detections(detections1, detections2)
+    confidence_diff = np.abs(detections1.confidence[index1] - detections2.confidence[index2])
+    return bool(np.all(ious >= threshold) and np.all(confidence_diff <= 1 - threshold))
+
+
+def average_precision(predictions, references, iou_threshold=0.5):
+    """mAP@iou_threshold of per-frame Detections against reference Detections, averaged over reference classes"""
+    classes = sorted({int(c) for reference in references for c in reference.class_ids})
+    if not classes:
+        return None
+
+    precisions = []
+    for class_id in classes:
+        scored = []
+        reference_count = 0
+        for prediction, reference in zip(predictions, references):
+            reference_boxes = reference.xyxy[reference.class_ids == class_id]
+            reference_count += len(reference_boxes)
+            keep = prediction.class_ids == class_id
+            boxes, confidence = prediction.xyxy[keep], prediction.confidence[keep]
+            order = np.argsort(-confidence)
+            ious = iou_matrix(boxes[order], reference_boxes)
+            matched = np.zeros(len(reference_boxes), dtype=bool)
+            # ghep tham lam theo confidence giam dan, moi box tham chieu chi duoc ghep mot lan
+            for row, index in enumerate(order):
+                hit = False
+                if len(reference_boxes):
+                    candidates = np.where(~matched & (ious[row] >= iou_threshold))[0]
+                    if len(candidates):
+                        matched[candidates[np.argmax(ious[row][candidates])]] = True
+                        hit = True
+                scored.append((float(confidence[index]), hit))
+
+        scored.sort(key=lambda item: -item[0])
+        hits = np.array([hit for _, hit in scored], dtype=bool)
+        true_positives = np.cumsum(hits)
+        recall = true_positives / max(reference_count, 1)
+        precision = true_positives / np.arange(1, len(hits) + 1)
+        # AP = dien tich duoi duong precision/recall (precision lay max ve phia recall lon hon)
+        recall = np.concatenate([[0.0], recall, [1.0]])
+        precision = np.concatenate([[1.0], precision, [0.0]])
+        precision = np.maximum.accumulate(precision[::-1])[::-1]
+        precisions.append(float(np.sum((recall[1:] - recall[:-1]) * precision[1:])))
+    return float(np.mean(precisions))
@@ -0,0 +1,114 @@
+from collections import namedtuple
+import numpy as np
+
+
+# cac box cua mot frame dang mang numpy: xyxy (N, 4), confidence (N,), class_ids (N,)
+Detections = namedtuple('Detections', ['xyxy', 'confidence', 'class_ids'])
+
+# nguong confidence mac dinh cua ultralytics / cac backend khi request khong dat confidence_threshold
+DEFAULT_CONFIDENCE_THRESHOLD = 0.25
+
+
+def empty_detections():
+    return Detections(
+        np.zeros((0, 4), dtype=np.float32),
+        np.zeros((0,), dtype=np.float32),
+        np.zeros((0,), dtype=np.int64)
+    )
+
+
+def build_fraud_class_mask(names):
+    """Boolean array indexed by class id, False for the "normal" class"""
+    items = names.items() if isinstance(names, dict) else enumerate(names)
+    items = list(items)
+    mask = np.ones(max((int(class_id) for class_id, _ in items), default=-1) + 1, dtype=bool)
+    for class_id, class_name in items:
+        if str(class_name).lower() == "normal":
+            mask[int(class_id)] = False
+    return mask
+
+
+def to_numpy(values):
+    # tensor cua torch thi dua ve cpu truoc, backend khac co the tra ve numpy san
+    if hasattr(values, 'cpu'):
+        values = values.cpu()
+    if hasattr(values, 'numpy'):
+        return values.numpy()
+    return np.asarray(values)
+
+
+def extract_detections(result, fraud_class_mask=None):
+    """Pull the boxes of one YOLO result out as arrays and drop the "normal" class (all classes without a mask)"""
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return empty_detections()
+
+    xyxy = to_numpy(boxes.xyxy).astype(np.float32, copy=False).reshape(-1, 4)
+    confidence = to_numpy(boxes.conf).astype(np.float32, copy=False).reshape(-1)
+    class_ids = to_numpy(boxes.cls).astype(np.int64).reshape(-1)
+
+    if fraud_class_mask is None:
+        return Detections(xyxy, confidence, class_ids)
+    keep = fraud_class_mask[class_ids]
+    return Detections(xyxy[keep], confidence[keep], class_ids[keep])
+
+
+def filter_detections(detections, fraud_class_mask, confidence_threshold=None):
+    """Keep the fraud-class boxes with confidence >= confidence_threshold"""
+    keep = fraud_class_mask[detections.class_ids]
+    if confidence_threshold is not None:
+        keep &= detections.confidence >= np.float32(confidence_threshold)
+    return Detections(detections.xyxy[keep], detections.confidence[keep], detections.class_ids[keep])
+
+
+def detect_frames(model, frames, confidence_threshold, fraud_class_mask, roi=None, letterbox=None):
+    """Run one model call over a batch of full frames, return their Detections in full-frame coordinates"""
+    return detect_frames_raw(model, frames, confidence_threshold, roi, letterbox, fraud_class_mask)
+
+
+def detect_frames_raw(model, frames, confidence_threshold, roi=None, letterbox=None, fraud_class_mask=None):
+    """detect_frames keeping every class (including "normal") unless a fraud_class_mask is given"""
+    images = [roi.apply(frame) for frame in frames] if roi else list(frames)
+    options = {'conf': confidence_threshold}
+    if letterbox:
+        # resize san vao buffer dung lai, model khong phai resize / cap phat anh moi nua
+        images = letterbox.apply(images)
+        options['imgsz'] = letterbox.imgsz
+    results = model(images, **options)
+
+    detections = []
+    for index, result in enumerate(results):
+        frame_detections = extract_detections(result, fraud_class_mask)
+        if letterbox:
+            frame_detections = letterbox.to_original(frame_detections, index)
+        if roi:
+            frame_detections = roi.to_full_frame(frame_detections)
+        detections.append(frame_detections)
+    return detections
+
+
+def scale_detections(detections, factor):
+    """Detections with box coordinates multiplied by `factor` (e.g. from a resized frame back to the original)"""
+    if not len(detections.class_ids):
+        return detections
+    return Detections((detections.xyxy * np.float32(factor)).astype(np.float32, copy=False),
+                      detections.confidence, detections.class_ids)
+
+
+def detections_to_dict(detections):
+    """JSON friendly form of Detections (for checkpoints)"""
+    return {
+        'xyxy': detections.xyxy.tolist(),
+        'confidence': detections.confidence.tolist(),
+        'class_ids': detections.class_ids.tolist()
+    }
+
+
+def detections_from_dict(data):
+    if not data:
+        return empty_detections()
+    return Detections(
+        np.asarray(data.get('xyxy', []), dtype=np.float32).reshape(-1, 4),
+        np.asarray(data.get('confidence', []), dtype=np.float32).reshape(-1),
+        np.asarray(data.get('class_ids', []), dtype=np.int64).reshape(-1)
+    )